@@ -0,0 +1,19 @@
+"""Standalone performance benchmarks.
+
+Each module is runnable with ``python -m benchmarks.<name>`` from the project
+root and works on a throwaway test database, so it never touches the
+configured one.
+"""
+
+import os
+
+import django
+
+from station_api.benchmarking import measure, test_database  # noqa: F401
+from station_api.tests.utils import throttling_disabled  # noqa: F401
+
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "train_station.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    django.setup()
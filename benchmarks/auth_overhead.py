@@ -0,0 +1,91 @@
+"""Authentication cost per request of DRF tokens, JWTs and cached JWTs.
+
+python -m benchmarks.auth_overhead --users 1000 --requests 2000
+"""
+
+import argparse
+import json
+import random
+
+from benchmarks import measure, setup, test_database, throttling_disabled
+
+
+def run(args):
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient, APIRequestFactory
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from station_api.benchmarking import seed
+    from user.authentication import CachedJWTAuthentication, clear_user_cache
+
+    seed({"users": args.users, "orders": 0, "tickets": 0})
+    users = list(get_user_model().objects.all())
+    Token.objects.bulk_create(
+        Token(user=user, key=Token.generate_key()) for user in users
+    )
+    tokens = dict(Token.objects.values_list("user_id", "key"))
+    rng = random.Random(0)
+    # A few active users send most of the requests
+    picks = rng.choices(
+        users, weights=[1 / (i + 1) for i in range(len(users))], k=args.requests
+    )
+    headers = {
+        "token": [f"Token {tokens[user.pk]}" for user in picks],
+        "jwt": [f"Bearer {AccessToken.for_user(user)}" for user in picks],
+    }
+    factory = APIRequestFactory()
+    schemes = {
+        "token": (TokenAuthentication(), headers["token"]),
+        "jwt": (JWTAuthentication(), headers["jwt"]),
+        "cached_jwt": (CachedJWTAuthentication(), headers["jwt"]),
+    }
+    results = {"users": args.users, "requests": args.requests}
+    clear_user_cache()
+    for name, (authenticator, values) in schemes.items():
+        requests = [factory.get("/", HTTP_AUTHORIZATION=value) for value in values]
+
+        def authenticate_all():
+            for request in requests:
+                authenticator.authenticate(request)
+
+        # The query log keeps 9000 entries, the runs of other schemes fill it
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            authenticate_all()
+        timing = measure(authenticate_all, repeat=5)
+        results[name] = {
+            "queries_per_request": round(len(queries) / len(requests), 3),
+            "us_per_request": round(timing["p50"] * 1000 / len(requests), 2),
+        }
+
+    client = APIClient()
+    url = reverse("user:manage")
+    with throttling_disabled():
+        for name, value in (
+            ("token", headers["token"][0]),
+            ("cached_jwt", headers["jwt"][0]),
+        ):
+            client.credentials(HTTP_AUTHORIZATION=value)
+            results[f"{name}.endpoint"] = measure(lambda: client.get(url), repeat=200)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
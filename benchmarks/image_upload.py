@@ -0,0 +1,94 @@
+"""Train image upload latency with inline and background variant rendering.
+
+python -m benchmarks.image_upload --uploads 20 --workers 4
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+from benchmarks import measure, setup, test_database, throttling_disabled
+
+
+def run(args):
+    from django.contrib.auth import get_user_model
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import override_settings
+    from django.urls import reverse
+    from PIL import Image
+    from rest_framework.test import APIClient
+
+    from station_api.images import wait_for_variants
+    from station_api.models import Train, TrainType
+
+    buffer = io.BytesIO()
+    Image.effect_mandelbrot((args.width, args.height), (-2, -1.2, 1, 1.2), 50).convert(
+        "RGB"
+    ).save(buffer, "JPEG", quality=90)
+    image = buffer.getvalue()
+
+    train_type = TrainType.objects.create(name="Benchmark")
+    trains = Train.objects.bulk_create(
+        Train(
+            name=f"Train {index}",
+            cargo_num=10,
+            places_in_cargo=50,
+            train_type=train_type,
+        )
+        for index in range(args.uploads)
+    )
+    client = APIClient()
+    client.force_authenticate(
+        get_user_model().objects.create_superuser("bench@example.com", "password")
+    )
+    urls = iter([])
+
+    def upload():
+        client.patch(
+            next(urls),
+            {"image": SimpleUploadedFile("train.jpg", image, "image/jpeg")},
+            format="multipart",
+        )
+
+    def upload_all():
+        nonlocal urls
+        urls = iter(reverse("station:train-detail", args=[t.pk]) for t in trains)
+        start = time.perf_counter()
+        latency = measure(upload, repeat=len(trains))
+        wait_for_variants()
+        ready = time.perf_counter() - start
+        return {"upload": latency, "all_variants_ready_ms": round(ready * 1000, 2)}
+
+    results = {
+        "uploads": args.uploads,
+        "image": f"{args.width}x{args.height}",
+        "image_kb": round(len(image) / 1024, 1),
+    }
+    with tempfile.TemporaryDirectory() as media_root, throttling_disabled():
+        with override_settings(MEDIA_ROOT=media_root, IMAGE_WORKERS=0):
+            results["inline"] = upload_all()
+        with override_settings(MEDIA_ROOT=media_root, IMAGE_WORKERS=args.workers):
+            results[f"workers_{args.workers}"] = upload_all()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    args = parser.parse_args()
+
+    setup()
+    # Worker threads write while requests do, which needs a file database
+    with tempfile.TemporaryDirectory() as directory:
+        with test_database(os.path.join(directory, "benchmark.sqlite3")):
+            print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
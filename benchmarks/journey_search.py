@@ -0,0 +1,118 @@
+"""Journey search latency.
+
+python -m benchmarks.journey_search --journeys 1000000
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+
+from benchmarks import measure, setup, test_database, throttling_disabled
+
+
+def seed(journeys, stations, routes):
+    from django.utils import timezone
+
+    from station_api.models import Journey, Route, Station, Train, TrainType
+
+    rng = random.Random(0)
+    Station.objects.bulk_create(
+        Station(name=f"Station {i}", latitude=0.0, longitude=0.0)
+        for i in range(stations)
+    )
+    station_ids = list(Station.objects.values_list("id", flat=True))
+    Route.objects.bulk_create(
+        Route(source_id=source, destination_id=destination)
+        for source, destination in (rng.sample(station_ids, 2) for _ in range(routes))
+    )
+    route_ids = list(Route.objects.values_list("id", flat=True))
+    train = Train.objects.create(
+        name="Train",
+        cargo_num=10,
+        places_in_cargo=100,
+        train_type=TrainType.objects.create(name="Express"),
+    )
+
+    start = timezone.make_aware(datetime(2024, 1, 1))
+    batch = []
+    for _ in range(journeys):
+        departure = start + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        batch.append(
+            Journey(
+                route_id=rng.choice(route_ids),
+                train=train,
+                departure_time=departure,
+                arrival_time=departure + timedelta(hours=3),
+            )
+        )
+        if len(batch) == 10_000:
+            Journey.objects.bulk_create(batch)
+            batch = []
+    Journey.objects.bulk_create(batch)
+
+    return Route.objects.order_by("id").first()
+
+
+def drop_indexes():
+    from django.db import connection
+
+    from station_api.models import Journey, Route
+
+    with connection.schema_editor() as editor:
+        for model in (Journey, Route):
+            for index in model._meta.indexes:
+                editor.remove_index(model, index)
+
+
+def run(args):
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    route = seed(args.journeys, args.stations, args.routes)
+    client = APIClient()
+    client.force_authenticate(
+        get_user_model().objects.create_superuser("bench@example.com", "password")
+    )
+    url = reverse("station:journey-list")
+    queries = {
+        "from_to_date": {
+            "from": route.source_id,
+            "to": route.destination_id,
+            "date": "2024-06-01",
+        },
+        "from_to_window": {
+            "from": route.source_id,
+            "to": route.destination_id,
+            "departure_after": "2024-06-01T00:00:00",
+            "departure_before": "2024-06-08T00:00:00",
+        },
+    }
+
+    results = {"journeys": args.journeys}
+    with throttling_disabled():
+        for label in ("composite_indexes", "foreign_key_indexes_only"):
+            if label == "foreign_key_indexes_only":
+                drop_indexes()
+            results[label] = {
+                name: measure(lambda params=params: client.get(url, params))
+                for name, params in queries.items()
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--journeys", type=int, default=1_000_000)
+    parser.add_argument("--stations", type=int, default=500)
+    parser.add_argument("--routes", type=int, default=5_000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Rows per second of the list serializers and of the ``values()`` row path.
+
+Both paths fetch the same rows of the list querysets and build the list
+output, without the HTTP layer.
+
+python -m benchmarks.list_serializers --rows 5000
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks import setup, test_database
+
+
+def rows_per_second(func, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        best = min(best, time.perf_counter() - start)
+    assert len(output) == rows
+    return round(rows / best)
+
+
+def run(args):
+    from station_api.benchmarking import seed
+    from station_api.row_serializers import (
+        JourneyListRowSerializer,
+        RouteListRowSerializer,
+        TicketListRowSerializer,
+    )
+    from station_api.serializers import (
+        JourneyListSerializer,
+        RouteListSerializer,
+        TicketListSerializer,
+    )
+    from station_api.views import JourneyViewSet, RouteViewSet, TicketViewSet
+
+    seed(
+        {
+            "routes": args.rows,
+            "journeys": args.rows,
+            "orders": args.rows // 4,
+            "tickets": args.rows,
+        }
+    )
+    cases = {
+        "routes": (RouteViewSet, RouteListSerializer, RouteListRowSerializer()),
+        "journeys": (JourneyViewSet, JourneyListSerializer, JourneyListRowSerializer()),
+        "tickets": (TicketViewSet, TicketListSerializer, TicketListRowSerializer()),
+    }
+
+    results = {"rows": args.rows}
+    for name, (viewset, serializer, row_serializer) in cases.items():
+        queryset = viewset.queryset.order_by("pk")[: args.rows]
+        serializer_rate = rows_per_second(
+            lambda: serializer(queryset.all(), many=True).data,
+            args.rows,
+            args.repeat,
+        )
+        row_rate = rows_per_second(
+            lambda: row_serializer.many(queryset.values(*row_serializer.values)),
+            args.rows,
+            args.repeat,
+        )
+        results[name] = {
+            "serializer_rows_per_second": serializer_rate,
+            "values_rows_per_second": row_rate,
+            "speedup": round(row_rate / serializer_rate, 1),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
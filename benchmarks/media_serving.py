@@ -0,0 +1,77 @@
+"""Media serving by ``django.views.static.serve`` and ``station_api.media``.
+
+python -m benchmarks.media_serving --size-mb 20
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks import measure, setup
+
+
+def run(args):
+    from django.test import RequestFactory, override_settings
+    from django.views.static import serve
+
+    from station_api.media import media_view
+
+    factory = RequestFactory()
+    name = "train-0d4ee4b4-6cc4-4a4b-bd3a-6b0e4cbf2d7e.jpg"
+    results = {"size_mb": args.size_mb}
+    with tempfile.TemporaryDirectory() as media_root, override_settings(
+        MEDIA_ROOT=media_root
+    ):
+        with open(os.path.join(media_root, name), "wb") as file:
+            file.write(os.urandom(args.size_mb * 1024 * 1024))
+        views = {
+            "static_serve": lambda request: serve(request, name, media_root),
+            "station_media": lambda request: media_view(request, name),
+        }
+        full = {label: view(factory.get("/")) for label, view in views.items()}
+        # Each view revalidates with the validator it sends
+        cases = {
+            "full": {"static_serve": {}, "station_media": {}},
+            "range_64kb": {
+                label: {"Range": "bytes=1048576-1114111"} for label in views
+            },
+            "revalidate": {
+                "static_serve": {
+                    "If-Modified-Since": full["static_serve"]["Last-Modified"]
+                },
+                "station_media": {"If-None-Match": full["station_media"]["ETag"]},
+            },
+        }
+        for response in full.values():
+            response.close()
+
+        for case, headers_per_view in cases.items():
+            for label, view in views.items():
+                headers = headers_per_view[label]
+
+                def fetch():
+                    response = view(factory.get("/", headers=headers))
+                    return response.status_code, sum(map(len, response))
+
+                status, sent = fetch()
+                results[f"{case}.{label}"] = {
+                    "status": status,
+                    "bytes": sent,
+                    **measure(fetch, repeat=args.repeat),
+                }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
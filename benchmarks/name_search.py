@@ -0,0 +1,93 @@
+"""Station and crew name search latency.
+
+python -m benchmarks.name_search --rows 1000000
+"""
+
+import argparse
+import json
+import random
+
+from benchmarks import measure, setup, test_database, throttling_disabled
+
+SYLLABLES = (
+    "ka ki ko ly lu ma mi no ny pa po ra ri sa so ta te va vi za zo "
+    "ber dor grad hol kiv lin mar nor port sel stan ton vil"
+).split()
+
+
+def random_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+
+
+def run(args):
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from station_api.models import Crew, Station
+    from station_api.search import crew_search, station_search
+
+    rng = random.Random(0)
+    Station.objects.bulk_create(
+        (
+            Station(
+                name=f"{random_word(rng)} {random_word(rng)}", latitude=0, longitude=0
+            )
+            for _ in range(args.rows)
+        ),
+        batch_size=10_000,
+    )
+    Crew.objects.bulk_create(
+        (
+            Crew(first_name=random_word(rng), last_name=random_word(rng))
+            for _ in range(args.rows)
+        ),
+        batch_size=10_000,
+    )
+
+    results = {"rows": args.rows}
+    results["index_build_ms"] = measure(
+        lambda: (station_search.rebuild(), crew_search.rebuild()), repeat=1
+    )
+
+    client = APIClient()
+    client.force_authenticate(
+        get_user_model().objects.create_user("bench@example.com", "password")
+    )
+    station_url = reverse("station:station-search")
+    crew_url = reverse("station:crew-search")
+    with throttling_disabled():
+        for query in ("k", "kiv", "kivgrad", "mar sel"):
+            results[f"station_search_{query!r}"] = measure(
+                lambda: station_search.search(query)
+            )
+            results[f"endpoint_stations_{query!r}"] = measure(
+                lambda: client.get(station_url, {"q": query})
+            )
+        results["endpoint_crew_'mar sel'"] = measure(
+            lambda: client.get(crew_url, {"q": "mar sel"})
+        )
+    # The crew list filters, without the response cache in front of them
+    results["naive_icontains_scan"] = measure(
+        lambda: list(
+            Crew.objects.filter(
+                first_name__icontains="kivgrad", last_name__icontains="sel"
+            ).distinct()[:10]
+        ),
+        repeat=3,
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
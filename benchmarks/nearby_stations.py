@@ -0,0 +1,77 @@
+"""Nearest-station lookup latency.
+
+python -m benchmarks.nearby_stations --stations 100000
+"""
+
+import argparse
+import json
+import random
+
+from benchmarks import measure, setup, test_database, throttling_disabled
+
+
+def run(args):
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from geopy.distance import geodesic
+    from rest_framework.test import APIClient
+
+    from station_api.models import Station
+    from station_api.spatial import station_index
+
+    rng = random.Random(0)
+    Station.objects.bulk_create(
+        (
+            Station(
+                name=f"Station {i}",
+                latitude=rng.uniform(35, 70),
+                longitude=rng.uniform(-10, 40),
+            )
+            for i in range(args.stations)
+        ),
+        batch_size=10_000,
+    )
+    station_index.invalidate()
+    point = (50.45, 30.52)
+
+    def naive():
+        stations = Station.objects.values_list("id", "latitude", "longitude")
+        return sorted(
+            (geodesic(point, (latitude, longitude)).kilometers, pk)
+            for pk, latitude, longitude in stations
+        )[: args.k]
+
+    client = APIClient()
+    client.force_authenticate(
+        get_user_model().objects.create_user("bench@example.com", "password")
+    )
+    url = reverse("station:station-nearby")
+    params = {"lat": point[0], "lon": point[1], "k": args.k}
+
+    results = {"stations": args.stations, "k": args.k}
+    results["index_build_ms"] = measure(
+        lambda: (station_index.invalidate(), station_index.nearest(*point)), repeat=3
+    )
+    results["index_knn"] = measure(lambda: station_index.nearest(*point, k=args.k))
+    results["index_radius_50km"] = measure(
+        lambda: station_index.nearest(*point, k=args.k, radius_km=50)
+    )
+    with throttling_disabled():
+        results["endpoint_knn"] = measure(lambda: client.get(url, params))
+    results["naive_geodesic_scan"] = measure(naive, repeat=1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, default=100_000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Bulk timetable validation against one overlap query per journey.
+
+python -m benchmarks.timetable_validation --journeys 5000
+"""
+
+import argparse
+import json
+import random
+from datetime import timedelta
+
+from benchmarks import measure, setup, test_database, throttling_disabled
+
+
+def run(args):
+    from django.contrib.auth import get_user_model
+    from django.core.exceptions import ValidationError
+    from django.urls import reverse
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+
+    from station_api.benchmarking import seed
+    from station_api.models import Journey, Route, Train
+    from station_api.timetable import find_conflicts
+
+    seed({"journeys": args.journeys, "orders": 0, "tickets": 0})
+    rng = random.Random(0)
+    routes = list(Route.objects.values_list("pk", flat=True))
+    trains = list(Train.objects.values_list("pk", flat=True))
+    start = timezone.now()
+    journeys = []
+    for _ in range(args.journeys):
+        departure_time = start + timedelta(minutes=rng.randrange(60 * 24 * 365))
+        journeys.append(
+            {
+                "route": rng.choice(routes),
+                "train": rng.choice(trains),
+                "departure_time": departure_time,
+                "arrival_time": departure_time + timedelta(hours=rng.randint(1, 12)),
+            }
+        )
+
+    def one_query_per_journey():
+        conflicts = 0
+        for journey in journeys:
+            try:
+                Journey.validate_schedule(
+                    journey["train"],
+                    journey["departure_time"],
+                    journey["arrival_time"],
+                    ValidationError,
+                )
+            except ValidationError:
+                conflicts += 1
+        return conflicts
+
+    client = APIClient()
+    client.force_authenticate(
+        get_user_model().objects.create_superuser("bench@example.com", "password")
+    )
+    payload = {
+        "journeys": [
+            {
+                **journey,
+                "departure_time": journey["departure_time"].isoformat(),
+                "arrival_time": journey["arrival_time"].isoformat(),
+            }
+            for journey in journeys
+        ]
+    }
+    url = reverse("station:journey-validate-timetable")
+
+    results = {
+        "journeys": args.journeys,
+        "trains": len(trains),
+        "conflicts": len(find_conflicts(journeys)),
+    }
+    results["sort_and_sweep"] = measure(lambda: find_conflicts(journeys), repeat=10)
+    results["one_query_per_journey"] = measure(one_query_per_journey, repeat=3)
+    with throttling_disabled():
+        results["endpoint"] = measure(
+            lambda: client.post(url, payload, format="json"), repeat=5
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--journeys", type=int, default=5_000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Concurrent read throughput through the WSGI and the ASGI application.
+
+Slow clients are simulated by holding every response for ``--client-delay``
+ms before it counts as delivered. WSGI serves the sync viewsets from a fixed
+pool of worker threads, as a threaded WSGI server would, so a slow client
+holds a thread. ASGI serves the async views from a single event loop.
+
+python -m benchmarks.wsgi_vs_asgi --clients 64 --threads 8 --client-delay 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks import setup, test_database, throttling_disabled
+
+
+def wsgi_get(application, path, params, token, delay):
+    environ = {
+        "HTTP_HOST": "testserver",
+        "PATH_INFO": path,
+        "QUERY_STRING": urlencode(params),
+        "HTTP_AUTHORIZATION": f"Token {token}",
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+    response = application(environ, lambda status, headers: statuses.append(status))
+    try:
+        b"".join(response)
+        time.sleep(delay)
+    finally:
+        response.close()
+    return int(statuses[0][:3])
+
+
+async def asgi_get(application, path, params, token, delay):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params).encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", f"Token {token}".encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+    statuses = []
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # The client never disconnects
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+        elif not message.get("more_body"):
+            await asyncio.sleep(delay)
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+def run_wsgi(application, requests, threads, delay):
+    def timed(request):
+        start = time.perf_counter()
+        status = wsgi_get(application, *request, delay)
+        return status, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(timed, requests))
+    return results, time.perf_counter() - start
+
+
+def run_asgi(application, requests, clients, delay):
+    async def run():
+        semaphore = asyncio.Semaphore(clients)
+
+        async def timed(request):
+            async with semaphore:
+                start = time.perf_counter()
+                status = await asgi_get(application, *request, delay)
+                return status, time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(timed(request) for request in requests))
+        return results, time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+def report(results, seconds):
+    from station_api.benchmarking import summarize
+
+    statuses = sorted({status for status, _ in results})
+    return {
+        "statuses": statuses,
+        "requests_per_second": round(len(results) / seconds, 1),
+        **summarize([timing for _, timing in results]),
+    }
+
+
+def run(args):
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+
+    from station_api.benchmarking import seed
+    from station_api.models import Journey
+    from train_station.asgi import application as asgi_application
+    from train_station.wsgi import application as wsgi_application
+
+    seed({"journeys": args.journeys, "tickets": args.journeys})
+    token = Token.objects.create(
+        user=get_user_model().objects.create_user("bench@example.com", "password")
+    ).key
+    journey = Journey.objects.select_related("route").order_by("pk").first()
+
+    endpoints = {
+        "journeys-search": (
+            reverse("station:journey-list"),
+            {"from": journey.route.source_id, "to": journey.route.destination_id},
+        ),
+        "journeys-seats": (reverse("station:journey-seats", args=[journey.pk]), {}),
+        "stations-list": (reverse("station:station-list"), {}),
+    }
+    delay = args.client_delay / 1000
+    results = {
+        "requests": args.requests,
+        "clients": args.clients,
+        "threads": args.threads,
+        "client_delay_ms": args.client_delay,
+    }
+    for name, (path, params) in endpoints.items():
+        requests = [(path, params, token)] * args.requests
+        results[name] = {
+            "wsgi": report(*run_wsgi(wsgi_application, requests, args.threads, delay)),
+            "asgi": report(*run_asgi(asgi_application, requests, args.clients, delay)),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--client-delay", type=float, default=50)
+    parser.add_argument("--journeys", type=int, default=5_000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database(), throttling_disabled():
+        print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
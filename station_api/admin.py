@@ -1,6 +1,16 @@
 from django.contrib import admin
 
-from .models import Crew, Station, Route, Train, TrainType, Order, Ticket, Journey
+from .models import (
+    Crew,
+    Station,
+    Route,
+    Train,
+    TrainType,
+    Order,
+    Ticket,
+    Journey,
+    JourneyTemplate,
+)
 
 admin.site.register(Crew)
 admin.site.register(Station)
@@ -10,3 +20,4 @@ admin.site.register(TrainType)
 admin.site.register(Order)
 admin.site.register(Ticket)
 admin.site.register(Journey)
+admin.site.register(JourneyTemplate)
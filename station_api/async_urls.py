@@ -0,0 +1,19 @@
+from django.urls import path
+
+from .async_views import (
+    AsyncJourneyListView,
+    AsyncJourneySeatsView,
+    AsyncStationListView,
+)
+
+urlpatterns = [
+    path("journeys/", AsyncJourneyListView.as_view(), name="journey-list"),
+    path(
+        "journeys/<str:pk>/seats/",
+        AsyncJourneySeatsView.as_view(),
+        name="journey-seats",
+    ),
+    path("stations/", AsyncStationListView.as_view(), name="station-list"),
+]
+
+app_name = "station-async"
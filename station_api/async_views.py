@@ -0,0 +1,122 @@
+"""Async versions of the busiest read endpoints, served through ASGI.
+
+Each view drives an instance of the matching viewset, so filtering, content
+negotiation, authentication, permissions, throttling and serialization stay
+the viewset's own and only the queries are awaited. Other methods, and
+requests for a non-JSON rendering, are handed over to the sync viewset.
+"""
+
+from abc import ABC, abstractmethod
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+from .models import Journey
+from .seats import get_seat_map
+from .views import JourneyViewSet, StationViewSet
+
+
+async def alist(viewset, request, *args, **kwargs):
+    """``ListModelMixin.list`` with the page fetched through the async ORM"""
+    queryset = viewset.filter_queryset(viewset.get_queryset())
+    if getattr(viewset, "list_row_serializer", None):
+        queryset = viewset.get_row_queryset(queryset)
+
+        def serialize(rows):
+            return viewset.list_row_serializer.many(rows)
+
+    else:
+
+        def serialize(instances):
+            return viewset.get_serializer(instances, many=True).data
+
+    page = await viewset.paginator.apaginate_queryset(queryset, request, viewset)
+    if page is None:
+        return Response(serialize([instance async for instance in queryset]))
+    return viewset.get_paginated_response(serialize(page))
+
+
+class AsyncViewSetView(ABC, View):
+    viewset_class = None
+    action = None
+    # Actions of the route, for the requests handled by the sync viewset
+    actions = None
+    sync_view = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(
+            sync_view=cls.viewset_class.as_view(cls.actions), **initkwargs
+        )
+        return csrf_exempt(view)
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.viewset_class()
+        viewset.action_map = {"get": self.action}
+        viewset.args = args
+        viewset.kwargs = kwargs
+        viewset.request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.headers = viewset.default_response_headers
+        viewset.format_kwarg = viewset.get_format_suffix(**kwargs)
+
+        renderer, _ = viewset.perform_content_negotiation(viewset.request)
+        if renderer.format != "json":
+            return await self.fallback(request, *args, **kwargs)
+
+        try:
+            await sync_to_async(viewset.initial)(viewset.request, *args, **kwargs)
+            response = await self.read(viewset, viewset.request, *args, **kwargs)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+        return viewset.finalize_response(viewset.request, response, *args, **kwargs)
+
+    @abstractmethod
+    async def read(self, viewset, request, *args, **kwargs):
+        """Return the response of the viewset's ``action``"""
+
+    async def fallback(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    post = put = patch = delete = options = fallback
+
+
+class AsyncJourneyListView(AsyncViewSetView):
+    viewset_class = JourneyViewSet
+    action = "list"
+    actions = {"get": "list", "post": "create"}
+
+    async def read(self, viewset, request, *args, **kwargs):
+        return await alist(viewset, request, *args, **kwargs)
+
+
+class AsyncJourneySeatsView(AsyncViewSetView):
+    viewset_class = JourneyViewSet
+    action = "seats"
+    actions = {"get": "seats"}
+
+    async def read(self, viewset, request, *args, **kwargs):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        try:
+            journey = await queryset.aget(pk=kwargs["pk"])
+        except (Journey.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        viewset.check_object_permissions(request, journey)
+
+        seat_map = await sync_to_async(get_seat_map)(journey)
+        return Response(viewset.get_serializer(seat_map.to_dict(journey.id)).data)
+
+
+class AsyncStationListView(AsyncViewSetView):
+    viewset_class = StationViewSet
+    action = "list"
+    actions = {"get": "list", "post": "create"}
+
+    async def read(self, viewset, request, *args, **kwargs):
+        return await viewset._acached_response(
+            lambda request: alist(viewset, request), request
+        )
@@ -0,0 +1,216 @@
+"""Helpers shared by the benchmark scripts and the ``benchmark_api`` command.
+
+Nothing here touches the models at import time, so the module can be
+imported before ``django.setup()``.
+"""
+
+import math
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+SEED_COUNTS = {
+    "crews": 100,
+    "stations": 100,
+    "routes": 500,
+    "train_types": 5,
+    "trains": 50,
+    "journeys": 5_000,
+    "users": 100,
+    "orders": 2_000,
+    "tickets": 10_000,
+}
+
+SEED_DEPENDENCIES = {
+    "trains": ("train_types",),
+    "journeys": ("routes", "trains"),
+    "orders": ("users",),
+    "tickets": ("journeys", "orders"),
+}
+
+
+@contextmanager
+def test_database(name=None):
+    """Create an empty test database for the duration of the block.
+
+    ``name`` overrides the test database name, e.g. a file for SQLite when
+    threads write concurrently: an in-memory database shared between
+    connections fails on table locks instead of waiting for them.
+    """
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    if name is not None:
+        connection.settings_dict["TEST"]["NAME"] = name
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, math.ceil(len(sorted_values) * fraction) - 1)
+    return sorted_values[max(index, 0)]
+
+
+def summarize(timings):
+    """Latency percentiles in ms of a list of durations in seconds"""
+    timings = sorted(timing * 1000 for timing in timings)
+    return {
+        "p50": round(statistics.median(timings), 3),
+        "p95": round(percentile(timings, 0.95), 3),
+        "p99": round(percentile(timings, 0.99), 3),
+        "max": round(timings[-1], 3),
+    }
+
+
+def measure(func, repeat=50):
+    """Call ``func`` ``repeat`` times and return latency percentiles in ms"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def seed(counts=None, rng=None, batch_size=5_000):
+    """Fill the database with synthetic data using bulk inserts.
+
+    ``counts`` overrides entries of ``SEED_COUNTS``. Users share the password
+    ``"password"``. Returns the number of rows created per model.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.core.exceptions import ValidationError
+    from django.utils import timezone
+
+    from .geo import update_route_distances
+    from .sales import rebuild_sales
+    from .search import rebuild_search_indexes
+    from .models import (
+        Crew,
+        Journey,
+        Order,
+        Route,
+        Station,
+        Ticket,
+        Train,
+        TrainType,
+    )
+
+    counts = {**SEED_COUNTS, **(counts or {})}
+    rng = rng or random.Random(0)
+    if counts["routes"] and counts["stations"] < 2:
+        raise ValidationError("Routes need at least two stations")
+    for name, required in SEED_DEPENDENCIES.items():
+        missing = [other for other in required if not counts[other]]
+        if counts[name] and missing:
+            raise ValidationError(f"Seeding {name} needs {', '.join(missing)}")
+
+    Crew.objects.bulk_create(
+        (
+            Crew(first_name=f"First{i}", last_name=f"Last{i}")
+            for i in range(counts["crews"])
+        ),
+        batch_size=batch_size,
+    )
+    stations = Station.objects.bulk_create(
+        (
+            Station(
+                name=f"Station {i}",
+                latitude=rng.uniform(44, 52),
+                longitude=rng.uniform(22, 40),
+            )
+            for i in range(counts["stations"])
+        ),
+        batch_size=batch_size,
+    )
+    routes = Route.objects.bulk_create(
+        (
+            Route(source=source, destination=destination)
+            for source, destination in (
+                rng.sample(stations, 2) for _ in range(counts["routes"])
+            )
+        ),
+        batch_size=batch_size,
+    )
+    update_route_distances(Route.objects.all())
+    train_types = TrainType.objects.bulk_create(
+        TrainType(name=f"Type {i}") for i in range(counts["train_types"])
+    )
+    trains = Train.objects.bulk_create(
+        (
+            Train(
+                name=f"Train {i}",
+                cargo_num=rng.randint(5, 20),
+                places_in_cargo=rng.choice((50, 60, 75, 100)),
+                train_type=rng.choice(train_types),
+            )
+            for i in range(counts["trains"])
+        ),
+        batch_size=batch_size,
+    )
+
+    start = timezone.now().replace(minute=0, second=0, microsecond=0)
+    journeys = []
+    for _ in range(counts["journeys"]):
+        departure = start + timedelta(minutes=rng.randrange(90 * 24 * 60))
+        journeys.append(
+            Journey(
+                route=rng.choice(routes),
+                train=rng.choice(trains),
+                departure_time=departure,
+                arrival_time=departure + timedelta(minutes=rng.randint(60, 720)),
+            )
+        )
+    journeys = Journey.objects.bulk_create(journeys, batch_size=batch_size)
+
+    password = make_password("password")
+    users = get_user_model().objects.bulk_create(
+        (
+            get_user_model()(email=f"user{i}@example.com", password=password)
+            for i in range(counts["users"])
+        ),
+        batch_size=batch_size,
+    )
+    orders = Order.objects.bulk_create(
+        (
+            Order(
+                created_at=start - timedelta(minutes=rng.randrange(30 * 24 * 60)),
+                user=rng.choice(users),
+            )
+            for _ in range(counts["orders"])
+        ),
+        batch_size=batch_size,
+    )
+
+    # Tickets fill journeys seat by seat, so (journey, seat) stays unique
+    tickets = []
+    for index in range(counts["tickets"]):
+        journey = journeys[index % len(journeys)]
+        seat = index // len(journeys) + 1
+        if seat > journey.train.places_in_cargo:
+            raise ValidationError("Not enough seats for the requested tickets")
+        tickets.append(
+            Ticket(
+                cargo=rng.randint(1, journey.train.cargo_num),
+                seat=seat,
+                journey=journey,
+                order=rng.choice(orders),
+            )
+        )
+    Ticket.objects.bulk_create(tickets, batch_size=batch_size)
+    rebuild_sales(batch_size)
+    rebuild_search_indexes()
+
+    return counts
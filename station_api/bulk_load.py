@@ -0,0 +1,224 @@
+"""Fast loading of ``dumpdata`` fixtures.
+
+Unlike ``loaddata``, the fixture is parsed one object at a time and rows are
+inserted with batched ``bulk_create`` in a single transaction, so memory
+stays bounded by ``batch_size`` rows per model whatever the file size.
+Foreign keys are checked once at the end, which lets a fixture reference
+rows that appear later in the file.
+"""
+
+import json
+from collections import defaultdict
+
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer as PythonDeserializer
+from django.db import connection, transaction
+
+READ_SIZE = 1 << 16
+
+
+def iter_json_array(file):
+    """Yield the items of a JSON array without reading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("A fixture must be a JSON array")
+    position = 1
+    while True:
+        # Skip the separator before the next item
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer):
+                break
+            buffer, position = file.read(READ_SIZE), 0
+            if not buffer:
+                raise ValueError("Unterminated JSON array")
+        if buffer[position] == "]":
+            return
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError:
+                more = file.read(READ_SIZE)
+                if not more:
+                    raise
+                buffer, position = buffer[position:] + more, 0
+        yield item
+        position = end
+
+
+def iter_json_lines(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_fixture(path):
+    """Yield the raw objects of a ``.json`` or ``.jsonl`` fixture"""
+    with open(path, encoding="utf-8") as file:
+        if str(path).endswith(".jsonl"):
+            yield from iter_json_lines(file)
+        else:
+            yield from iter_json_array(file)
+
+
+def check_unique_seats(tickets):
+    """Return the ``(journey, seat)`` pairs of the batch that are taken twice.
+
+    Earlier batches are in the database by then, so conflicts across batches
+    are found too.
+    """
+    from .models import Ticket
+
+    seen = set()
+    conflicts = []
+    for ticket in tickets:
+        pair = (ticket.journey_id, ticket.seat)
+        if pair in seen:
+            conflicts.append(pair)
+        seen.add(pair)
+
+    taken = Ticket.objects.filter(
+        journey_id__in={journey for journey, _ in seen},
+        seat__in={seat for _, seat in seen},
+    ).values_list("journey_id", "seat")
+    conflicts.extend(pair for pair in taken if pair in seen)
+    return conflicts
+
+
+def dependency_order(models):
+    """Sort models so that every model comes after the models it points to"""
+    ordered = []
+    visiting = set()
+
+    def visit(model):
+        if model in ordered or model in visiting:
+            # Cycles are left to the deferred constraint check
+            return
+        visiting.add(model)
+        for field in model._meta.concrete_fields:
+            if field.related_model in models:
+                visit(field.related_model)
+        visiting.discard(model)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+class BulkLoader:
+    """Buffer deserialized objects per model and insert them in batches"""
+
+    def __init__(self, batch_size=5_000):
+        from .models import Ticket
+
+        self.batch_size = batch_size
+        self.validators = {Ticket: self.validate_tickets}
+        self.pending = defaultdict(list)
+        self.counts = defaultdict(int)
+
+    def validate_tickets(self, tickets):
+        conflicts = check_unique_seats(tickets)
+        if conflicts:
+            raise ValueError(
+                "Seats taken more than once: "
+                + ", ".join(
+                    f"journey {journey} seat {seat}"
+                    for journey, seat in sorted(set(conflicts))[:10]
+                )
+            )
+
+    def add(self, deserialized):
+        instance = deserialized.object
+        model = type(instance)
+        self.pending[model].append(instance)
+        for name, values in (deserialized.m2m_data or {}).items():
+            field = model._meta.get_field(name)
+            through = field.remote_field.through
+            self.pending[through].extend(
+                through(
+                    **{
+                        field.m2m_field_name() + "_id": instance.pk,
+                        field.m2m_reverse_field_name() + "_id": value,
+                    }
+                )
+                for value in values
+            )
+            if len(self.pending[through]) >= self.batch_size:
+                self.flush(through)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model):
+        objects = self.pending.pop(model, [])
+        if not objects:
+            return
+        if model in self.validators:
+            self.validators[model](objects)
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model] += len(objects)
+
+    def flush_all(self):
+        """Insert what is left, parents before children"""
+        for model in dependency_order(list(self.pending)):
+            self.flush(model)
+
+
+def load_fixtures(paths, batch_size=5_000):
+    """Load every fixture in one transaction.
+
+    Returns the number of rows inserted per model. A malformed fixture
+    (``ValueError``, ``DeserializationError``), a duplicate seat
+    (``ValueError``) or a broken foreign key or unique constraint
+    (``IntegrityError``) rolls everything back.
+    """
+    from .caching import bump_model_version
+    from .geo import update_route_distances
+    from .models import Crew, Journey, Route, Station, Ticket, Train, TrainType
+    from .planner import connection_index
+    from .sales import rebuild_sales
+    from .search import crew_search, station_search
+    from .spatial import station_index
+
+    loader = BulkLoader(batch_size)
+    with transaction.atomic():
+        with connection.constraint_checks_disabled():
+            for path in paths:
+                for deserialized in PythonDeserializer(
+                    iter_fixture(path), ignorenonexistent=True
+                ):
+                    loader.add(deserialized)
+            loader.flush_all()
+
+        models = list(loader.counts)
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in models]
+        )
+
+        # Explicit primary keys leave the sequences behind on some databases
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+        # bulk_create sends no signals, so refresh what they would have
+        if Route in loader.counts or Station in loader.counts:
+            update_route_distances(Route.objects.filter(distance__isnull=True))
+        if loader.counts.keys() & {Journey, Ticket, Train}:
+            rebuild_sales(batch_size)
+        if Station in loader.counts:
+            station_search.rebuild()
+        if Crew in loader.counts:
+            crew_search.rebuild()
+        for model in (Crew, Route, Station, Train, TrainType):
+            if model in loader.counts:
+                transaction.on_commit(lambda model=model: bump_model_version(model))
+        if Station in loader.counts:
+            transaction.on_commit(station_index.invalidate)
+        if Journey in loader.counts:
+            transaction.on_commit(connection_index.invalidate)
+
+    return {model._meta.label: count for model, count in loader.counts.items()}
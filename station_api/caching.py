@@ -0,0 +1,154 @@
+"""Caching shared by every worker process.
+
+Cached responses and the model versions they are keyed by live in the
+``shared`` cache alias, which is backed by the database. Its writes take
+part in the surrounding transaction, so an invalidation commits or rolls
+back together with the change that caused it.
+"""
+
+import hashlib
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+SHARED_CACHE = "shared"
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def shared_cache():
+    return caches[SHARED_CACHE]
+
+
+def on_change(callback):
+    """Run ``callback`` now and once more after the transaction commits.
+
+    The second call covers readers that repopulated a cache from data that
+    was not committed yet when the first one ran.
+    """
+    callback()
+    transaction.on_commit(callback)
+
+
+def model_version_key(model):
+    return f"station_api:version:{model._meta.label_lower}"
+
+
+def bump_model_version(model):
+    # A fresh token rather than a counter, so concurrent bumps never collapse
+    shared_cache().set(model_version_key(model), uuid.uuid4().hex, None)
+
+
+def get_model_versions(models):
+    keys = [model_version_key(model) for model in models]
+    versions = shared_cache().get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        shared_cache().set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+class CachedResponseMixin:
+    """Cache rendered ``list`` and ``retrieve`` responses.
+
+    Entries are keyed by the version tokens of ``cache_dependencies`` (the
+    queryset model by default), which signals replace whenever one of those
+    models changes, so stale entries are never read again and simply expire.
+    Responses carry an ``ETag`` and a matching ``If-None-Match`` is answered
+    with ``304 Not Modified`` without touching the data.
+    """
+
+    cache_dependencies = ()
+
+    def get_cache_dependencies(self):
+        return self.cache_dependencies or (self.queryset.model,)
+
+    @staticmethod
+    def _etag(request, versions):
+        # Absolute URI, since pagination links embed the host
+        digest = hashlib.sha1(
+            "|".join(
+                [request.build_absolute_uri(), request.accepted_media_type, *versions]
+            ).encode()
+        ).hexdigest()
+        return f'"{digest}"'
+
+    @staticmethod
+    def _not_modified(request, etag):
+        # If-None-Match uses the weak comparison
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        return etag in {tag.removeprefix("W/") for tag in if_none_match}
+
+    def _render(self, request, response):
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        response.render()
+        return response.content, response["Content-Type"]
+
+    @staticmethod
+    def _with_validators(response, etag):
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+
+        etag = self._etag(request, get_model_versions(self.get_cache_dependencies()))
+        if self._not_modified(request, etag):
+            return self._with_validators(HttpResponseNotModified(), etag)
+
+        key = f"station_api:response:{etag[1:-1]}"
+        cached = shared_cache().get(key)
+        if cached is not None:
+            content, content_type = cached
+            return self._with_validators(
+                HttpResponse(content, content_type=content_type), etag
+            )
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        shared_cache().set(key, self._render(request, response), RESPONSE_CACHE_TIMEOUT)
+        return self._with_validators(response, etag)
+
+    async def _acached_response(self, handler, request, *args, **kwargs):
+        """``_cached_response`` for a coroutine ``handler``"""
+        if request.accepted_renderer.format != "json":
+            return await handler(request, *args, **kwargs)
+
+        versions = await sync_to_async(get_model_versions)(
+            self.get_cache_dependencies()
+        )
+        etag = self._etag(request, versions)
+        if self._not_modified(request, etag):
+            return self._with_validators(HttpResponseNotModified(), etag)
+
+        key = f"station_api:response:{etag[1:-1]}"
+        cached = await shared_cache().aget(key)
+        if cached is not None:
+            content, content_type = cached
+            return self._with_validators(
+                HttpResponse(content, content_type=content_type), etag
+            )
+
+        response = await handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        await shared_cache().aset(
+            key, self._render(request, response), RESPONSE_CACHE_TIMEOUT
+        )
+        return self._with_validators(response, etag)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
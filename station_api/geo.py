@@ -0,0 +1,136 @@
+import numpy as np
+from geopy.distance import geodesic
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
+
+def geodesic_distances(
+    latitudes_a, longitudes_a, latitudes_b, longitudes_b, tolerance=1e-12
+):
+    """Return WGS-84 distances in kilometers between pairs of points.
+
+    Vincenty's inverse formula evaluated on whole arrays at once. The few
+    nearly antipodal pairs it cannot converge on fall back to geopy.
+    """
+    lat_a, lon_a, lat_b, lon_b = (
+        np.radians(np.asarray(values, dtype=float).ravel())
+        for values in (latitudes_a, longitudes_a, latitudes_b, longitudes_b)
+    )
+    reduced_a = np.arctan((1 - WGS84_F) * np.tan(lat_a))
+    reduced_b = np.arctan((1 - WGS84_F) * np.tan(lat_b))
+    sin_a, cos_a = np.sin(reduced_a), np.cos(reduced_a)
+    sin_b, cos_b = np.sin(reduced_b), np.cos(reduced_b)
+    longitude = lon_b - lon_a
+    lam = longitude.copy()
+    sin_sigma = np.zeros_like(lam)
+    cos_sigma = np.zeros_like(lam)
+    sigma = np.zeros_like(lam)
+    cos2_alpha = np.zeros_like(lam)
+    cos_2sigma_m = np.zeros_like(lam)
+    # Pairs drop out of the iteration once their longitude difference settles
+    active = np.arange(lam.size)
+
+    for _ in range(200):
+        a_sin, a_cos = sin_a[active], cos_a[active]
+        b_sin, b_cos = sin_b[active], cos_b[active]
+        sin_lam, cos_lam = np.sin(lam[active]), np.cos(lam[active])
+        sin_s = np.hypot(b_cos * sin_lam, a_cos * b_sin - a_sin * b_cos * cos_lam)
+        cos_s = a_sin * b_sin + a_cos * b_cos * cos_lam
+        sig = np.arctan2(sin_s, cos_s)
+        sin_alpha = np.divide(
+            a_cos * b_cos * sin_lam,
+            sin_s,
+            out=np.zeros_like(sin_s),
+            where=sin_s != 0,
+        )
+        cos2_a = 1 - sin_alpha**2
+        cos_2sm = cos_s - np.divide(
+            2 * a_sin * b_sin,
+            cos2_a,
+            out=np.zeros_like(cos2_a),
+            where=cos2_a != 0,
+        )
+        c = WGS84_F / 16 * cos2_a * (4 + WGS84_F * (4 - 3 * cos2_a))
+        updated = longitude[active] + (1 - c) * WGS84_F * sin_alpha * (
+            sig + c * sin_s * (cos_2sm + c * cos_s * (-1 + 2 * cos_2sm**2))
+        )
+        settled = np.abs(updated - lam[active]) < tolerance
+
+        lam[active] = updated
+        sin_sigma[active] = sin_s
+        cos_sigma[active] = cos_s
+        sigma[active] = sig
+        cos2_alpha[active] = cos2_a
+        cos_2sigma_m[active] = cos_2sm
+        active = active[~settled]
+        if not active.size:
+            break
+
+    u2 = cos2_alpha * (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+    big_a = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    big_b = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = (
+        big_b
+        * sin_sigma
+        * (
+            cos_2sigma_m
+            + big_b
+            / 4
+            * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                - big_b
+                / 6
+                * cos_2sigma_m
+                * (-3 + 4 * sin_sigma**2)
+                * (-3 + 4 * cos_2sigma_m**2)
+            )
+        )
+    )
+    distances = WGS84_B * big_a * (sigma - delta_sigma) / 1000
+
+    for index in active:
+        distances[index] = geodesic(
+            (np.degrees(lat_a[index]), np.degrees(lon_a[index])),
+            (np.degrees(lat_b[index]), np.degrees(lon_b[index])),
+        ).kilometers
+    return distances
+
+
+def update_route_distances(routes, batch_size=10_000):
+    """Recompute the stored distance of the given routes in vectorized batches.
+
+    Returns the number of updated routes. ``bulk_update`` sends no signals,
+    so cached route responses are invalidated here.
+    """
+    from .caching import bump_model_version, on_change
+    from .models import Route
+
+    rows = routes.order_by("pk").values_list(
+        "pk",
+        "source__latitude",
+        "source__longitude",
+        "destination__latitude",
+        "destination__longitude",
+    )
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            if updated:
+                on_change(lambda: bump_model_version(Route))
+            return updated
+        pks, *coordinates = zip(*batch)
+        distances = geodesic_distances(*coordinates)
+        Route.objects.bulk_update(
+            [
+                Route(pk=pk, distance=float(distance))
+                for pk, distance in zip(pks, distances)
+            ],
+            ["distance"],
+            batch_size=1_000,
+        )
+        updated += len(batch)
+        last_pk = pks[-1]
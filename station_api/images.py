@@ -0,0 +1,151 @@
+"""Resized variants of the train images.
+
+Uploads only store the original file. Once the transaction commits, a
+worker thread of the process decodes it once and writes every variant of
+``IMAGE_VARIANTS`` in WebP and JPEG, then records their paths in
+``Train.image_variants`` along with the name of the original they were made
+from. Saving a train with another image starts over; results made from an
+image that was replaced in the meantime are thrown away.
+
+Pillow releases the GIL while decoding, resizing and encoding, so threads
+run in parallel. ``IMAGE_WORKERS`` sets their number, 0 makes the variants
+inline when the transaction commits.
+"""
+
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+# Name and bounding box of each variant, largest first
+IMAGE_VARIANTS = (
+    ("large", 1280),
+    ("medium", 640),
+    ("thumbnail", 200),
+)
+IMAGE_FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpeg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+_pending = set()
+
+
+def _executor():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != settings.IMAGE_WORKERS:
+            _pool = ThreadPoolExecutor(
+                settings.IMAGE_WORKERS, thread_name_prefix="train-images"
+            )
+            _pool_workers = settings.IMAGE_WORKERS
+        return _pool
+
+
+def variant_path(source, name, extension):
+    stem, _ = os.path.splitext(source)
+    directory, filename = os.path.split(stem)
+    return os.path.join(directory, "variants", f"{filename}-{name}.{extension}")
+
+
+def render_variants(source):
+    """Write the variants of the ``source`` image, return what was written"""
+    with default_storage.open(source) as file:
+        image = Image.open(file)
+        # Decoding a JPEG at a fraction of its size is much faster
+        image.draft("RGB", (IMAGE_VARIANTS[0][1],) * 2)
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+    variants = {"source": source}
+    for name, size in IMAGE_VARIANTS:
+        # Each variant is scaled down from the previous one
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        variant = {"width": image.width, "height": image.height}
+        for extension, image_format, options in IMAGE_FORMATS:
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, **options)
+            path = variant_path(source, name, extension)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            variant[extension] = default_storage.save(
+                path, ContentFile(buffer.getvalue())
+            )
+        variants[name] = variant
+    return variants
+
+
+def delete_variants(variants):
+    for name, _ in IMAGE_VARIANTS:
+        for extension, _, _ in IMAGE_FORMATS:
+            path = variants.get(name, {}).get(extension)
+            if path:
+                default_storage.delete(path)
+
+
+def update_variants(train_id, source):
+    """Make the variants of ``source`` and store them on the train"""
+    from .caching import bump_model_version
+    from .models import Train
+
+    variants = render_variants(source) if source else {}
+    previous = (
+        Train.objects.filter(pk=train_id)
+        .values_list("image_variants", flat=True)
+        .first()
+    )
+    # Unless the image was replaced while the variants were made
+    same_image = Q(image=source) if source else Q(image="") | Q(image__isnull=True)
+    updated = Train.objects.filter(same_image, pk=train_id).update(
+        image_variants=variants
+    )
+    if not updated:
+        delete_variants(variants)
+        return
+    if previous and previous.get("source") != source:
+        delete_variants(previous)
+    bump_model_version(Train)
+
+
+def _update_variants_in_worker(train_id, source):
+    try:
+        update_variants(train_id, source)
+    except Exception:
+        logger.exception("Could not make the variants of %s", source)
+        raise
+    finally:
+        # Worker threads keep no connection between tasks
+        connections.close_all()
+
+
+def schedule_variants(train):
+    """Make the variants of the current image of ``train`` after the commit"""
+    train_id, source = train.pk, train.image.name or ""
+
+    def submit():
+        if settings.IMAGE_WORKERS:
+            future = _executor().submit(_update_variants_in_worker, train_id, source)
+            _pending.add(future)
+            future.add_done_callback(_pending.discard)
+        else:
+            update_variants(train_id, source)
+
+    transaction.on_commit(submit)
+
+
+def wait_for_variants():
+    """Block until the scheduled variants are made, for tests and benchmarks"""
+    for future in list(_pending):
+        future.result()
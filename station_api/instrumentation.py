@@ -0,0 +1,268 @@
+"""Per-request timings of the API.
+
+``ServerTimingMiddleware`` measures every request to the API prefixes: the
+number and duration of SQL queries, the time spent building serializer
+output and the time spent rendering the response. The numbers go out in a
+``Server-Timing`` header and are added to ``request_timings``, an in-process
+aggregate per view and action that staff read at ``api/station/timings/``.
+The aggregate is kept per worker process and starts empty on every restart;
+the metrics of ``metrics`` are the ones aggregated over all processes.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+from threading import Lock
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+INSTRUMENTED_PREFIXES = ("/api/station/", "/api/user/")
+
+# Upper bounds in ms of the request duration histogram buckets
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+
+_current = ContextVar("request_timings", default=None)
+
+
+class Timings:
+    """What one request spent, in seconds"""
+
+    __slots__ = ("queries", "sql", "serialize", "render", "timing")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        # Set while a serializer is being timed, so nested ones are not
+        # counted twice
+        self.timing = False
+
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to ``name`` of the current request"""
+    timings = _current.get()
+    if timings is None or timings.timing:
+        yield
+        return
+    timings.timing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.timing = False
+        setattr(timings, name, getattr(timings, name) + time.perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting the queries of the current request"""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.sql += time.perf_counter() - start
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``record_query``"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@cache
+def _timed_serializer_class(serializer_class):
+    def data(self):
+        with timed("serialize"):
+            return super(timed_class, self).data
+
+    timed_class = type(
+        serializer_class.__name__,
+        (serializer_class,),
+        {"__module__": serializer_class.__module__, "data": property(data)},
+    )
+    return timed_class
+
+
+class SerializerTimingMixin:
+    # Times the ``data`` of the serializers a view builds as ``serialize``,
+    # while a request is timed; a docstring would show in the API schema.
+    # Serializer classes are left alone, nested and other uses are not timed.
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if _current.get() is not None:
+            serializer.__class__ = _timed_serializer_class(type(serializer))
+        return serializer
+
+
+class ViewTimings:
+    """Aggregate of the requests served by one view action"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.queries = 0
+        self.sql = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+    def add(self, duration, timings):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.queries += timings.queries
+        self.sql += timings.sql
+        self.serialize += timings.serialize
+        self.render += timings.render
+        milliseconds = duration * 1000
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if milliseconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def to_dict(self, view):
+        def mean(value, scale=1000):
+            return round(value * scale / self.count, 3)
+
+        return {
+            "view": view,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": mean(self.total),
+            "max_ms": round(self.max * 1000, 3),
+            "mean_queries": mean(self.queries, scale=1),
+            "mean_sql_ms": mean(self.sql),
+            "mean_serialize_ms": mean(self.serialize),
+            "mean_render_ms": mean(self.render),
+            "histogram": {
+                "le_inf" if bound == float("inf") else f"le_{bound}": count
+                for bound, count in zip(DURATION_BUCKETS, self.buckets)
+            },
+        }
+
+
+class RequestTimings:
+    """Thread-safe ``ViewTimings`` per view action"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._views = {}
+
+    def add(self, view, duration, timings):
+        with self._lock:
+            self._views.setdefault(view, ViewTimings()).add(duration, timings)
+
+    def snapshot(self):
+        """Every view, the one that took the most time in total first"""
+        with self._lock:
+            views = [aggregate.to_dict(view) for view, aggregate in self._views.items()]
+        return sorted(views, key=lambda view: view["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+request_timings = RequestTimings()
+
+
+def view_label(request):
+    """``ViewSet.action`` of the view that served ``request``"""
+    match = request.resolver_match
+    if match is None:
+        return None
+    view_class = getattr(match.func, "cls", None) or getattr(
+        match.func, "view_class", None
+    )
+    # Async views name the viewset they drive
+    viewset_class = getattr(view_class, "viewset_class", None) or view_class
+    actions = getattr(match.func, "actions", None) or getattr(
+        view_class, "actions", None
+    )
+    method = request.method.lower()
+    action = (actions or {}).get(method, method)
+    if viewset_class is None:
+        return f"{match.view_name}.{action}"
+    return f"{viewset_class.__name__}.{action}"
+
+
+def server_timing(duration, timings):
+    return ", ".join(
+        (
+            f'db;dur={timings.sql * 1000:.2f};desc="{timings.queries} queries"',
+            f"serialize;dur={timings.serialize * 1000:.2f}",
+            f"render;dur={timings.render * 1000:.2f}",
+            f"total;dur={duration * 1000:.2f}",
+        )
+    )
+
+
+class ServerTimingMiddleware:
+    """Measure API requests, see the module docstring"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not request.path.startswith(INSTRUMENTED_PREFIXES):
+            return self.get_response(request)
+
+        timings = Timings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, time.perf_counter() - start, timings)
+
+    async def __acall__(self, request):
+        if not request.path.startswith(INSTRUMENTED_PREFIXES):
+            return await self.get_response(request)
+
+        timings = Timings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, time.perf_counter() - start, timings)
+
+    def process_template_response(self, request, response):
+        timings = _current.get()
+        if timings is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                timings.render += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, duration, timings):
+        from .metrics import observe_request
+
+        response["Server-Timing"] = server_timing(duration, timings)
+        view = view_label(request)
+        if view is not None:
+            request_timings.add(view, duration, timings)
+        observe_request(
+            view, request.method, response.status_code, duration, timings.queries
+        )
+        return response
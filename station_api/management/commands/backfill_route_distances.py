@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from station_api.geo import update_route_distances
+from station_api.models import Route
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored geodesic distance of every route"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of routes computed per vectorized pass",
+        )
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only fill routes without a stored distance",
+        )
+
+    def handle(self, *args, **options):
+        routes = Route.objects.all()
+        if options["missing_only"]:
+            routes = routes.filter(distance__isnull=True)
+
+        start = time.perf_counter()
+        updated = update_route_distances(routes, batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {updated} routes in {time.perf_counter() - start:.2f}s"
+            )
+        )
@@ -0,0 +1,230 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from station_api.benchmarking import SEED_COUNTS, seed, summarize, test_database
+from station_api.models import Crew, Journey, Route, Station
+from station_api.seats import SeatMap
+from station_api.tests.utils import throttling_disabled
+from station_api.urls import router
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with synthetic data, call every API endpoint "
+        "and report latency percentiles, query counts and response sizes as JSON"
+    )
+
+    def add_arguments(self, parser):
+        for name, default in SEED_COUNTS.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                default=default,
+                help=f"Number of {name.replace('_', ' ')} to seed",
+            )
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Multiply every seeded count by this factor",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=30,
+            help="Requests per endpoint",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the report to this file instead of stdout",
+        )
+
+    def handle(self, *args, **options):
+        counts = {name: int(options[name] * options["scale"]) for name in SEED_COUNTS}
+
+        with test_database(), throttling_disabled():
+            try:
+                start = time.perf_counter()
+                seeded = seed(counts)
+            except ValidationError as error:
+                raise CommandError(error.messages[0])
+            report = {
+                "seed": {**seeded, "seconds": round(time.perf_counter() - start, 3)},
+                "endpoints": self.run_endpoints(options["repeat"]),
+            }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def endpoints(self):
+        """Yield ``(name, method, url, data)`` for every endpoint.
+
+        ``data`` may be a callable taking the request number, for requests
+        that must differ on every call.
+        """
+        user = get_user_model().objects.filter(is_staff=False).order_by("pk").first()
+        crew = Crew.objects.order_by("pk").first()
+        station = Station.objects.order_by("pk").first()
+        journey = (
+            Journey.objects.select_related("route")
+            .order_by("departure_time", "pk")
+            .first()
+        )
+        # Search and plan between stations that do have a connection
+        route = journey.route if journey else Route.objects.order_by("pk").first()
+        # Bookings are spread over the journeys so none of them fills up
+        journeys = list(Journey.objects.select_related("train").order_by("pk"))
+
+        def book(index):
+            booked = journeys[index % len(journeys)]
+            (cargo, seat), *_ = SeatMap.for_journey(booked).allocate(1)
+            return {"tickets": [{"journey": booked.pk, "cargo": cargo, "seat": seat}]}
+
+        # Query parameters or body of the extra actions, keyed by basename
+        # and url name. An action listed with None lacks the rows it needs.
+        action_data = {
+            ("crew", "search"): {"q": crew.first_name[:3]} if crew else None,
+            ("station", "search"): {"q": station.name[:3]} if station else None,
+            ("station", "nearby"): {"lat": 50.45, "lon": 30.52, "k": 10},
+            ("journey", "plan"): (
+                {
+                    "from": route.source_id,
+                    "to": route.destination_id,
+                    "departure_after": journey.departure_time.isoformat(),
+                }
+                if journey
+                else None
+            ),
+            ("journey", "validate-timetable"): (
+                {
+                    "journeys": [
+                        {
+                            "route": journey.route_id,
+                            "train": journey.train_id,
+                            "departure_time": journey.departure_time.isoformat(),
+                            "arrival_time": journey.arrival_time.isoformat(),
+                        }
+                    ]
+                }
+                if journey
+                else None
+            ),
+            ("order", "book"): book if journeys else None,
+            ("order", "book-group"): (
+                (
+                    lambda index: {
+                        "journey": journeys[index % len(journeys)].pk,
+                        "passengers": 2,
+                    }
+                )
+                if journeys
+                else None
+            ),
+        }
+
+        for prefix, viewset, basename in router.registry:
+            instance = None
+            if viewset.queryset is not None:
+                instance = viewset.queryset.model.objects.order_by("pk").first()
+            # Viewsets made only of extra actions have no list or detail
+            if hasattr(viewset, "list"):
+                yield f"{prefix}-list", "get", reverse(f"station:{basename}-list"), None
+            if hasattr(viewset, "retrieve") and instance is not None:
+                yield (
+                    f"{prefix}-detail",
+                    "get",
+                    reverse(f"station:{basename}-detail", args=[instance.pk]),
+                    None,
+                )
+            for extra_action in viewset.get_extra_actions():
+                key = (basename, extra_action.url_name)
+                data = action_data.get(key)
+                if (data is None and key in action_data) or (
+                    extra_action.detail and instance is None
+                ):
+                    continue
+                yield (
+                    f"{prefix}-{extra_action.url_name}",
+                    next(iter(extra_action.mapping)),
+                    reverse(
+                        f"station:{basename}-{extra_action.url_name}",
+                        args=[instance.pk] if extra_action.detail else [],
+                    ),
+                    data,
+                )
+
+        if route is not None:
+            yield (
+                "journeys-search",
+                "get",
+                reverse("station:journey-list"),
+                {"from": route.source_id, "to": route.destination_id},
+            )
+        yield "timings", "get", reverse("station:timings"), None
+
+        yield (
+            "user-register",
+            "post",
+            reverse("user:create"),
+            lambda index: {"email": f"new{index}@example.com", "password": "password"},
+        )
+        if user is not None:
+            yield (
+                "user-login",
+                "post",
+                reverse("user:login"),
+                {"email": user.email, "password": "password"},
+            )
+        yield "user-me", "get", reverse("user:manage"), None
+
+    def run_endpoints(self, repeat):
+        staff = get_user_model().objects.create_superuser(
+            "benchmark@example.com", "password"
+        )
+        client = APIClient()
+        client.force_authenticate(staff)
+
+        results = {}
+        for name, method, url, data in self.endpoints():
+            timings, statuses, query_counts, sizes = [], [], [], []
+            for index in range(repeat):
+                payload = data(index) if callable(data) else data
+                # Bodies go as JSON, the timetable and bookings are nested
+                kwargs = {"format": "json"} if method != "get" else {}
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = getattr(client, method)(url, payload, **kwargs)
+                    # Exports run their queries while the body is streamed
+                    body = (
+                        b"".join(response.streaming_content)
+                        if response.streaming
+                        else response.content
+                    )
+                    timings.append(time.perf_counter() - start)
+                statuses.append(response.status_code)
+                query_counts.append(len(queries))
+                sizes.append(len(body))
+            results[name] = {
+                # The worst status, an error of any request shows up
+                "status": max(statuses),
+                **summarize(timings),
+                "queries": {
+                    "p50": statistics.median(query_counts),
+                    "max": max(query_counts),
+                },
+                "bytes": {"p50": statistics.median(sizes), "max": max(sizes)},
+            }
+        return results
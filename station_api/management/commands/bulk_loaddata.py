@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import IntegrityError
+
+from station_api.bulk_load import load_fixtures
+
+
+class Command(BaseCommand):
+    help = (
+        "Load JSON or JSON Lines fixtures with batched inserts in one "
+        "transaction, in bounded memory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fixtures", nargs="+", help="Fixture file paths")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5_000,
+            help="Rows buffered and inserted at once per model",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            counts = load_fixtures(options["fixtures"], options["batch_size"])
+        except (OSError, ValueError, DeserializationError, IntegrityError) as error:
+            raise CommandError(f"Nothing was loaded: {error}")
+
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {sum(counts.values())} objects in "
+                f"{time.perf_counter() - start:.2f}s"
+            )
+        )
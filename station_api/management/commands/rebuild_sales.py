@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from station_api.sales import rebuild_sales
+
+
+class Command(BaseCommand):
+    help = "Recompute the journey and route day sales aggregates from the tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of journeys whose tickets are counted per query",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the stored aggregates with recomputed ones",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        report = rebuild_sales(options["batch_size"], check=options["check"])
+        elapsed = time.perf_counter() - start
+
+        if not options["check"]:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Rebuilt the sales of {report['journeys']} journeys "
+                    f"in {elapsed:.2f}s"
+                )
+            )
+            return
+
+        mismatches = report["journey_mismatches"] + report["route_day_mismatches"]
+        if mismatches:
+            raise CommandError(
+                f"{report['journey_mismatches']} journey and "
+                f"{report['route_day_mismatches']} route day aggregates differ "
+                "from the tickets, run rebuild_sales to fix them"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"The sales of {report['journeys']} journeys are consistent "
+                f"({elapsed:.2f}s)"
+            )
+        )
@@ -0,0 +1,158 @@
+"""Serving of uploaded media.
+
+Files are streamed with ``FileResponse`` so the WSGI server can hand them to
+``sendfile`` itself. Responses carry an ``ETag`` and ``Last-Modified`` and
+answer conditional requests with ``304 Not Modified``, and a single byte
+range is served with ``206 Partial Content``. Names made by
+``image_file_path`` and the variants made from them are never reused, so
+they are cached for a year.
+
+With ``MEDIA_SENDFILE`` set, the response only names the file in an
+``X-Sendfile`` or ``X-Accel-Redirect`` header and the front proxy sends it,
+ranges included.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_MAX_AGE = 60 * 60
+STREAM_CHUNK_SIZE = 64 * 1024
+
+X_ACCEL_REDIRECT = "x-accel-redirect"
+
+# "<slug>-<uuid4>[-<variant>].<extension>", see image_file_path
+IMMUTABLE_NAME = re.compile(
+    r"-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}(-[a-z]+)?\.\w+$"
+)
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """``(start, end)`` of a single byte range, both inclusive.
+
+    Returns ``None`` when the whole file should be sent, for a missing,
+    malformed or multiple range, and raises ``ValueError`` when the range
+    starts past the end of the file.
+    """
+    match = RANGE.match(header.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # A suffix range, the last bytes of the file
+        if not int(last):
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Range past the end of the file")
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get("If-Range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _read_range(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _cache_headers(path, etag, last_modified):
+    if IMMUTABLE_NAME.search(os.path.basename(path)):
+        cache_control = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        cache_control = f"public, max-age={MEDIA_MAX_AGE}"
+    return {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+
+def _sendfile_response(path, full_path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == X_ACCEL_REDIRECT:
+        response["X-Accel-Redirect"] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + path
+        )
+    else:
+        response["X-Sendfile"] = full_path
+    return response
+
+
+@require_safe
+def media_view(request, path):
+    """A file of ``MEDIA_ROOT``"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        status = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("No such file")
+    if not stat.S_ISREG(status.st_mode):
+        raise Http404("No such file")
+
+    size, last_modified = status.st_size, int(status.st_mtime)
+    etag = f'"{status.st_mtime_ns:x}-{size:x}"'
+    headers = _cache_headers(path, etag, last_modified)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+
+    response = get_conditional_response(request, etag, last_modified)
+    if response is None and settings.MEDIA_SENDFILE:
+        response = _sendfile_response(path, full_path, content_type)
+    if response is not None:
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    byte_range = None
+    if "Range" in request.headers and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except ValueError:
+            response = HttpResponse(status=416, headers=headers)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    file = open(full_path, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, headers=headers)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(file, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+            headers=headers,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,296 @@
+"""Prometheus metrics shared by every worker process.
+
+Each process adds to its own file in ``METRICS_DIR``: a memory-mapped list
+of ``(sample key, float)`` entries, so recording a sample is an in-memory
+write with no lock shared between processes. Files are named by host and
+pid, since containers sharing the directory all run their workers with the
+same few pids. ``/metrics`` reads the files
+of every process, adds them up and answers in the Prometheus text format.
+
+Files outlive their process, which keeps counters monotonic when workers
+are recycled. Empty ``METRICS_DIR`` when the whole service is restarted.
+"""
+
+import json
+import math
+import mmap
+import os
+import socket
+import struct
+from threading import Lock
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+INITIAL_FILE_SIZE = 1 << 16
+HEADER = struct.Struct("<Q")
+KEY_LENGTH = struct.Struct("<I")
+VALUE = struct.Struct("<d")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _padded(key):
+    """Key bytes padded so that the value after them is 8-byte aligned"""
+    encoded = key.encode()
+    return encoded + b" " * (-(KEY_LENGTH.size + len(encoded)) % 8)
+
+
+def read_entries(data):
+    """Yield ``(key, value)`` of the bytes of a counter file"""
+    if len(data) < HEADER.size:
+        return
+    (used,) = HEADER.unpack_from(data)
+    position = HEADER.size
+    while position < used:
+        (length,) = KEY_LENGTH.unpack_from(data, position)
+        position += KEY_LENGTH.size
+        key = data[position : position + length].decode()
+        position += len(_padded(key))
+        (value,) = VALUE.unpack_from(data, position)
+        position += VALUE.size
+        yield key, value
+
+
+class CounterFile:
+    """Values of one process, memory-mapped from ``path``"""
+
+    def __init__(self, path):
+        self._file = open(path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < INITIAL_FILE_SIZE:
+            self._file.truncate(INITIAL_FILE_SIZE)
+            size = INITIAL_FILE_SIZE
+        self._capacity = size
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._lock = Lock()
+
+        # A file left by an earlier process with the same host and pid is
+        # continued
+        self._used = HEADER.unpack_from(self._mmap)[0] or HEADER.size
+        self._positions = {}
+        position = HEADER.size
+        for key, _ in read_entries(self._mmap):
+            position += KEY_LENGTH.size + len(_padded(key))
+            self._positions[key] = position
+            position += VALUE.size
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        self._mmap.close()
+        self._file.truncate(capacity)
+        self._capacity = capacity
+        self._mmap = mmap.mmap(self._file.fileno(), capacity)
+
+    def _add_key(self, key):
+        padded = _padded(key)
+        entry = KEY_LENGTH.pack(len(key.encode())) + padded + VALUE.pack(0.0)
+        if self._used + len(entry) > self._capacity:
+            self._grow(self._used + len(entry))
+        self._mmap[self._used : self._used + len(entry)] = entry
+        position = self._used + KEY_LENGTH.size + len(padded)
+        self._used += len(entry)
+        # Readers only look at what the header covers, so it moves last
+        HEADER.pack_into(self._mmap, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def inc(self, key, amount):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._add_key(key)
+            (value,) = VALUE.unpack_from(self._mmap, position)
+            VALUE.pack_into(self._mmap, position, value + amount)
+
+
+_files = {}
+_files_lock = Lock()
+
+
+def counter_file():
+    """The file of the current process in the current ``METRICS_DIR``"""
+    key = (settings.METRICS_DIR, socket.gethostname(), os.getpid())
+    counters = _files.get(key)
+    if counters is None:
+        with _files_lock:
+            counters = _files.get(key)
+            if counters is None:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                counters = _files[key] = CounterFile(
+                    os.path.join(settings.METRICS_DIR, "{}-{}.db".format(*key[1:]))
+                )
+    return counters
+
+
+def collect():
+    """Sum of every sample over the files of all processes"""
+    totals = {}
+    if not os.path.isdir(settings.METRICS_DIR):
+        return totals
+    for name in os.listdir(settings.METRICS_DIR):
+        if not name.endswith(".db"):
+            continue
+        with open(os.path.join(settings.METRICS_DIR, name), "rb") as file:
+            data = file.read()
+        for key, value in read_entries(data):
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def _sample_key(name, labels):
+    return json.dumps([name, sorted(labels.items())], separators=(",", ":"))
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\""))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+registry = []
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.append(self)
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}")
+        return labels
+
+    def samples(self, totals):
+        """``(name, labels, value)`` of the collected samples of the metric"""
+        raise NotImplementedError
+
+    def _own_samples(self, totals, names):
+        for key, value in totals.items():
+            name, labels = json.loads(key)
+            if name in names:
+                yield name, [tuple(label) for label in labels], value
+
+    def expose(self, totals):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labels, value in self.samples(totals):
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        counter_file().inc(_sample_key(self.name, self._labels(labels)), amount)
+
+    def samples(self, totals):
+        return sorted(self._own_samples(totals, {self.name}))
+
+
+class Histogram(Metric):
+    type = "histogram"
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+
+    def observe(self, value, **labels):
+        labels = self._labels(labels)
+        counters = counter_file()
+        # Buckets are stored apart and made cumulative when exposed
+        bucket = next(bound for bound in self.buckets if value <= bound)
+        counters.inc(_sample_key(f"{self.name}_bucket", {**labels, "le": bucket}), 1)
+        counters.inc(_sample_key(f"{self.name}_sum", labels), value)
+        counters.inc(_sample_key(f"{self.name}_count", labels), 1)
+
+    def samples(self, totals):
+        names = {f"{self.name}_bucket", f"{self.name}_sum", f"{self.name}_count"}
+        series = {}
+        for name, labels, value in self._own_samples(totals, names):
+            if name == f"{self.name}_bucket":
+                le = dict(labels)["le"]
+                labels = tuple(label for label in labels if label[0] != "le")
+                series.setdefault(labels, {}).setdefault("buckets", {})[le] = value
+            else:
+                series.setdefault(tuple(labels), {})[name] = value
+
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound in self.buckets:
+                cumulative += values.get("buckets", {}).get(bound, 0)
+                le = "+Inf" if bound == math.inf else _format_value(bound)
+                yield f"{self.name}_bucket", [*labels, ("le", le)], cumulative
+            for name in (f"{self.name}_sum", f"{self.name}_count"):
+                yield name, list(labels), values.get(name, 0)
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duration of API requests by view action",
+    ("view", "method"),
+)
+RESPONSES = Counter(
+    "http_responses_total",
+    "API responses by view action and status code",
+    ("view", "method", "status"),
+)
+DB_QUERIES = Counter("db_queries_total", "SQL queries run by API requests", ("view",))
+THROTTLED_REQUESTS = Counter(
+    "throttled_requests_total", "Requests rejected by a throttle", ("scope",)
+)
+TICKETS_BOOKED = Counter("tickets_booked_total", "Tickets created")
+ORDERS_CREATED = Counter("orders_created_total", "Orders created")
+SEAT_CONFLICTS = Counter(
+    "seat_conflicts_total",
+    "Tickets rejected because the seat was taken",
+    ("source",),
+)
+
+
+def observe_request(view, method, status, duration, queries):
+    view = view or "unresolved"
+    REQUEST_DURATION.observe(duration, view=view, method=method)
+    RESPONSES.inc(view=view, method=method, status=str(status))
+    if queries:
+        DB_QUERIES.inc(queries, view=view)
+
+
+def exposition():
+    totals = collect()
+    lines = []
+    for metric in registry:
+        lines.extend(metric.expose(totals))
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """Every metric in the Prometheus text format.
+
+    When ``METRICS_TOKEN`` is set, scrapers send it as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(exposition(), content_type=CONTENT_TYPE)
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+from station_api.geo import geodesic_distances
+
+
+def backfill_distance(apps, schema_editor):
+    Route = apps.get_model("station_api", "Route")
+    rows = list(
+        Route.objects.values_list(
+            "pk",
+            "source__latitude",
+            "source__longitude",
+            "destination__latitude",
+            "destination__longitude",
+        )
+    )
+    if not rows:
+        return
+    pks, *coordinates = zip(*rows)
+    Route.objects.bulk_update(
+        [
+            Route(pk=pk, distance=float(distance))
+            for pk, distance in zip(pks, geodesic_distances(*coordinates))
+        ],
+        ["distance"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station_api", "0005_journey_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="route",
+            name="distance",
+            field=models.FloatField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_distance, migrations.RunPython.noop),
+    ]
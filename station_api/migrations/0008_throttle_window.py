@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station_api", "0007_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThrottleWindow",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255)),
+                ("window", models.BigIntegerField()),
+                ("cost", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "unique_together": {("key", "window")},
+            },
+        ),
+    ]
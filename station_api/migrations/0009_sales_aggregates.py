@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station_api", "0008_throttle_window"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JourneySales",
+            fields=[
+                (
+                    "journey",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="sales",
+                        serialize=False,
+                        to="station_api.journey",
+                    ),
+                ),
+                ("tickets_sold", models.IntegerField(default=0)),
+                ("capacity", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RouteDaySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("journeys", models.IntegerField(default=0)),
+                ("tickets_sold", models.IntegerField(default=0)),
+                ("capacity", models.IntegerField(default=0)),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_sales",
+                        to="station_api.route",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day"], name="route_day_sales_day_idx")
+                ],
+                "unique_together": {("route", "day")},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:41
+
+from django.db import migrations
+
+# FTS5 tables of the name search, see station_api.search. Only SQLite has
+# them, other backends search the name columns directly.
+SEARCH_TABLES = {
+    "station_api_station_search": ("station_api_station", ("name",)),
+    "station_api_crew_search": ("station_api_crew", ("first_name", "last_name")),
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table, (source, fields) in SEARCH_TABLES.items():
+        columns = ", ".join(fields)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {table} (rowid, {columns}) "
+            f"SELECT id, {columns} FROM {source}"
+        )
+        schema_editor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station_api", "0009_sales_aggregates"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
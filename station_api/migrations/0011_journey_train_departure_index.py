@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station_api", "0010_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["train", "departure_time", "arrival_time"],
+                name="journey_train_departure_idx",
+            ),
+        ),
+    ]
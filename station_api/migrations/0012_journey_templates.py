@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station_api", "0011_journey_train_departure_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JourneyTemplate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("departure_time", models.TimeField(help_text="Local time of day")),
+                ("duration", models.DurationField()),
+                (
+                    "weekdays",
+                    models.PositiveSmallIntegerField(help_text="Bit 0 is Monday"),
+                ),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField()),
+                (
+                    "exceptions",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="ISO dates without a departure",
+                    ),
+                ),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="station_api.route",
+                    ),
+                ),
+                (
+                    "train",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="station_api.train",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="journey",
+            name="template",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="journeys",
+                to="station_api.journeytemplate",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="journey",
+            constraint=models.UniqueConstraint(
+                fields=("template", "departure_time"),
+                name="journey_template_departure_unique",
+            ),
+        ),
+    ]
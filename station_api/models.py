@@ -1,13 +1,19 @@
 import os
 import uuid
+from datetime import datetime, timedelta
 
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
 from django.utils.text import slugify
 from geopy.distance import geodesic
 
 from user.models import User
 
+from .metrics import SEAT_CONFLICTS
+from .sales import tickets_per_journey
+
 
 def image_file_path(instance, filename):
     _, extension = os.path.splitext(filename)
@@ -40,18 +46,33 @@ class Route(models.Model):
     destination = models.ForeignKey(
         Station, on_delete=models.CASCADE, related_name="route_destination"
     )
+    distance = models.FloatField(null=True, editable=False, db_index=True)
+
+    def update_distance(self):
+        source_coords = (self.source.latitude, self.source.longitude)
+        destination_coords = (self.destination.latitude, self.destination.longitude)
+        self.distance = geodesic(source_coords, destination_coords).kilometers
 
-    @property
-    def distance(self):
-        if self.source and self.destination:
-            source_coords = (self.source.latitude, self.source.longitude)
-            destination_coords = (self.destination.latitude, self.destination.longitude)
-            return geodesic(source_coords, destination_coords).kilometers
-        return None
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        self.update_distance()
+        return super(Route, self).save(force_insert, force_update, using, update_fields)
 
     def __str__(self):
         return f"From {self.source} to {self.destination}"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["source", "destination"], name="route_source_destination_idx"
+            ),
+        ]
+
 
 class TrainType(models.Model):
     name = models.CharField(max_length=255)
@@ -66,20 +87,161 @@ class Train(models.Model):
     places_in_cargo = models.IntegerField()
     train_type = models.ForeignKey(TrainType, on_delete=models.CASCADE)
     image = models.ImageField(null=True, upload_to=image_file_path)
+    # Resized copies of the image, see station_api.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.name
 
 
+class JourneyTemplate(models.Model):
+    """A journey repeated on some weekdays, see ``station_api.schedules``"""
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE)
+    train = models.ForeignKey(Train, on_delete=models.CASCADE)
+    departure_time = models.TimeField(help_text="Local time of day")
+    duration = models.DurationField()
+    weekdays = models.PositiveSmallIntegerField(help_text="Bit 0 is Monday")
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    exceptions = models.JSONField(
+        default=list, blank=True, help_text="ISO dates without a departure"
+    )
+
+    def runs_on(self, day):
+        return (
+            self.valid_from <= day <= self.valid_until
+            and self.weekdays >> day.weekday() & 1
+            and day.isoformat() not in self.exceptions
+        )
+
+    def departures(self, start, end):
+        """Aware departure times in ``[start, end)``, in order"""
+        day = max(timezone.localdate(start), self.valid_from)
+        last = min(timezone.localdate(end), self.valid_until)
+        while day <= last:
+            if self.runs_on(day):
+                departure_time = timezone.make_aware(
+                    datetime.combine(day, self.departure_time)
+                )
+                if start <= departure_time < end:
+                    yield departure_time
+            day += timedelta(days=1)
+
+    def __str__(self):
+        return f"{self.route} on {self.train} at {self.departure_time}"
+
+
 class Journey(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE)
     train = models.ForeignKey(Train, on_delete=models.CASCADE)
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    template = models.ForeignKey(
+        JourneyTemplate,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="journeys",
+    )
+
+    @staticmethod
+    def validate_schedule(
+        train,
+        departure_time,
+        arrival_time,
+        error_to_raise,
+        exclude_pk=None,
+        template=None,
+    ):
+        """Reject a journey overlapping another one of the train.
+
+        Departures of the train's templates count too, stored or not. A
+        journey that is itself a departure of ``template`` is not checked
+        against that departure.
+        """
+        if arrival_time <= departure_time:
+            raise error_to_raise(
+                {"arrival_time": "The arrival must be after the departure"}
+            )
+        overlapping = (
+            Journey.objects.filter(
+                train=train,
+                departure_time__lt=arrival_time,
+                arrival_time__gt=departure_time,
+            )
+            .exclude(pk=exclude_pk)
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if overlapping is not None:
+            raise error_to_raise(
+                {"train": f"The train is already on journey {overlapping} at that time"}
+            )
+
+        candidates = [
+            (other.pk, other_departure)
+            for other in JourneyTemplate.objects.filter(
+                train=train, valid_from__lte=timezone.localdate(arrival_time)
+            ).order_by("pk")
+            for other_departure in other.departures(
+                departure_time - other.duration, arrival_time
+            )
+            if other_departure + other.duration > departure_time
+            and (other.pk, other_departure) != (template, departure_time)
+        ]
+        if not candidates:
+            return
+        # Stored departures were checked as journeys above
+        stored = set(
+            Journey.objects.filter(
+                template__in={pk for pk, _ in candidates},
+                departure_time__in={time for _, time in candidates},
+            ).values_list("template_id", "departure_time")
+        )
+        for other_pk, other_departure in candidates:
+            if (other_pk, other_departure) not in stored:
+                raise error_to_raise(
+                    {
+                        "train": f"The train is on a departure of template "
+                        f"{other_pk} at that time"
+                    }
+                )
+
+    def clean(self):
+        if self.departure_time and self.arrival_time and self.train_id:
+            Journey.validate_schedule(
+                self.train_id,
+                self.departure_time,
+                self.arrival_time,
+                ValidationError,
+                exclude_pk=self.pk,
+                template=self.template_id,
+            )
 
     def __str__(self):
         return f"{self.route} on {self.train}"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["route", "departure_time"], name="journey_route_departure_idx"
+            ),
+            models.Index(fields=["departure_time", "id"], name="journey_departure_idx"),
+            # Arrival included so that overlap checks only read the index
+            models.Index(
+                fields=["train", "departure_time", "arrival_time"],
+                name="journey_train_departure_idx",
+            ),
+        ]
+        constraints = [
+            # A departure of a template is materialized once
+            models.UniqueConstraint(
+                fields=["template", "departure_time"],
+                name="journey_template_departure_unique",
+            ),
+        ]
+
 
 class Order(models.Model):
     created_at = models.DateTimeField()
@@ -88,6 +250,27 @@ class Order(models.Model):
     def __str__(self):
         return f"Order at {self.created_at} by {self.user}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="order_created_idx"),
+            models.Index(
+                fields=["user", "created_at", "id"], name="order_user_created_idx"
+            ),
+        ]
+
+
+# Sent with the deleted tickets by journey id as ``counts`` when tickets are
+# deleted directly, cascades from journeys and orders are not reported
+tickets_deleted = Signal()
+
+
+class TicketQuerySet(models.QuerySet):
+    def delete(self):
+        counts = tickets_per_journey(self)
+        deleted = super().delete()
+        tickets_deleted.send(sender=Ticket, counts=counts)
+        return deleted
+
 
 class Ticket(models.Model):
     cargo = models.IntegerField()
@@ -95,9 +278,12 @@ class Ticket(models.Model):
     journey = models.ForeignKey("Journey", on_delete=models.CASCADE)
     order = models.ForeignKey("Order", on_delete=models.CASCADE)
 
+    objects = TicketQuerySet.as_manager()
+
     @staticmethod
     def validate_ticket(seat, journey, error_to_raise):
         if Ticket.objects.filter(seat=seat, journey=journey).exists():
+            SEAT_CONFLICTS.inc(source="ticket")
             raise error_to_raise({"seat": f"The seat is alredy taken"})
 
     def clean(self):
@@ -119,9 +305,60 @@ class Ticket(models.Model):
             force_insert, force_update, using, update_fields
         )
 
+    def delete(self, using=None, keep_parents=False):
+        deleted = super().delete(using, keep_parents)
+        tickets_deleted.send(sender=Ticket, counts={self.journey_id: 1})
+        return deleted
+
     def __str__(self):
         return f"Seat {self.seat}, {self.journey}"
 
     class Meta:
         unique_together = ("journey", "seat")
         ordering = ["seat"]
+
+
+class JourneySales(models.Model):
+    """Tickets sold on a journey, kept up to date by ``sales``"""
+
+    journey = models.OneToOneField(
+        Journey, on_delete=models.CASCADE, primary_key=True, related_name="sales"
+    )
+    tickets_sold = models.IntegerField(default=0)
+    capacity = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.journey}: {self.tickets_sold}/{self.capacity}"
+
+
+class RouteDaySales(models.Model):
+    """Journeys and tickets sold on a route for one departure day"""
+
+    route = models.ForeignKey(
+        Route, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    day = models.DateField()
+    journeys = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+    capacity = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.route} on {self.day}: {self.tickets_sold}/{self.capacity}"
+
+    class Meta:
+        unique_together = ("route", "day")
+        indexes = [models.Index(fields=["day"], name="route_day_sales_day_idx")]
+
+
+class ThrottleWindow(models.Model):
+    """Request cost spent by one throttle key within one fixed time window"""
+
+    key = models.CharField(max_length=255)
+    window = models.BigIntegerField()
+    cost = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} @ {self.window}: {self.cost}"
+
+    class Meta:
+        unique_together = ("key", "window")
@@ -0,0 +1,186 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _equal(field, value):
+    if value is None:
+        return Q(**{f"{field.attname}__isnull": True})
+    return Q(**{field.attname: value})
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination over a composite, unique ordering.
+
+    DRF's ``CursorPagination`` only keeps the first ordering field in the
+    cursor and skips ties with an offset. Here the cursor holds every
+    ordering value of the boundary row, so each page is a single range
+    condition on the ordering index and page N costs the same as page 1.
+
+    Views pick the ordering with a ``cursor_ordering`` attribute, whose last
+    field must make it unique (usually ``"id"``). NULLs of nullable fields
+    sort after every value, on every database. Pages of ``values()`` rows
+    are supported as long as the rows hold the ordering fields by attname.
+    """
+
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = ("id",)
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, "cursor_ordering", self.ordering))
+
+    def _fields(self, queryset):
+        opts = queryset.model._meta
+        return [opts.get_field(name.lstrip("-")) for name in self.ordering]
+
+    def _boundary(self, values, reverse):
+        """Rows strictly after ``values`` in (possibly reversed) ordering.
+
+        NULL sorts after every value, as in ``_order_by``.
+        """
+        conditions = []
+        for index, (name, field) in enumerate(zip(self.ordering, self.fields)):
+            descending = name.startswith("-") != reverse
+            value = values[index]
+            equal = reduce(
+                and_,
+                (
+                    _equal(previous, previous_value)
+                    for previous, previous_value in zip(self.fields[:index], values)
+                ),
+                Q(),
+            )
+            if descending:
+                after = (
+                    Q(**{f"{field.attname}__isnull": False})
+                    if value is None
+                    else Q(**{f"{field.attname}__lt": value})
+                )
+            elif value is None:
+                # Nothing sorts after NULL
+                continue
+            else:
+                after = Q(**{f"{field.attname}__gt": value})
+                if field.null:
+                    after |= Q(**{f"{field.attname}__isnull": True})
+            conditions.append(equal & after)
+        return reduce(or_, conditions, Q(pk__in=[]))
+
+    def _order_by(self):
+        order_by = []
+        for name, field in zip(self.ordering, self.fields):
+            if name.startswith("-") != self.reverse:
+                order_by.append(F(field.attname).desc(nulls_first=True))
+            else:
+                order_by.append(F(field.attname).asc(nulls_last=True))
+        return order_by
+
+    def _page_queryset(self, queryset, request, view):
+        """Return the rows to fetch for the page, ``None`` when not paginated"""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.fields = self._fields(queryset)
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor["reverse"])
+
+        if self.cursor:
+            try:
+                values = [
+                    None if value is None else field.to_python(value)
+                    for field, value in zip(self.fields, self.cursor["values"])
+                ]
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(self._boundary(values, self.reverse))
+        # One extra row tells whether there is a page beyond this one
+        return queryset.order_by(*self._order_by())[: self.page_size + 1]
+
+    def _set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if self.reverse:
+            self.page.reverse()
+
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = bool(self.cursor) if not self.reverse else has_more
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page([instance async for instance in queryset])
+
+    def _values(self, instance):
+        if isinstance(instance, dict):
+            instance = self.model(
+                **{field.attname: instance[field.attname] for field in self.fields}
+            )
+        # NULL stays null, value_to_string would make it "None"
+        return [
+            (
+                None
+                if field.value_from_object(instance) is None
+                else field.value_to_string(instance)
+            )
+            for field in self.fields
+        ]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(
+            {"reverse": False, "values": self._values(self.page[-1])}
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(
+            {"reverse": True, "values": self._values(self.page[0])}
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            if not isinstance(cursor["reverse"], bool) or len(cursor["values"]) != len(
+                self.ordering
+            ):
+                raise ValueError
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, cursor):
+        encoded = urlsafe_b64encode(
+            json.dumps(cursor, separators=(",", ":")).encode()
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
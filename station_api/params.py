@@ -0,0 +1,57 @@
+"""Parsing of query parameters, raising a 400 for invalid values"""
+
+import math
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def _check_bounds(name, number, minimum, maximum):
+    if (minimum is not None and number < minimum) or (
+        maximum is not None and number > maximum
+    ):
+        raise ValidationError(
+            {name: f"Ensure this value is between {minimum} and {maximum}."}
+        )
+    return number
+
+
+def param_to_int(name, value, minimum=None, maximum=None):
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+    return _check_bounds(name, number, minimum, maximum)
+
+
+def param_to_float(name, value, minimum=None, maximum=None):
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValidationError({name: "A valid number is required."})
+    return _check_bounds(name, number, minimum, maximum)
+
+
+def param_to_date(name, value):
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "A valid date is required."})
+    return parsed
+
+
+def param_to_datetime(name, value):
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "A valid datetime is required."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
@@ -0,0 +1,258 @@
+"""Earliest-arrival trip planning with the Connection Scan Algorithm.
+
+Every ``Journey`` is one connection from its route source to its route
+destination. The connections of the whole timetable are kept in memory as a
+list sorted by departure time, so a query is a single forward scan starting
+at the requested departure instead of recursive ORM lookups.
+"""
+
+import threading
+import uuid
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone as dt_timezone
+from operator import itemgetter
+
+from .caching import shared_cache
+from .models import Journey
+
+CONNECTIONS_VERSION_KEY = "station_api:connections-version"
+MIN_TRANSFER_TIME = timedelta(minutes=10)
+MAX_TRANSFERS = 3
+SEARCH_HORIZON = timedelta(days=2)
+
+_departure = itemgetter(0)
+
+
+def _timestamp(value):
+    return value.timestamp()
+
+
+def _datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+class Itinerary:
+    def __init__(self, legs):
+        self.legs = legs
+
+    @property
+    def journey_ids(self):
+        return [leg[4] for leg in self.legs]
+
+    @property
+    def departure_time(self):
+        return _datetime(self.legs[0][0])
+
+    @property
+    def arrival_time(self):
+        return _datetime(self.legs[-1][1])
+
+    @property
+    def transfers(self):
+        return len(self.legs) - 1
+
+
+class ConnectionIndex:
+    """Departure-sorted ``(departure, arrival, source, destination, journey)``
+    tuples, timestamps being POSIX seconds.
+
+    The index is built lazily and patched in place when journeys change in
+    this process. Other processes notice the change through a version token
+    kept in the cache shared by every process and rebuild on their next query.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._connections = None
+        self._by_journey = {}
+        self._version = None
+
+    @staticmethod
+    def _shared_version():
+        version = shared_cache().get(CONNECTIONS_VERSION_KEY)
+        if version is None:
+            shared_cache().add(CONNECTIONS_VERSION_KEY, uuid.uuid4().hex, None)
+            version = shared_cache().get(CONNECTIONS_VERSION_KEY)
+        return version
+
+    def _bump_shared_version(self):
+        # A fresh token rather than a counter, the database cache has no
+        # atomic increment to keep concurrent bumps apart
+        unchanged = self._version == self._shared_version()
+        version = uuid.uuid4().hex
+        shared_cache().set(CONNECTIONS_VERSION_KEY, version, None)
+        if self._connections is not None and unchanged:
+            # Only this change happened since the index was current
+            self._version = version
+        else:
+            self._connections = None
+
+    def rebuild(self):
+        with self._lock:
+            version = self._shared_version()
+            rows = (
+                Journey.objects.order_by("departure_time", "id")
+                .values_list(
+                    "departure_time",
+                    "arrival_time",
+                    "route__source_id",
+                    "route__destination_id",
+                    "id",
+                )
+                .iterator(chunk_size=10_000)
+            )
+            connections = [
+                (_timestamp(departure), _timestamp(arrival), source, destination, pk)
+                for departure, arrival, source, destination, pk in rows
+            ]
+            self._connections = connections
+            self._by_journey = {connection[4]: connection for connection in connections}
+            self._version = version
+
+    def connections(self):
+        with self._lock:
+            if self._connections is None or self._version != self._shared_version():
+                self.rebuild()
+            return self._connections
+
+    def _remove(self, connections, journey_id):
+        connection = self._by_journey.pop(journey_id, None)
+        if connection is None:
+            return
+        position = bisect_left(connections, connection)
+        if position < len(connections) and connections[position] == connection:
+            del connections[position]
+
+    def journey_saved(self, journey_id):
+        with self._lock:
+            if self._connections is not None:
+                # Copy on write, running scans keep iterating their snapshot
+                connections = list(self._connections)
+                self._remove(connections, journey_id)
+                row = (
+                    Journey.objects.filter(pk=journey_id)
+                    .values_list(
+                        "departure_time",
+                        "arrival_time",
+                        "route__source_id",
+                        "route__destination_id",
+                    )
+                    .first()
+                )
+                if row is not None:
+                    departure, arrival, source, destination = row
+                    connection = (
+                        _timestamp(departure),
+                        _timestamp(arrival),
+                        source,
+                        destination,
+                        journey_id,
+                    )
+                    insort(connections, connection)
+                    self._by_journey[journey_id] = connection
+                self._connections = connections
+            self._bump_shared_version()
+
+    def journey_deleted(self, journey_id):
+        with self._lock:
+            if self._connections is not None:
+                connections = list(self._connections)
+                self._remove(connections, journey_id)
+                self._connections = connections
+            self._bump_shared_version()
+
+    def invalidate(self):
+        with self._lock:
+            self._connections = None
+            self._bump_shared_version()
+
+    def _scan(self, connections, source, destination, start, transfer, max_legs):
+        """Earliest arrival at ``destination`` for every number of legs"""
+        arrivals = [{} for _ in range(max_legs + 1)]
+        parents = [{} for _ in range(max_legs + 1)]
+        direct = float("inf")
+        horizon = start + SEARCH_HORIZON.total_seconds()
+
+        for index in range(
+            bisect_left(connections, start, key=_departure), len(connections)
+        ):
+            connection = connections[index]
+            departure, arrival, from_station, to_station, _ = connection
+            # Nothing departing after the earliest direct arrival can beat it
+            if departure > direct or departure > horizon:
+                break
+            for legs in range(1, max_legs + 1):
+                if legs == 1:
+                    if from_station != source:
+                        continue
+                else:
+                    reached = arrivals[legs - 1].get(from_station)
+                    if reached is None or reached + transfer > departure:
+                        continue
+                if arrival < arrivals[legs].get(to_station, float("inf")):
+                    arrivals[legs][to_station] = arrival
+                    parents[legs][to_station] = connection
+                    if legs == 1 and to_station == destination:
+                        direct = arrival
+
+        itineraries = []
+        earliest = float("inf")
+        for legs in range(1, max_legs + 1):
+            arrival = arrivals[legs].get(destination)
+            if arrival is None or arrival >= earliest:
+                continue
+            earliest = arrival
+            route = []
+            station = destination
+            for level in range(legs, 0, -1):
+                connection = parents[level][station]
+                route.append(connection)
+                station = connection[2]
+            itineraries.append(Itinerary(route[::-1]))
+        return itineraries
+
+    def plan(
+        self,
+        source,
+        destination,
+        departure_after,
+        limit=3,
+        min_transfer=MIN_TRANSFER_TIME,
+        max_transfers=MAX_TRANSFERS,
+    ):
+        """Return up to ``limit`` itineraries ordered by arrival and transfers.
+
+        Each scan yields the Pareto set of (arrival, transfers) for a given
+        departure; later alternatives are found by rescanning just after the
+        earliest first-leg departure of the previous scan.
+        """
+        if source == destination:
+            return []
+        connections = self.connections()
+        transfer = min_transfer.total_seconds()
+        start = _timestamp(departure_after)
+        found = {}
+
+        for _ in range(limit * 3):
+            itineraries = self._scan(
+                connections, source, destination, start, transfer, max_transfers + 1
+            )
+            if not itineraries:
+                break
+            for itinerary in itineraries:
+                found.setdefault(tuple(itinerary.journey_ids), itinerary)
+            if len(found) >= limit:
+                break
+            start = min(itinerary.legs[0][0] for itinerary in itineraries) + 1
+
+        return sorted(
+            found.values(),
+            key=lambda itinerary: (
+                itinerary.legs[-1][1],
+                itinerary.transfers,
+                itinerary.legs[0][0],
+            ),
+        )[:limit]
+
+
+connection_index = ConnectionIndex()
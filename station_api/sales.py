@@ -0,0 +1,296 @@
+"""Occupancy and sales aggregates.
+
+``JourneySales`` and ``RouteDaySales`` hold the tickets sold and the seats
+offered per journey and per route and departure day. Signals and the bulk
+booking paths add the difference of every change to them in the same
+transaction as the change, so reading them never counts tickets.
+``rebuild_sales`` recomputes both tables from scratch.
+
+Tickets have no delete signals, so that cascades delete them in one query:
+a deleted journey takes its tickets away at once, a deleted order its
+tickets per journey, and direct deletes send ``tickets_deleted``.
+
+Fixtures loaded with ``loaddata`` send raw signals, which are skipped;
+rebuild the aggregates after loading them.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def departure_day(departure_time):
+    return timezone.localdate(departure_time)
+
+
+def _add(model, filters, create=True, **deltas):
+    """Add ``deltas`` to the row matching ``filters``.
+
+    The row is created when missing, unless ``create`` is false: taking away
+    from a row that is gone means its journey or route is being deleted.
+    """
+    updates = {name: F(name) + value for name, value in deltas.items() if value}
+    if not updates:
+        return
+    if model.objects.filter(**filters).update(**updates) or not create:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**filters, **deltas)
+    except IntegrityError:
+        # Created by a concurrent transaction in the meantime
+        model.objects.filter(**filters).update(**updates)
+
+
+def tickets_added(journey, count=1):
+    """Count ``count`` new tickets of ``journey``"""
+    from .models import JourneySales, RouteDaySales
+
+    _add(JourneySales, {"journey_id": journey.pk}, tickets_sold=count)
+    _add(
+        RouteDaySales,
+        {"route_id": journey.route_id, "day": departure_day(journey.departure_time)},
+        tickets_sold=count,
+    )
+
+
+def tickets_removed(journey_id, count=1):
+    from .models import Journey, JourneySales, RouteDaySales
+
+    journey = (
+        Journey.objects.filter(pk=journey_id)
+        .values("route_id", "departure_time")
+        .first()
+    )
+    if journey is None:
+        return
+    _add(JourneySales, {"journey_id": journey_id}, create=False, tickets_sold=-count)
+    _add(
+        RouteDaySales,
+        {
+            "route_id": journey["route_id"],
+            "day": departure_day(journey["departure_time"]),
+        },
+        create=False,
+        tickets_sold=-count,
+    )
+
+
+def journey_state(journey_id):
+    """What a stored journey adds to the aggregates, ``None`` when unsaved"""
+    from .models import Journey
+
+    journey = (
+        Journey.objects.filter(pk=journey_id)
+        .values(
+            "route_id",
+            "departure_time",
+            "train__cargo_num",
+            "train__places_in_cargo",
+            "sales__tickets_sold",
+        )
+        .first()
+    )
+    if journey is None:
+        return None
+    return (
+        journey["route_id"],
+        departure_day(journey["departure_time"]),
+        journey["train__cargo_num"] * journey["train__places_in_cargo"],
+        journey["sales__tickets_sold"] or 0,
+    )
+
+
+def journey_changed(journey_id, previous):
+    """Move the journey from its ``previous`` state to the stored one"""
+    from .models import JourneySales, RouteDaySales
+
+    current = journey_state(journey_id)
+    if current == previous:
+        return
+    route_id, day, capacity, tickets_sold = current
+    if previous is not None:
+        previous_route_id, previous_day, previous_capacity, _ = previous
+        _add(
+            RouteDaySales,
+            {"route_id": previous_route_id, "day": previous_day},
+            create=False,
+            journeys=-1,
+            capacity=-previous_capacity,
+            tickets_sold=-tickets_sold,
+        )
+    _add(
+        JourneySales,
+        {"journey_id": journey_id},
+        capacity=capacity - (previous[2] if previous else 0),
+    )
+    _add(
+        RouteDaySales,
+        {"route_id": route_id, "day": day},
+        journeys=1,
+        capacity=capacity,
+        tickets_sold=tickets_sold,
+    )
+
+
+def journey_removed(state):
+    """Take away a journey being deleted together with its tickets"""
+    from .models import RouteDaySales
+
+    if state is None:
+        return
+    route_id, day, capacity, tickets_sold = state
+    _add(
+        RouteDaySales,
+        {"route_id": route_id, "day": day},
+        create=False,
+        journeys=-1,
+        capacity=-capacity,
+        tickets_sold=-tickets_sold,
+    )
+
+
+def train_capacity_changed(train_id, difference):
+    from .models import Journey, JourneySales, RouteDaySales
+
+    if not difference:
+        return
+    JourneySales.objects.filter(journey__train_id=train_id).update(
+        capacity=F("capacity") + difference
+    )
+    days = (
+        Journey.objects.filter(train_id=train_id)
+        .annotate(day=TruncDate("departure_time"))
+        .values("route_id", "day")
+        .annotate(journeys=Count("id"))
+        .order_by()
+    )
+    for row in days:
+        _add(
+            RouteDaySales,
+            {"route_id": row["route_id"], "day": row["day"]},
+            create=False,
+            capacity=difference * row["journeys"],
+        )
+
+
+def tickets_per_journey(tickets):
+    """Number of ``tickets`` by journey id"""
+    return dict(
+        tickets.order_by()
+        .values("journey_id")
+        .annotate(count=Count("id"))
+        .values_list("journey_id", "count")
+    )
+
+
+def _sold_per_journey(journey_ids):
+    from .models import Ticket
+
+    return tickets_per_journey(Ticket.objects.filter(journey_id__in=journey_ids))
+
+
+def rebuild_sales(batch_size=10_000, check=False):
+    """Recompute the aggregates from the tickets, ``batch_size`` journeys at a time.
+
+    With ``check`` nothing is written and the aggregates are only compared
+    with the recomputed values. Returns the number of journeys and the
+    number of journey and route day rows that were wrong.
+    """
+    from .models import Journey, JourneySales, RouteDaySales
+
+    report = {"journeys": 0, "journey_mismatches": 0, "route_day_mismatches": 0}
+    route_days = defaultdict(Counter)
+    last = 0
+    with transaction.atomic():
+        if not check:
+            JourneySales.objects.all().delete()
+        while True:
+            journeys = list(
+                Journey.objects.filter(pk__gt=last)
+                .order_by("pk")
+                .values(
+                    "pk",
+                    "route_id",
+                    "departure_time",
+                    "train__cargo_num",
+                    "train__places_in_cargo",
+                )[:batch_size]
+            )
+            if not journeys:
+                break
+            last = journeys[-1]["pk"]
+            sold = _sold_per_journey([journey["pk"] for journey in journeys])
+
+            rows = []
+            for journey in journeys:
+                capacity = (
+                    journey["train__cargo_num"] * journey["train__places_in_cargo"]
+                )
+                tickets_sold = sold.get(journey["pk"], 0)
+                rows.append(
+                    JourneySales(
+                        journey_id=journey["pk"],
+                        tickets_sold=tickets_sold,
+                        capacity=capacity,
+                    )
+                )
+                key = (journey["route_id"], departure_day(journey["departure_time"]))
+                route_days[key].update(
+                    journeys=1, capacity=capacity, tickets_sold=tickets_sold
+                )
+            report["journeys"] += len(journeys)
+
+            if check:
+                stored = JourneySales.objects.in_bulk([row.journey_id for row in rows])
+                report["journey_mismatches"] += sum(
+                    1
+                    for row in rows
+                    if row.journey_id not in stored
+                    or (row.tickets_sold, row.capacity)
+                    != (
+                        stored[row.journey_id].tickets_sold,
+                        stored[row.journey_id].capacity,
+                    )
+                )
+            else:
+                JourneySales.objects.bulk_create(rows, batch_size=batch_size)
+
+        expected = {
+            key: (totals["journeys"], totals["tickets_sold"], totals["capacity"])
+            for key, totals in route_days.items()
+        }
+        if check:
+            stored = {
+                (row.route_id, row.day): (row.journeys, row.tickets_sold, row.capacity)
+                for row in RouteDaySales.objects.iterator()
+            }
+            report["route_day_mismatches"] = sum(
+                1
+                for key in expected.keys() | stored.keys()
+                # Emptied rows are left behind by the incremental updates
+                if expected.get(key, (0, 0, 0)) != stored.get(key, (0, 0, 0))
+            )
+        else:
+            RouteDaySales.objects.all().delete()
+            RouteDaySales.objects.bulk_create(
+                (
+                    RouteDaySales(
+                        route_id=route_id,
+                        day=day,
+                        journeys=journeys,
+                        tickets_sold=tickets_sold,
+                        capacity=capacity,
+                    )
+                    for (route_id, day), (
+                        journeys,
+                        tickets_sold,
+                        capacity,
+                    ) in expected.items()
+                ),
+                batch_size=batch_size,
+            )
+    return report
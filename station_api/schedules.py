@@ -0,0 +1,223 @@
+"""Recurring journeys.
+
+A ``JourneyTemplate`` stands for a journey departing at the same local time
+on some weekdays of a date range, except on its exception dates. Its
+departures are not stored: ``departures`` expands them on demand and merges
+them with the stored journeys, and a departure becomes a ``Journey`` row only
+when its first ticket is booked, through ``materialize``. From then on the
+row is listed instead of the expanded departure. Bookings are validated
+against the unsaved ``departure`` and materialize it in the transaction
+that books the tickets, so a rejected booking writes nothing.
+"""
+
+import heapq
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Journey, JourneyTemplate
+from .row_serializers import JOURNEY_STR_VALUES, route_str
+from .timetable import OVERLAP, find_conflicts
+
+MAX_DEPARTURES = 500
+MAX_DEPARTURES_WINDOW = timedelta(days=31)
+
+# Merged rows sort by departure, stored journeys first, then by id
+_JOURNEY, _TEMPLATE = 0, 1
+
+
+def is_departure(template, departure_time):
+    local = timezone.localtime(departure_time)
+    return template.runs_on(local.date()) and local.time() == template.departure_time
+
+
+def departure(template, departure_time):
+    """The ``Journey`` of a departure of ``template``, unsaved when missing.
+
+    Nothing is written, so bookings validate against it and ``materialize``
+    it only once they are accepted. Raises ``ValueError`` when the template
+    does not depart at that time or its train is on another journey then.
+    """
+    if not is_departure(template, departure_time):
+        raise ValueError("The template has no departure at that time")
+    journey = Journey.objects.filter(
+        template=template, departure_time=departure_time
+    ).first()
+    if journey is not None:
+        return journey
+    journey = Journey(
+        template=template,
+        route_id=template.route_id,
+        train=template.train,
+        departure_time=departure_time,
+        arrival_time=departure_time + template.duration,
+    )
+    try:
+        Journey.validate_schedule(
+            journey.train_id,
+            journey.departure_time,
+            journey.arrival_time,
+            DjangoValidationError,
+            template=template.pk,
+        )
+    except DjangoValidationError as error:
+        raise ValueError(error.messages[0])
+    return journey
+
+
+def materialize(template, departure_time):
+    """The ``Journey`` of a departure of ``template``, created when missing.
+
+    Raises ``ValueError`` like ``departure``.
+    """
+    journey = departure(template, departure_time)
+    if journey.pk is not None:
+        return journey
+    try:
+        with transaction.atomic():
+            journey.save()
+            return journey
+    except IntegrityError:
+        # Materialized by a concurrent booking in the meantime
+        return Journey.objects.get(template=template, departure_time=departure_time)
+
+
+def template_conflicts(template):
+    """Overlaps of the departures of ``template`` with its train's schedule.
+
+    ``template`` may be unsaved. Its departures are checked against each
+    other, against the stored journeys of the train other than its own, and
+    against the departures of the other templates of the train, in one
+    ``find_conflicts`` sweep. Returns the conflicts involving ``template``.
+    """
+    start = timezone.make_aware(datetime.combine(template.valid_from, time.min))
+    end = timezone.make_aware(
+        datetime.combine(template.valid_until + timedelta(days=1), time.min)
+    )
+    proposed = [
+        {
+            "route": template.route_id,
+            "train": template.train_id,
+            "departure_time": departure_time,
+            "arrival_time": departure_time + template.duration,
+        }
+        for departure_time in template.departures(start, end)
+    ]
+    own = len(proposed)
+    others = (
+        JourneyTemplate.objects.filter(
+            train_id=template.train_id,
+            valid_from__lte=template.valid_until + timedelta(days=1),
+            valid_until__gte=template.valid_from - timedelta(days=1),
+        )
+        .exclude(pk=template.pk)
+        .order_by("pk")
+    )
+    for other in others:
+        for departure_time in other.departures(
+            start - other.duration, end + template.duration
+        ):
+            proposed.append(
+                {
+                    "route": other.route_id,
+                    "train": other.train_id,
+                    "departure_time": departure_time,
+                    "arrival_time": departure_time + other.duration,
+                    "template": other.pk,
+                }
+            )
+    if not own:
+        return []
+
+    stored = Journey.objects.all()
+    if template.pk is not None:
+        stored = stored.exclude(template=template.pk)
+    conflicts = []
+    for conflict in find_conflicts(proposed, stored=stored):
+        if conflict["reason"] != OVERLAP:
+            continue
+        # Keep the overlaps with a departure of the template on one side
+        index, other_index = conflict["index"], conflict["other_index"]
+        if index >= own:
+            if other_index is None or other_index >= own:
+                continue
+            index, other_index = other_index, index
+        if other_index is not None and other_index >= own:
+            other = f"a departure of template {proposed[other_index]['template']}"
+        elif other_index is not None:
+            other = "another departure of the template"
+        else:
+            other = f"journey {conflict['other_journey']}"
+        conflicts.append((proposed[index]["departure_time"], other))
+    return sorted(conflicts)
+
+
+def _stored_rows(journeys):
+    for row in journeys:
+        yield (row["departure_time"], _JOURNEY, row["id"]), {
+            "id": row["id"],
+            "template": row["template_id"],
+            "route": route_str(
+                row["route__source__name"], row["route__destination__name"]
+            ),
+            "train": row["train__name"],
+            "departure_time": row["departure_time"],
+            "arrival_time": row["arrival_time"],
+        }
+
+
+def _expanded_rows(template, start, end, materialized):
+    route = str(template.route)
+    for departure_time in template.departures(start, end):
+        if (template.id, departure_time) in materialized:
+            continue
+        yield (departure_time, _TEMPLATE, template.id), {
+            "id": None,
+            "template": template.id,
+            "route": route,
+            "train": template.train.name,
+            "departure_time": departure_time,
+            "arrival_time": departure_time + template.duration,
+        }
+
+
+def departures(journeys, templates, start, end, limit):
+    """The first ``limit`` departures in ``[start, end)`` in departure order.
+
+    ``journeys`` and ``templates`` are querysets already filtered by route.
+    Stored journeys are read in departure order up to ``limit`` and each
+    template expands into its own ordered stream, so a k-way merge of the
+    streams stops after ``limit`` rows.
+    """
+    journeys = (
+        journeys.filter(departure_time__gte=start, departure_time__lt=end)
+        .order_by("departure_time", "id")
+        .values(
+            "id", "template_id", "departure_time", "arrival_time", *JOURNEY_STR_VALUES
+        )[:limit]
+    )
+    templates = list(
+        templates.filter(
+            valid_from__lte=timezone.localdate(end),
+            valid_until__gte=timezone.localdate(start),
+        ).select_related("route__source", "route__destination", "train")
+    )
+    materialized = set()
+    if templates:
+        materialized = set(
+            Journey.objects.filter(
+                template__in=templates,
+                departure_time__gte=start,
+                departure_time__lt=end,
+            ).values_list("template_id", "departure_time")
+        )
+
+    streams = [_stored_rows(journeys)]
+    streams.extend(
+        _expanded_rows(template, start, end, materialized) for template in templates
+    )
+    merged = heapq.merge(*streams, key=lambda keyed_row: keyed_row[0])
+    return [row for _, row in islice(merged, limit)]
@@ -0,0 +1,152 @@
+import base64
+from functools import reduce
+from operator import or_
+
+from .caching import shared_cache
+from .models import Ticket
+
+SEAT_MAP_CACHE_TIMEOUT = 60 * 60
+
+
+def seat_map_cache_key(journey_id):
+    return f"station_api:journey-seats:{journey_id}"
+
+
+class SeatMap:
+    """Occupancy of a journey's train as one integer bitmap per cargo.
+
+    Bit ``seat - 1`` of ``bitmaps[cargo - 1]`` is set when the seat is taken.
+    """
+
+    def __init__(self, cargo_num, places_in_cargo, bitmaps=None):
+        self.cargo_num = cargo_num
+        self.places_in_cargo = places_in_cargo
+        self.bitmaps = list(bitmaps) if bitmaps else [0] * cargo_num
+
+    @classmethod
+    def for_journey(cls, journey):
+        """Build the map for a journey from a single ticket query"""
+        train = journey.train
+        seat_map = cls(train.cargo_num, train.places_in_cargo)
+        for cargo, seat in Ticket.objects.filter(journey=journey).values_list(
+            "cargo", "seat"
+        ):
+            seat_map.mark(cargo, seat)
+        return seat_map
+
+    def contains(self, cargo, seat):
+        return 1 <= cargo <= self.cargo_num and 1 <= seat <= self.places_in_cargo
+
+    def mark(self, cargo, seat):
+        if self.contains(cargo, seat):
+            self.bitmaps[cargo - 1] |= 1 << (seat - 1)
+
+    def is_taken(self, cargo, seat):
+        return bool(self.bitmaps[cargo - 1] >> (seat - 1) & 1)
+
+    def taken_count(self, cargo):
+        return self.bitmaps[cargo - 1].bit_count()
+
+    def free_seats(self):
+        """Bitmap of the seat numbers that are free in every cargo.
+
+        Seats are unique per journey (``Ticket.Meta.unique_together``), so a
+        seat number taken in one cargo can't be booked in another.
+        """
+        full = (1 << self.places_in_cargo) - 1
+        return full & ~reduce(or_, self.bitmaps, 0)
+
+    @staticmethod
+    def free_runs(bitmap):
+        """Yield ``(first seat, length)`` of every run of set bits"""
+        offset = 0
+        while bitmap:
+            skipped = (bitmap & -bitmap).bit_length() - 1
+            bitmap >>= skipped
+            offset += skipped
+            # Adding 1 clears the run of low set bits
+            length = (bitmap ^ (bitmap + 1)).bit_length() - 1
+            yield offset + 1, length
+            bitmap >>= length
+            offset += length
+
+    def allocate(self, count):
+        """Pick ``count`` free seats as ``[(cargo, seat), ...]``.
+
+        The seats are next to each other when a run of ``count`` free seats
+        is left, the shortest such run so that longer ones stay whole.
+        Otherwise the longest runs are used first. As a free seat number is
+        free in every cargo, the group always fits in one, the one with the
+        fewest passengers. Returns ``None`` when fewer seats are free.
+        """
+        free = self.free_seats()
+        if count < 1 or free.bit_count() < count:
+            return None
+
+        cargo = min(range(1, self.cargo_num + 1), key=self.taken_count)
+        runs = list(self.free_runs(free))
+        fitting = [run for run in runs if run[1] >= count]
+        if fitting:
+            first, _ = min(fitting, key=lambda run: (run[1], run[0]))
+            return [(cargo, seat) for seat in range(first, first + count)]
+
+        seats = []
+        for first, length in sorted(runs, key=lambda run: (-run[1], run[0])):
+            seats.extend(range(first, first + min(length, count - len(seats))))
+            if len(seats) == count:
+                break
+        return [(cargo, seat) for seat in sorted(seats)]
+
+    def encode(self, bitmap):
+        """Return a seat bitmap as base64.
+
+        Seat ``n`` is bit ``(n - 1) % 8`` (least significant first) of byte
+        ``(n - 1) // 8``.
+        """
+        size = (self.places_in_cargo + 7) // 8
+        return base64.b64encode(bitmap.to_bytes(size, "little")).decode()
+
+    def to_dict(self, journey_id):
+        # A seat number is booked once per journey, whatever the cargo, so
+        # availability is reported per seat number as booking checks it
+        free = self.free_seats()
+        full = (1 << self.places_in_cargo) - 1
+        return {
+            "journey": journey_id,
+            "cargo_num": self.cargo_num,
+            "places_in_cargo": self.places_in_cargo,
+            "free": free.bit_count(),
+            "taken": self.encode(full & ~free),
+            "cargos": [
+                {
+                    "cargo": cargo,
+                    "booked": self.taken_count(cargo),
+                    "taken": self.encode(self.bitmaps[cargo - 1]),
+                }
+                for cargo in range(1, self.cargo_num + 1)
+            ],
+        }
+
+
+def get_seat_map(journey):
+    """Return the seat map of a journey cached for every process, building it
+    on a miss"""
+    key = seat_map_cache_key(journey.id)
+    train = journey.train
+    cached = shared_cache().get(key)
+    if cached is not None:
+        dimensions, bitmaps = cached
+        if dimensions == (train.cargo_num, train.places_in_cargo):
+            return SeatMap(train.cargo_num, train.places_in_cargo, bitmaps)
+
+    seat_map = SeatMap.for_journey(journey)
+    shared_cache().set(
+        key,
+        ((seat_map.cargo_num, seat_map.places_in_cargo), seat_map.bitmaps),
+        SEAT_MAP_CACHE_TIMEOUT,
+    )
+    return seat_map
+
+
+def invalidate_seat_map(journey_id):
+    shared_cache().delete(seat_map_cache_key(journey_id))
@@ -1,7 +1,30 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from user.serializers import UserSerializer
-from .models import Crew, Station, Route, Train, TrainType, Order, Ticket, Journey
+from .images import IMAGE_FORMATS, IMAGE_VARIANTS
+from .metrics import SEAT_CONFLICTS, TICKETS_BOOKED
+from .models import (
+    Crew,
+    Station,
+    Route,
+    Train,
+    TrainType,
+    Order,
+    Ticket,
+    Journey,
+    JourneyTemplate,
+)
+from .sales import tickets_added
+from .schedules import departure, materialize, template_conflicts
+from .seats import SeatMap, invalidate_seat_map
+from .timetable import CONFLICT_REASONS, MAX_TIMETABLE_JOURNEYS
 
 
 class CrewSerializer(serializers.ModelSerializer):
@@ -16,6 +39,14 @@ class StationSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "latitude", "longitude")
 
 
+class StationNearbySerializer(StationSerializer):
+    distance = serializers.FloatField(read_only=True, help_text="Kilometers")
+
+    class Meta:
+        model = Station
+        fields = ("id", "name", "latitude", "longitude", "distance")
+
+
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
@@ -48,32 +79,106 @@ class TrainTypeSerializer(serializers.ModelSerializer):
         fields = ("id", "name")
 
 
+@extend_schema_field(
+    {
+        "type": "object",
+        "description": "Resized copies of the image by variant name, empty until "
+        "they are made",
+        "additionalProperties": {
+            "type": "object",
+            "properties": {
+                "width": {"type": "integer"},
+                "height": {"type": "integer"},
+                "webp": {"type": "string", "format": "uri"},
+                "jpeg": {"type": "string", "format": "uri"},
+            },
+        },
+    }
+)
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs and sizes of the variants made by ``station_api.images``"""
+
+    def to_representation(self, variants):
+        request = self.context.get("request")
+        representation = {}
+        for name, _ in IMAGE_VARIANTS:
+            if name not in variants:
+                continue
+            variant = dict(variants[name])
+            for extension, _, _ in IMAGE_FORMATS:
+                url = default_storage.url(variant[extension])
+                variant[extension] = request.build_absolute_uri(url) if request else url
+            representation[name] = variant
+        return representation
+
+
 class TrainSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Train
-        fields = ("id", "name", "cargo_num", "places_in_cargo", "train_type", "image")
+        fields = (
+            "id",
+            "name",
+            "cargo_num",
+            "places_in_cargo",
+            "train_type",
+            "image",
+            "image_variants",
+        )
 
 
 class TrainListSerializer(serializers.ModelSerializer):
     train_type = serializers.StringRelatedField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Train
-        fields = ("id", "name", "cargo_num", "places_in_cargo", "train_type")
+        fields = (
+            "id",
+            "name",
+            "cargo_num",
+            "places_in_cargo",
+            "train_type",
+            "image_variants",
+        )
 
 
 class TrainDetailSerializer(serializers.ModelSerializer):
     train_type = TrainTypeSerializer()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Train
-        fields = ("id", "name", "cargo_num", "places_in_cargo", "train_type", "image")
+        fields = (
+            "id",
+            "name",
+            "cargo_num",
+            "places_in_cargo",
+            "train_type",
+            "image",
+            "image_variants",
+        )
 
 
 class JourneySerializer(serializers.ModelSerializer):
     departure_time = serializers.DateTimeField()
     arrival_time = serializers.DateTimeField()
 
+    def validate(self, attrs):
+        data = super(JourneySerializer, self).validate(attrs=attrs)
+        schedule = {
+            name: attrs[name] if name in attrs else getattr(self.instance, name)
+            for name in ("train", "departure_time", "arrival_time")
+        }
+        Journey.validate_schedule(
+            error_to_raise=ValidationError,
+            exclude_pk=self.instance.pk if self.instance else None,
+            template=self.instance.template_id if self.instance else None,
+            **schedule,
+        )
+        return data
+
     class Meta:
         model = Journey
         fields = ["id", "route", "train", "departure_time", "arrival_time"]
@@ -97,6 +202,200 @@ class JourneyDetailSerializer(serializers.ModelSerializer):
         fields = ("id", "route", "train", "departure_time", "arrival_time")
 
 
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    transfers = serializers.IntegerField()
+    journeys = JourneyListSerializer(many=True)
+
+
+class CargoSeatsSerializer(serializers.Serializer):
+    cargo = serializers.IntegerField()
+    booked = serializers.IntegerField(help_text="Tickets booked in the cargo")
+    taken = serializers.CharField(
+        help_text="Base64 bitmap of the seats booked in the cargo, seat 1 is the "
+        "lowest bit of byte 0"
+    )
+
+
+class JourneySeatMapSerializer(serializers.Serializer):
+    journey = serializers.IntegerField()
+    cargo_num = serializers.IntegerField()
+    places_in_cargo = serializers.IntegerField()
+    free = serializers.IntegerField(
+        help_text="Seat numbers left, a seat number is booked once per journey"
+    )
+    taken = serializers.CharField(
+        help_text="Base64 bitmap of the seat numbers booked in any cargo, seat 1 "
+        "is the lowest bit of byte 0"
+    )
+    cargos = CargoSeatsSerializer(many=True)
+
+
+class TimetableJourneySerializer(serializers.Serializer):
+    # Primary keys are checked in bulk by find_conflicts, not one query per row
+    route = serializers.IntegerField()
+    train = serializers.IntegerField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+
+
+class TimetableSerializer(serializers.Serializer):
+    journeys = TimetableJourneySerializer(
+        many=True, allow_empty=False, max_length=MAX_TIMETABLE_JOURNEYS
+    )
+
+
+class TimetableConflictSerializer(serializers.Serializer):
+    index = serializers.IntegerField(help_text="Position in the timetable")
+    train = serializers.IntegerField()
+    reason = serializers.ChoiceField(choices=CONFLICT_REASONS)
+    message = serializers.CharField()
+    other_index = serializers.IntegerField(
+        allow_null=True, help_text="Overlapped journey of the timetable"
+    )
+    other_journey = serializers.IntegerField(
+        allow_null=True, help_text="Overlapped stored journey"
+    )
+
+
+class TimetableReportSerializer(serializers.Serializer):
+    journeys = serializers.IntegerField()
+    valid = serializers.BooleanField()
+    conflicts = TimetableConflictSerializer(many=True)
+
+
+@extend_schema_field(
+    {"type": "array", "items": {"type": "integer", "minimum": 0, "maximum": 6}}
+)
+class WeekdaysField(serializers.Field):
+    """Weekday numbers, 0 for Monday, stored as a bitmask"""
+
+    default_error_messages = {
+        "invalid": "Expected a list of weekday numbers from 0 (Monday) to 6."
+    }
+
+    def to_representation(self, value):
+        return [day for day in range(7) if value >> day & 1]
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not all(
+            isinstance(day, int) and 0 <= day <= 6 for day in data
+        ):
+            self.fail("invalid")
+        return sum(1 << day for day in set(data))
+
+
+class JourneyTemplateSerializer(serializers.ModelSerializer):
+    weekdays = WeekdaysField()
+    exceptions = serializers.ListField(
+        child=serializers.DateField(), required=False, allow_empty=True
+    )
+
+    def validate_exceptions(self, exceptions):
+        return sorted({day.isoformat() for day in exceptions})
+
+    def validate(self, attrs):
+        data = super(JourneyTemplateSerializer, self).validate(attrs=attrs)
+        values = {
+            name: attrs[name] if name in attrs else getattr(self.instance, name)
+            for name in ("duration", "weekdays", "valid_from", "valid_until")
+        }
+        if values["duration"] <= timedelta(0):
+            raise ValidationError({"duration": "The duration must be positive"})
+        if not values["weekdays"]:
+            raise ValidationError({"weekdays": "The journey must run on some day"})
+        if values["valid_until"] < values["valid_from"]:
+            raise ValidationError(
+                {"valid_until": "The validity must end after it starts"}
+            )
+        template = JourneyTemplate(
+            pk=getattr(self.instance, "pk", None),
+            **{
+                name: attrs[name] if name in attrs else getattr(self.instance, name)
+                for name in ("route", "train", "departure_time")
+            },
+            exceptions=attrs.get(
+                "exceptions", getattr(self.instance, "exceptions", [])
+            ),
+            **values,
+        )
+        conflicts = template_conflicts(template)
+        if conflicts:
+            departure_time, other = conflicts[0]
+            departure_time = timezone.localtime(departure_time)
+            raise ValidationError(
+                {
+                    "train": f"The departure of {departure_time:%Y-%m-%d %H:%M} "
+                    f"overlaps {other}, {len(conflicts)} departures overlap in all"
+                }
+            )
+        return data
+
+    class Meta:
+        model = JourneyTemplate
+        fields = (
+            "id",
+            "route",
+            "train",
+            "departure_time",
+            "duration",
+            "weekdays",
+            "valid_from",
+            "valid_until",
+            "exceptions",
+        )
+
+
+class DepartureSerializer(serializers.Serializer):
+    id = serializers.IntegerField(
+        allow_null=True, help_text="Null until a ticket is booked on a template"
+    )
+    template = serializers.IntegerField(allow_null=True)
+    route = serializers.CharField()
+    train = serializers.CharField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+
+
+def template_departure(template, departure_time):
+    try:
+        return departure(template, departure_time)
+    except ValueError as error:
+        raise ValidationError({"departure_time": [str(error)]})
+
+
+def materialized_journey(journey):
+    """``journey``, stored first when it is an unsaved template departure"""
+    if journey.pk is not None:
+        return journey
+    try:
+        return materialize(journey.template, journey.departure_time)
+    except ValueError as error:
+        raise ValidationError({"departure_time": [str(error)]})
+
+
+def journey_key(journey):
+    # Unsaved template departures have no primary key yet
+    if journey.pk is None:
+        return ("departure", journey.template_id, journey.departure_time)
+    return journey.pk
+
+
+class JourneyReferenceMixin:
+    # Bookings name a stored journey, or a departure of a template that
+    # is materialized once the booking is accepted
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs.get("journey") is None and (
+            attrs.get("template") is None or attrs.get("departure_time") is None
+        ):
+            raise ValidationError(
+                "Either a journey or a template and a departure time is required."
+            )
+        return attrs
+
+
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
@@ -147,3 +446,266 @@ class OrderDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ("id", "created_at", "user", "tickets")
+
+
+class TicketBookingSerializer(JourneyReferenceMixin, serializers.Serializer):
+    journey = serializers.IntegerField(min_value=1, required=False)
+    template = serializers.IntegerField(min_value=1, required=False)
+    departure_time = serializers.DateTimeField(required=False)
+    cargo = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+
+class OrderBookingSerializer(serializers.Serializer):
+    tickets = TicketBookingSerializer(many=True, allow_empty=False)
+
+    @staticmethod
+    def resolve_templates(tickets):
+        """Point the tickets booked on templates to their departures"""
+        templates = JourneyTemplate.objects.select_related("train").in_bulk(
+            {ticket["template"] for ticket in tickets if "journey" not in ticket}
+        )
+        departures = {}
+        errors = []
+        for ticket in tickets:
+            error = {}
+            if "journey" not in ticket:
+                template = templates.get(ticket["template"])
+                key = (ticket["template"], ticket["departure_time"])
+                if template is None:
+                    error["template"] = [
+                        f"Invalid pk \"{ticket['template']}\" - object does not exist."
+                    ]
+                elif key in departures:
+                    ticket["journey"] = departures[key]
+                else:
+                    try:
+                        ticket["journey"] = departures[key] = template_departure(
+                            template, ticket["departure_time"]
+                        )
+                    except ValidationError as exception:
+                        error.update(exception.detail)
+            ticket.pop("template", None)
+            ticket.pop("departure_time", None)
+            errors.append(error)
+        if any(errors):
+            raise ValidationError(errors)
+
+    def validate_tickets(self, tickets):
+        """Check every requested seat against current occupancy at once"""
+        self.resolve_templates(tickets)
+        journeys = Journey.objects.select_related("train").in_bulk(
+            {
+                ticket["journey"]
+                for ticket in tickets
+                if isinstance(ticket["journey"], int)
+            }
+        )
+        resolved = [
+            (
+                ticket["journey"]
+                if isinstance(ticket["journey"], Journey)
+                else journeys.get(ticket["journey"])
+            )
+            for ticket in tickets
+        ]
+        taken = set(
+            Ticket.objects.filter(
+                journey__in={
+                    journey.pk
+                    for journey in resolved
+                    if journey is not None and journey.pk is not None
+                },
+                seat__in={ticket["seat"] for ticket in tickets},
+            )
+            .order_by()
+            .values_list("journey_id", "seat")
+        )
+
+        errors = []
+        for ticket, journey in zip(tickets, resolved):
+            error = {}
+            if journey is None:
+                error["journey"] = [
+                    f"Invalid pk \"{ticket['journey']}\" - object does not exist."
+                ]
+            else:
+                if ticket["cargo"] > journey.train.cargo_num:
+                    error["cargo"] = [
+                        f"The train has only {journey.train.cargo_num} cargos"
+                    ]
+                if ticket["seat"] > journey.train.places_in_cargo:
+                    error["seat"] = [
+                        f"The cargo has only {journey.train.places_in_cargo} seats"
+                    ]
+                elif (journey_key(journey), ticket["seat"]) in taken:
+                    error["seat"] = ["The seat is alredy taken"]
+                    SEAT_CONFLICTS.inc(source="booking")
+                taken.add((journey_key(journey), ticket["seat"]))
+                ticket["journey"] = journey
+            errors.append(error)
+
+        if any(errors):
+            raise ValidationError(errors)
+        return tickets
+
+    def create(self, validated_data):
+        tickets = validated_data["tickets"]
+        try:
+            with transaction.atomic():
+                materialized = {}
+                for ticket in tickets:
+                    key = journey_key(ticket["journey"])
+                    if key not in materialized:
+                        materialized[key] = materialized_journey(ticket["journey"])
+                    ticket["journey"] = materialized[key]
+                order = Order.objects.create(
+                    created_at=timezone.now(), user=self.context["request"].user
+                )
+                Ticket.objects.bulk_create(
+                    Ticket(order=order, **ticket) for ticket in tickets
+                )
+                # bulk_create sends no post_save for the aggregates
+                for journey, count in Counter(
+                    ticket["journey"] for ticket in tickets
+                ).items():
+                    tickets_added(journey, count)
+        except IntegrityError:
+            SEAT_CONFLICTS.inc(source="booking")
+            raise ValidationError(
+                {"tickets": ["Some of the seats were taken while booking"]}
+            )
+
+        # bulk_create sends no post_save, so the signal does not count these
+        transaction.on_commit(lambda: TICKETS_BOOKED.inc(len(tickets)))
+        for journey_id in {ticket["journey"].id for ticket in tickets}:
+            transaction.on_commit(lambda pk=journey_id: invalidate_seat_map(pk))
+        return order
+
+
+class GroupBookingSerializer(JourneyReferenceMixin, serializers.Serializer):
+    # Seat allocation is retried when a concurrent booking wins a seat
+    ALLOCATION_ATTEMPTS = 3
+
+    journey = serializers.PrimaryKeyRelatedField(
+        queryset=Journey.objects.all(), required=False
+    )
+    template = serializers.PrimaryKeyRelatedField(
+        queryset=JourneyTemplate.objects.all(), required=False
+    )
+    departure_time = serializers.DateTimeField(required=False)
+    passengers = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs.get("journey") is None:
+            attrs["journey"] = template_departure(
+                attrs["template"], attrs["departure_time"]
+            )
+        return attrs
+
+    def allocate(self, journey, passengers):
+        """Book seats picked from the current occupancy in one transaction"""
+        with transaction.atomic():
+            # Group bookings of a journey queue up on its row
+            journey = (
+                Journey.objects.select_for_update(of=("self",))
+                .select_related("train")
+                .get(pk=materialized_journey(journey).pk)
+            )
+            seat_map = SeatMap.for_journey(journey)
+            seats = seat_map.allocate(passengers)
+            if seats is None:
+                free = seat_map.free_seats().bit_count()
+                raise ValidationError(
+                    {"passengers": [f"Only {free} seats are left on the journey"]}
+                )
+            order = Order.objects.create(
+                created_at=timezone.now(), user=self.context["request"].user
+            )
+            Ticket.objects.bulk_create(
+                Ticket(order=order, journey=journey, cargo=cargo, seat=seat)
+                for cargo, seat in seats
+            )
+            tickets_added(journey, len(seats))
+        return order, journey.pk
+
+    def create(self, validated_data):
+        passengers = validated_data["passengers"]
+        for _ in range(self.ALLOCATION_ATTEMPTS):
+            try:
+                order, journey_id = self.allocate(validated_data["journey"], passengers)
+                break
+            except IntegrityError:
+                # A ticket booked outside a group booking took one of the seats
+                SEAT_CONFLICTS.inc(source="group_booking")
+        else:
+            raise ValidationError(
+                {"passengers": ["The seats were taken while booking, try again"]}
+            )
+
+        transaction.on_commit(lambda: TICKETS_BOOKED.inc(passengers))
+        transaction.on_commit(lambda: invalidate_seat_map(journey_id))
+        return order
+
+
+class SalesSerializer(serializers.Serializer):
+    """Sales totals of ``values()`` rows, plus what is derived from them"""
+
+    tickets_sold = serializers.IntegerField()
+    capacity = serializers.IntegerField()
+    seats_remaining = serializers.SerializerMethodField()
+    load_factor = serializers.SerializerMethodField()
+
+    def _totals(self, sales):
+        return (
+            self.fields["tickets_sold"].get_attribute(sales),
+            self.fields["capacity"].get_attribute(sales),
+        )
+
+    def get_seats_remaining(self, sales) -> int:
+        tickets_sold, capacity = self._totals(sales)
+        return capacity - tickets_sold
+
+    def get_load_factor(self, sales) -> float | None:
+        """Share of the seats that are sold"""
+        tickets_sold, capacity = self._totals(sales)
+        return round(tickets_sold / capacity, 4) if capacity else None
+
+
+class JourneySalesSerializer(SalesSerializer):
+    journey = serializers.IntegerField(source="journey_id")
+    route = serializers.IntegerField(source="journey__route_id")
+    departure_time = serializers.DateTimeField(source="journey__departure_time")
+
+
+class RouteSalesSerializer(SalesSerializer):
+    route = serializers.IntegerField(source="route_id")
+    source = serializers.CharField(source="route__source__name")
+    destination = serializers.CharField(source="route__destination__name")
+    journeys = serializers.IntegerField(source="total_journeys")
+    tickets_sold = serializers.IntegerField(source="total_tickets_sold")
+    capacity = serializers.IntegerField(source="total_capacity")
+
+
+class DaySalesSerializer(SalesSerializer):
+    day = serializers.DateField()
+    journeys = serializers.IntegerField(source="total_journeys")
+    tickets_sold = serializers.IntegerField(source="total_tickets_sold")
+    capacity = serializers.IntegerField(source="total_capacity")
+
+
+class ViewTimingsSerializer(serializers.Serializer):
+    view = serializers.CharField()
+    count = serializers.IntegerField()
+    total_ms = serializers.FloatField()
+    mean_ms = serializers.FloatField()
+    max_ms = serializers.FloatField()
+    mean_queries = serializers.FloatField()
+    mean_sql_ms = serializers.FloatField()
+    mean_serialize_ms = serializers.FloatField()
+    mean_render_ms = serializers.FloatField()
+    histogram = serializers.DictField(
+        child=serializers.IntegerField(),
+        help_text="Number of requests per duration bucket, le_N is at most N ms",
+    )
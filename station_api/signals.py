@@ -0,0 +1,208 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_model_version, on_change
+from .geo import update_route_distances
+from .images import schedule_variants
+from .metrics import ORDERS_CREATED, TICKETS_BOOKED
+from .models import (
+    Crew,
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    tickets_deleted,
+)
+from .planner import connection_index
+from .sales import (
+    journey_changed,
+    journey_removed,
+    journey_state,
+    tickets_added,
+    tickets_per_journey,
+    tickets_removed,
+    train_capacity_changed,
+)
+from .search import crew_search, station_search
+from .seats import invalidate_seat_map
+from .spatial import station_index
+
+
+@receiver(pre_save, sender=Ticket)
+def ticket_moving(sender, instance, **kwargs):
+    """Invalidate the previous journey when a ticket is moved to another one"""
+    if instance._state.adding:
+        return
+    previous_journey_id = (
+        Ticket.objects.filter(pk=instance.pk)
+        .values_list("journey_id", flat=True)
+        .first()
+    )
+    if previous_journey_id and previous_journey_id != instance.journey_id:
+        on_change(lambda: invalidate_seat_map(previous_journey_id))
+        instance._previous_journey_id = previous_journey_id
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_changed(sender, instance, **kwargs):
+    journey_id = instance.journey_id
+    on_change(lambda: invalidate_seat_map(journey_id))
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_created(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        tickets_added(instance.journey)
+        transaction.on_commit(TICKETS_BOOKED.inc)
+    elif getattr(instance, "_previous_journey_id", None):
+        tickets_removed(instance._previous_journey_id)
+        tickets_added(instance.journey)
+        del instance._previous_journey_id
+
+
+@receiver(tickets_deleted, sender=Ticket)
+def tickets_removed_directly(sender, counts, **kwargs):
+    for journey_id, count in counts.items():
+        on_change(lambda journey_id=journey_id: invalidate_seat_map(journey_id))
+        tickets_removed(journey_id, count)
+
+
+@receiver(pre_delete, sender=Order)
+def order_deleting(sender, instance, **kwargs):
+    """Take away the tickets of the order, they cascade without signals"""
+    tickets = Ticket.objects.filter(order=instance)
+    tickets_removed_directly(Ticket, tickets_per_journey(tickets))
+
+
+@receiver(post_save, sender=Order)
+def order_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(ORDERS_CREATED.inc)
+
+
+@receiver(pre_save, sender=Journey)
+def journey_saving(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._sales_state = (
+            None if instance._state.adding else journey_state(instance.pk)
+        )
+
+
+@receiver(post_save, sender=Journey)
+def journey_saved(sender, instance, raw=False, **kwargs):
+    journey_id = instance.pk
+    transaction.on_commit(lambda: connection_index.journey_saved(journey_id))
+    if not raw:
+        journey_changed(journey_id, instance.__dict__.pop("_sales_state", None))
+
+
+@receiver(pre_delete, sender=Journey)
+def journey_deleting(sender, instance, **kwargs):
+    journey_id = instance.pk
+    on_change(lambda: invalidate_seat_map(journey_id))
+    journey_removed(journey_state(journey_id))
+
+
+@receiver(pre_save, sender=Train)
+def train_saving(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._previous_capacity = (
+            Train.objects.filter(pk=instance.pk)
+            .values_list("cargo_num", "places_in_cargo")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Train)
+def train_saved(sender, instance, raw=False, **kwargs):
+    previous = instance.__dict__.pop("_previous_capacity", None)
+    if previous is not None:
+        train_capacity_changed(
+            instance.pk,
+            instance.cargo_num * instance.places_in_cargo - previous[0] * previous[1],
+        )
+    if not raw and (instance.image.name or "") != instance.image_variants.get(
+        "source", ""
+    ):
+        schedule_variants(instance)
+
+
+@receiver(post_delete, sender=Journey)
+def journey_deleted(sender, instance, **kwargs):
+    journey_id = instance.pk
+    transaction.on_commit(lambda: connection_index.journey_deleted(journey_id))
+
+
+@receiver(post_save, sender=Route)
+def route_saved(sender, instance, created, raw=False, **kwargs):
+    if not created:
+        transaction.on_commit(connection_index.invalidate)
+    if raw:
+        # loaddata skips Route.save, which computes the distance
+        update_route_distances(Route.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_save, sender=Station)
+def station_saving(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._previous_location = (
+            Station.objects.filter(pk=instance.pk)
+            .values_list("latitude", "longitude")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Station)
+def station_saved(sender, instance, created, raw=False, **kwargs):
+    """Keep the stored distance of the station's routes in sync"""
+    transaction.on_commit(station_index.invalidate)
+    previous = instance.__dict__.pop("_previous_location", None)
+    moved = previous is not None and previous != (
+        instance.latitude,
+        instance.longitude,
+    )
+    # Fixtures may list routes before the stations they join
+    if raw or moved:
+        update_route_distances(
+            Route.objects.filter(Q(source=instance) | Q(destination=instance))
+        )
+
+
+@receiver(post_delete, sender=Station)
+def station_deleted(sender, instance, **kwargs):
+    transaction.on_commit(station_index.invalidate)
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_save, sender=Crew)
+def name_saved(sender, instance, **kwargs):
+    """Index the names of stations and crew for the search endpoints"""
+    (station_search if sender is Station else crew_search).add(instance)
+
+
+@receiver(post_delete, sender=Station)
+@receiver(post_delete, sender=Crew)
+def name_deleted(sender, instance, **kwargs):
+    (station_search if sender is Station else crew_search).remove(instance.pk)
+
+
+@receiver(post_save, sender=Crew)
+@receiver(post_delete, sender=Crew)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+@receiver(post_save, sender=Train)
+@receiver(post_delete, sender=Train)
+@receiver(post_save, sender=TrainType)
+@receiver(post_delete, sender=TrainType)
+def catalog_changed(sender, instance, **kwargs):
+    """Invalidate the cached responses that depend on the changed model"""
+    on_change(lambda: bump_model_version(sender))
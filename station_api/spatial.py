@@ -0,0 +1,118 @@
+"""In-memory nearest-station index.
+
+Stations are stored as unit vectors sorted by latitude. A query with a radius
+only looks at the latitude band that can contain matches; the candidates are
+then ranked by chord length with a single vectorized dot product.
+"""
+
+import threading
+import uuid
+
+import numpy as np
+
+from .caching import shared_cache
+from .geo import geodesic_distances
+from .models import Station
+
+STATIONS_VERSION_KEY = "station_api:stations-version"
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _unit_vectors(latitudes, longitudes):
+    lat, lon = np.radians(latitudes), np.radians(longitudes)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+class StationIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._latitudes = np.empty(0)
+        self._longitudes = np.empty(0)
+        self._vectors = np.empty((0, 3))
+
+    @staticmethod
+    def _shared_version():
+        version = shared_cache().get(STATIONS_VERSION_KEY)
+        if version is None:
+            shared_cache().add(STATIONS_VERSION_KEY, uuid.uuid4().hex, None)
+            version = shared_cache().get(STATIONS_VERSION_KEY)
+        return version
+
+    def invalidate(self):
+        """Make every process rebuild its index on the next query"""
+        shared_cache().set(STATIONS_VERSION_KEY, uuid.uuid4().hex, None)
+        self._version = None
+
+    def _ensure_fresh(self):
+        version = self._shared_version()
+        with self._lock:
+            if self._version == version:
+                return
+            rows = np.array(
+                Station.objects.order_by("latitude").values_list(
+                    "id", "latitude", "longitude"
+                ),
+                dtype=float,
+            ).reshape(-1, 3)
+            self._ids = rows[:, 0].astype(np.int64)
+            self._latitudes = rows[:, 1]
+            self._longitudes = rows[:, 2]
+            self._vectors = _unit_vectors(self._latitudes, self._longitudes)
+            self._version = version
+
+    def nearest(self, latitude, longitude, k=10, radius_km=None):
+        """Return ``(station_id, distance_km)`` pairs, nearest first"""
+        self._ensure_fresh()
+        ids, latitudes, longitudes, vectors = (
+            self._ids,
+            self._latitudes,
+            self._longitudes,
+            self._vectors,
+        )
+        if radius_km is not None:
+            band = np.degrees(radius_km / EARTH_RADIUS_KM) * 1.01
+            start, stop = np.searchsorted(
+                latitudes, (latitude - band, latitude + band), side="left"
+            )
+            ids, latitudes, longitudes, vectors = (
+                ids[start:stop],
+                latitudes[start:stop],
+                longitudes[start:stop],
+                vectors[start:stop],
+            )
+        if not ids.size:
+            return []
+
+        # Higher dot product means a shorter chord, and a shorter arc
+        similarity = vectors @ _unit_vectors(latitude, longitude)[0]
+        if radius_km is not None:
+            within = similarity >= np.cos(radius_km * 1.01 / EARTH_RADIUS_KM)
+            ids, latitudes, longitudes, similarity = (
+                ids[within],
+                latitudes[within],
+                longitudes[within],
+                similarity[within],
+            )
+        if k < ids.size:
+            candidates = np.argpartition(-similarity, k)[:k]
+        else:
+            candidates = np.arange(ids.size)
+
+        distances = geodesic_distances(
+            np.full(candidates.size, latitude),
+            np.full(candidates.size, longitude),
+            latitudes[candidates],
+            longitudes[candidates],
+        )
+        results = sorted(zip(distances.tolist(), ids[candidates].tolist()))
+        return [
+            (station_id, distance)
+            for distance, station_id in results
+            if radius_km is None or distance <= radius_km
+        ]
+
+
+station_index = StationIndex()
@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from station_api.async_views import AsyncViewSetView
+from station_api.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from station_api.views import StationViewSet
+from train_station.asgi import application
+
+
+@override_settings(ROOT_URLCONF="train_station.asgi_urls")
+class AsyncViewTests(APITestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.token = Token.objects.create(user=self.admin_user)
+        self.headers = {"Authorization": f"Token {self.token.key}"}
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+        self.station_a = Station.objects.create(
+            name="Station A", latitude=40.7128, longitude=-74.0060
+        )
+        self.station_b = Station.objects.create(
+            name="Station B", latitude=34.0522, longitude=-118.2437
+        )
+        route = Route.objects.create(source=self.station_a, destination=self.station_b)
+        self.train = Train.objects.create(
+            name="Train 101",
+            cargo_num=2,
+            places_in_cargo=10,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        departure = timezone.now().replace(microsecond=0)
+        self.journeys = [
+            Journey.objects.create(
+                route=route,
+                train=self.train,
+                departure_time=departure + timedelta(hours=hours),
+                arrival_time=departure + timedelta(hours=hours + 5),
+            )
+            for hours in range(3)
+        ]
+        Ticket.objects.create(
+            cargo=2,
+            seat=3,
+            journey=self.journeys[0],
+            order=Order.objects.create(created_at=departure, user=self.admin_user),
+        )
+
+    async def test_journey_list_matches_sync_view(self):
+        url = reverse("station:journey-list")
+        params = {"from": self.station_a.id, "page_size": 2}
+
+        response = await self.async_client.get(url, params, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.json()["next"])
+        self.assertEqual(response.json(), (await self.sync_get(url, params)).json())
+
+        response = await self.async_client.get(
+            response.json()["next"], headers=self.headers
+        )
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    async def test_journey_list_validates_filters(self):
+        response = await self.async_client.get(
+            reverse("station:journey-list"), {"date": "bad"}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date", response.json())
+
+    async def test_authentication_required(self):
+        response = await self.async_client.get(reverse("station:journey-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_journey_seats(self):
+        url = reverse("station:journey-seats", args=[self.journeys[0].id])
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # One of the 10 seat numbers is booked
+        self.assertEqual(response.json()["free"], 9)
+        self.assertEqual(response.json(), (await self.sync_get(url)).json())
+
+        response = await self.async_client.get(
+            reverse("station:journey-seats", args=[0]), headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_station_list_conditional_get(self):
+        url = reverse("station:station-list")
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        response = await self.async_client.get(
+            url, headers={**self.headers, "If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_other_methods_use_the_sync_viewset(self):
+        response = self.client.post(
+            reverse("station:station-list"),
+            {"name": "Station C", "latitude": 50.45, "longitude": 30.52},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(
+            reverse("station:station-list"), HTTP_ACCEPT="text/html"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/html; charset=utf-8")
+
+    def test_views_must_implement_read(self):
+        class View(AsyncViewSetView):
+            viewset_class = StationViewSet
+            actions = {"get": "list"}
+
+        with self.assertRaises(TypeError):
+            View()
+
+    async def sync_get(self, url, params=None):
+        with override_settings(ROOT_URLCONF="train_station.urls"):
+            return await self.async_client.get(url, params, headers=self.headers)
+
+
+class ASGIApplicationTests(APITestCase):
+    def test_application_serves_async_views(self):
+        request = application.create_request(
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/api/station/journeys/",
+                "query_string": b"",
+                "headers": [],
+            },
+            None,
+        )[0]
+        self.assertEqual(request.urlconf, "train_station.asgi_urls")
@@ -0,0 +1,74 @@
+import contextlib
+import io
+import json
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase
+
+from station_api.benchmarking import seed, summarize
+from station_api.models import Journey, Order, Route, Station, Ticket
+from station_api.urls import router
+
+
+class SeedTests(TestCase):
+    def test_seed_counts(self):
+        counts = {
+            "crews": 2,
+            "stations": 5,
+            "routes": 10,
+            "train_types": 2,
+            "trains": 3,
+            "journeys": 20,
+            "users": 4,
+            "orders": 8,
+            "tickets": 100,
+        }
+
+        self.assertEqual(seed(counts), counts)
+
+        self.assertEqual(Station.objects.count(), 5)
+        self.assertEqual(Journey.objects.count(), 20)
+        self.assertEqual(Order.objects.count(), 8)
+        self.assertEqual(Ticket.objects.count(), 100)
+        self.assertFalse(Route.objects.filter(distance__isnull=True).exists())
+
+    def test_seed_requires_related_rows(self):
+        with self.assertRaises(ValidationError):
+            seed({"orders": 0, "tickets": 10})
+
+    def test_summarize(self):
+        summary = summarize([index / 1000 for index in range(1, 101)])
+
+        self.assertEqual(summary["p50"], 50.5)
+        self.assertEqual(summary["p95"], 95)
+        self.assertEqual(summary["p99"], 99)
+        self.assertEqual(summary["max"], 100)
+
+
+class BenchmarkApiTests(TestCase):
+    def test_every_endpoint_answers(self):
+        output = io.StringIO()
+        # The test database is already there, the command must not replace it
+        with mock.patch(
+            "station_api.management.commands.benchmark_api.test_database",
+            contextlib.nullcontext,
+        ):
+            call_command("benchmark_api", scale=0.2, repeat=1, stdout=output)
+
+        endpoints = json.loads(output.getvalue())["endpoints"]
+        for prefix, viewset, basename in router.registry:
+            for extra_action in viewset.get_extra_actions():
+                self.assertIn(f"{prefix}-{extra_action.url_name}", endpoints)
+        self.assertIn("timings", endpoints)
+        self.assertNotIn("sales-list", endpoints)
+        self.assertEqual(set(endpoints["orders-export"]["queries"]), {"p50", "max"})
+        self.assertEqual(
+            {
+                name: result["status"]
+                for name, result in endpoints.items()
+                if result["status"] >= 400
+            },
+            {},
+        )
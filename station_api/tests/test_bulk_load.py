@@ -0,0 +1,98 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from station_api import bulk_load
+from station_api.models import Journey, Order, Route, Station, Ticket
+
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "train_station_service_db_data.json"
+)
+
+
+class BulkLoadTests(TestCase):
+    def write_fixture(self, objects, suffix=".json"):
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False, encoding="utf-8"
+        )
+        with file:
+            if suffix == ".jsonl":
+                file.writelines(json.dumps(obj) + "\n" for obj in objects)
+            else:
+                json.dump(objects, file, indent=4)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def ticket_fixture(self, seats):
+        with open(FIXTURE) as file:
+            objects = [
+                obj for obj in json.load(file) if obj["model"] != "station_api.ticket"
+            ]
+        return objects + [
+            {
+                "model": "station_api.ticket",
+                "pk": pk,
+                "fields": {"cargo": 1, "seat": seat, "journey": 1, "order": 1},
+            }
+            for pk, seat in enumerate(seats, start=1)
+        ]
+
+    def test_load_project_fixture(self):
+        out = io.StringIO()
+        call_command("bulk_loaddata", FIXTURE, "--batch-size", "2", stdout=out)
+
+        self.assertIn("Loaded 27 objects", out.getvalue())
+        self.assertEqual(Ticket.objects.count(), 3)
+        # Orders come before their users in the file
+        self.assertEqual(Order.objects.get(pk=1).user.email, "user1@example.com")
+        self.assertFalse(Route.objects.filter(distance__isnull=True).exists())
+        self.assertEqual(Journey.objects.get(pk=1).route.source.name, "Central Station")
+
+    def test_load_json_lines(self):
+        with open(FIXTURE) as file:
+            path = self.write_fixture(json.load(file), suffix=".jsonl")
+        call_command("bulk_loaddata", path, stdout=io.StringIO())
+        self.assertEqual(Station.objects.count(), 3)
+        self.assertEqual(get_user_model().objects.count(), 3)
+
+    def test_parse_in_small_reads(self):
+        with mock.patch.object(bulk_load, "READ_SIZE", 7), open(FIXTURE) as file:
+            objects = list(bulk_load.iter_json_array(file))
+        with open(FIXTURE) as file:
+            self.assertEqual(objects, json.load(file))
+
+    def test_duplicate_seats_load_nothing(self):
+        for batch_size in ("2", "100"):
+            path = self.write_fixture(self.ticket_fixture([1, 2, 3, 2]))
+            with self.assertRaisesMessage(CommandError, "journey 1 seat 2"):
+                call_command(
+                    "bulk_loaddata",
+                    path,
+                    "--batch-size",
+                    batch_size,
+                    stdout=io.StringIO(),
+                )
+            self.assertFalse(Station.objects.exists())
+
+    def test_broken_foreign_key_loads_nothing(self):
+        objects = self.ticket_fixture([1])
+        objects[-1]["fields"]["journey"] = 999
+        with self.assertRaises(CommandError):
+            call_command(
+                "bulk_loaddata", self.write_fixture(objects), stdout=io.StringIO()
+            )
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_dependency_order(self):
+        User = get_user_model()
+        self.assertEqual(
+            bulk_load.dependency_order([Ticket, Order, User, Journey, Route, Station]),
+            [Station, Route, Journey, User, Order, Ticket],
+        )
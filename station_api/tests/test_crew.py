@@ -26,9 +26,9 @@ class CrewTests(APITestCase):
         """Test listing crew members"""
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
-        self.assertEqual(len(response.data), 1)
-        crew_data = response.data[0]
+        self.assertIsInstance(response.data["results"], list)
+        self.assertEqual(len(response.data["results"]), 1)
+        crew_data = response.data["results"][0]
         self.assertEqual(crew_data["first_name"], self.crew.first_name)
         self.assertEqual(crew_data["last_name"], self.crew.last_name)
 
@@ -56,3 +56,23 @@ class CrewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_crew(self):
+        """Test prefix search over first and last names"""
+        jane = Crew.objects.create(first_name="Jane", last_name="Dowson")
+        Crew.objects.create(first_name="Mark", last_name="Johnson")
+        url = reverse("station:crew-search")
+
+        response = self.client.get(url, {"q": "do"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Shortest names first
+        self.assertEqual(
+            [crew["id"] for crew in response.data], [self.crew.id, jane.id]
+        )
+        response = self.client.get(url, {"q": "ja dow"})
+        self.assertEqual(
+            response.data,
+            [{"id": jane.id, "first_name": "Jane", "last_name": "Dowson"}],
+        )
+        response = self.client.get(url, {"q": "!!"})
+        self.assertEqual(response.data, [])
@@ -0,0 +1,120 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.serializers import BaseSerializer, ListSerializer, Serializer
+from rest_framework.test import APITestCase
+
+from station_api.benchmarking import seed
+from station_api.tests.utils import throttling_disabled
+from station_api.instrumentation import request_timings
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        seed({"journeys": 20, "tickets": 10})
+        self.admin_user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.token = Token.objects.create(user=self.admin_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.enterContext(throttling_disabled())
+        request_timings.reset()
+        self.addCleanup(request_timings.reset)
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("station:journey-list"))
+
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(set(metrics), {"db", "serialize", "render", "total"})
+        self.assertEqual(metrics["db"]["desc"], f'"{len(queries)} queries"')
+        for metric in metrics.values():
+            self.assertGreaterEqual(float(metric["dur"]), 0)
+        self.assertGreater(float(metrics["serialize"]["dur"]), 0)
+        self.assertGreater(float(metrics["render"]["dur"]), 0)
+
+    def test_serializers_are_timed_by_the_views(self):
+        response = self.client.get(reverse("station:train-list"))
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertGreater(float(metrics["serialize"]["dur"]), 0)
+
+        # Serializers used outside of the API views are left alone
+        for serializer_class in (BaseSerializer, Serializer, ListSerializer):
+            self.assertEqual(
+                serializer_class.data.fget.__module__, "rest_framework.serializers"
+            )
+
+    def test_only_api_requests_are_timed(self):
+        response = self.client.get(reverse("schema"))
+
+        self.assertNotIn("Server-Timing", response)
+
+    def test_timings_per_view_action(self):
+        for _ in range(3):
+            self.client.get(reverse("station:journey-list"))
+        self.client.get(reverse("station:station-detail", args=[1]))
+        self.client.get(reverse("user:manage"))
+
+        response = self.client.get(reverse("station:timings"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        views = {view["view"]: view for view in response.data}
+        self.assertEqual(
+            set(views),
+            {"JourneyViewSet.list", "StationViewSet.retrieve", "ManageUserView.get"},
+        )
+        journeys = views["JourneyViewSet.list"]
+        self.assertEqual(journeys["count"], 3)
+        self.assertEqual(sum(journeys["histogram"].values()), 3)
+        self.assertGreater(journeys["mean_queries"], 0)
+
+    def test_reset_timings(self):
+        self.client.get(reverse("station:journey-list"))
+
+        response = self.client.delete(reverse("station:timings"))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        # Only the reset itself is left
+        self.assertEqual(
+            [view["view"] for view in request_timings.snapshot()],
+            ["RequestTimingsView.delete"],
+        )
+
+    def test_timings_are_staff_only(self):
+        user = get_user_model().objects.create_user("user@myproject.com", "password")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+
+        response = self.client.get(reverse("station:timings"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(ROOT_URLCONF="train_station.asgi_urls")
+    async def test_async_views_are_timed(self):
+        response = await self.async_client.get(
+            reverse("station-async:journey-list"),
+            headers={"Authorization": f"Token {self.token.key}"},
+        )
+
+        self.assertTrue(
+            re.match(r'db;dur=[\d.]+;desc="\d+ queries"', response["Server-Timing"])
+        )
+        self.assertEqual(
+            [view["view"] for view in request_timings.snapshot()],
+            ["JourneyViewSet.list"],
+        )
@@ -1,9 +1,23 @@
+import base64
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from station_api.models import Journey, Route, Train, Station, TrainType
+from station_api.tests.utils import throttling_disabled
+from station_api.caching import shared_cache
+from station_api.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from station_api.seats import seat_map_cache_key
 from datetime import datetime, timedelta
 
 
@@ -51,11 +65,13 @@ class JourneyTests(APITestCase):
         self.url = reverse("station:journey-list")
 
     def test_create_journey(self):
+        departure_time = self.departure_time + timedelta(days=1)
+        arrival_time = self.arrival_time + timedelta(days=1)
         payload = {
             "route": self.route.id,
             "train": self.train.id,
-            "departure_time": self.departure_time.isoformat(),  # ISO формат времени
-            "arrival_time": self.arrival_time.isoformat(),  # ISO формат времени
+            "departure_time": departure_time.isoformat(),  # ISO формат времени
+            "arrival_time": arrival_time.isoformat(),  # ISO формат времени
         }
         response = self.client.post(self.url, payload, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -74,9 +90,9 @@ class JourneyTests(APITestCase):
     def test_list_journey(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
-        self.assertEqual(len(response.data), 1)
-        journey_data = response.data[0]
+        self.assertIsInstance(response.data["results"], list)
+        self.assertEqual(len(response.data["results"]), 1)
+        journey_data = response.data["results"][0]
         self.assertEqual(journey_data["route"], str(self.route))
         self.assertEqual(journey_data["train"], self.train.name)
         self.assertEqual(
@@ -125,9 +141,210 @@ class JourneyTests(APITestCase):
             payload["arrival_time"],
         )
 
+    def test_create_journey_schedule_conflicts(self):
+        """Test the train can't be on two journeys at once"""
+        payload = {
+            "route": self.route.id,
+            "train": self.train.id,
+            "departure_time": (self.arrival_time - timedelta(hours=1)).isoformat(),
+            "arrival_time": (self.arrival_time + timedelta(hours=4)).isoformat(),
+        }
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["train"][0],
+            f"The train is already on journey {self.journey.id} at that time",
+        )
+
+        payload["departure_time"] = self.arrival_time.isoformat()
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        url = reverse("station:journey-detail", kwargs={"pk": self.journey.id})
+        response = self.client.patch(
+            url, {"arrival_time": self.departure_time.isoformat()}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("arrival_time", response.data)
+        response = self.client.patch(
+            url,
+            {"arrival_time": (self.arrival_time + timedelta(hours=1)).isoformat()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("train", response.data)
+
+    def test_validate_timetable(self):
+        """Test every conflict of a timetable is reported at once"""
+        other_train = Train.objects.create(
+            name="Train 202",
+            cargo_num=10,
+            places_in_cargo=100,
+            train_type=self.train_type,
+        )
+
+        def proposed(train, start, hours, route=None):
+            departure_time = self.departure_time + timedelta(hours=start)
+            return {
+                "route": self.route.id if route is None else route,
+                "train": train,
+                "departure_time": departure_time.isoformat(),
+                "arrival_time": (departure_time + timedelta(hours=hours)).isoformat(),
+            }
+
+        timetable = [
+            proposed(self.train.id, 4, 2),  # overlaps the stored journey
+            proposed(self.train.id, 5, 0),  # arrives when it departs
+            proposed(other_train.id, 0, 10),
+            proposed(other_train.id, 12, 1),
+            proposed(other_train.id, 9, 2),  # overlaps the 0 to 10 one
+            proposed(other_train.id, 20, 1, route=0),
+            proposed(0, 0, 1),
+        ]
+        url = reverse("station:journey-validate-timetable")
+        with throttling_disabled(), self.assertNumQueries(3):
+            response = self.client.post(url, {"journeys": timetable}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["journeys"], 7)
+        self.assertFalse(response.data["valid"])
+        self.assertEqual(
+            [
+                (
+                    conflict["index"],
+                    conflict["reason"],
+                    conflict["other_index"],
+                    conflict["other_journey"],
+                )
+                for conflict in response.data["conflicts"]
+            ],
+            [
+                (0, "overlap", None, self.journey.id),
+                (1, "arrival_before_departure", None, None),
+                (4, "overlap", 2, None),
+                (5, "unknown_route", None, None),
+                (6, "unknown_train", None, None),
+            ],
+        )
+
+        response = self.client.post(url, {"journeys": timetable[2:4]}, format="json")
+        self.assertEqual(response.data, {"journeys": 2, "valid": True, "conflicts": []})
+
+    def test_validate_timetable_is_staff_only(self):
+        user = get_user_model().objects.create_user("user@myproject.com", "password")
+        self.client.force_authenticate(user)
+        response = self.client.post(
+            reverse("station:journey-validate-timetable"),
+            {"journeys": []},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_delete_journey(self):
         url = reverse("station:journey-detail", kwargs={"pk": self.journey.id})
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_seat_map(self):
+        cache.clear()
+        order = Order.objects.create(
+            created_at=self.departure_time, user=self.admin_user
+        )
+        Ticket.objects.create(cargo=1, seat=1, journey=self.journey, order=order)
+        Ticket.objects.create(cargo=2, seat=10, journey=self.journey, order=order)
+        url = reverse("station:journey-seats", kwargs={"pk": self.journey.id})
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["cargo_num"], 10)
+        self.assertEqual(response.data["places_in_cargo"], 100)
+        # Seat 1 and seat 10 are booked for the whole journey
+        self.assertEqual(response.data["free"], 98)
+        taken = base64.b64decode(response.data["taken"])
+        self.assertEqual((taken[0], taken[1]), (0b1, 0b10))
+        self.assertEqual(len(response.data["cargos"]), 10)
+        first, second = response.data["cargos"][:2]
+        self.assertEqual((first["booked"], second["booked"]), (1, 1))
+        self.assertEqual(base64.b64decode(first["taken"])[0], 0b1)
+        self.assertEqual(base64.b64decode(second["taken"])[1], 0b10)
+
+        # Every seat number reported free can be booked
+        response = self.client.post(
+            reverse("station:order-book"),
+            {"tickets": [{"journey": self.journey.id, "cargo": 3, "seat": 10}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seat_map_is_invalidated_by_tickets(self):
+        cache.clear()
+        order = Order.objects.create(
+            created_at=self.departure_time, user=self.admin_user
+        )
+        url = reverse("station:journey-seats", kwargs={"pk": self.journey.id})
+        self.assertEqual(self.client.get(url).data["free"], 100)
+
+        # The journey and the cached map, no ticket query
+        with throttling_disabled(), self.assertNumQueries(2):
+            self.client.get(url)
+
+        ticket = Ticket.objects.create(
+            cargo=3, seat=5, journey=self.journey, order=order
+        )
+        self.assertEqual(self.client.get(url).data["free"], 99)
+
+        ticket.delete()
+        self.assertEqual(self.client.get(url).data["free"], 100)
+
+    def test_seat_map_cached_before_commit_is_invalidated(self):
+        order = Order.objects.create(
+            created_at=self.departure_time, user=self.admin_user
+        )
+        ticket = Ticket.objects.create(
+            cargo=3, seat=5, journey=self.journey, order=order
+        )
+        url = reverse("station:journey-seats", kwargs={"pk": self.journey.id})
+        self.assertEqual(self.client.get(url).data["free"], 99)
+        key = seat_map_cache_key(self.journey.id)
+        stale = shared_cache().get(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+            # A reader that did not see the delete yet caches the old map
+            shared_cache().set(key, stale)
+
+        self.assertEqual(self.client.get(url).data["free"], 100)
+
+    def test_filter_journeys(self):
+        station_c = Station.objects.create(
+            name="Station C", latitude=50.4501, longitude=30.5234
+        )
+        other_route = Route.objects.create(source=self.station_b, destination=station_c)
+        next_day = Journey.objects.create(
+            route=other_route,
+            train=self.train,
+            departure_time=self.departure_time + timedelta(days=1),
+            arrival_time=self.arrival_time + timedelta(days=1),
+        )
+
+        def ids(**params):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [journey["id"] for journey in response.data["results"]]
+
+        self.assertEqual(ids(**{"from": self.station_a.id}), [self.journey.id])
+        self.assertEqual(ids(to=station_c.id), [next_day.id])
+        self.assertEqual(ids(date="2024-07-28"), [next_day.id])
+        self.assertEqual(ids(departure_after="2024-07-27T09:00:00"), [next_day.id])
+        self.assertEqual(ids(departure_before="2024-07-27T09:00:00"), [self.journey.id])
+        self.assertEqual(
+            ids(**{"from": self.station_b.id, "to": self.station_a.id}), []
+        )
+
+    def test_filter_journeys_invalid_params(self):
+        for params in ({"from": "abc"}, {"date": "2024-13-01"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
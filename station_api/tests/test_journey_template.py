@@ -0,0 +1,321 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station_api.tests.utils import throttling_disabled
+from station_api.models import (
+    Journey,
+    JourneyTemplate,
+    Route,
+    Station,
+    Train,
+    TrainType,
+)
+from station_api.schedules import materialize
+
+
+class JourneyTemplateTests(APITestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.admin_user)
+        self.enterContext(throttling_disabled())
+
+        station_a = Station.objects.create(
+            name="Station A", latitude=40.7128, longitude=-74.0060
+        )
+        station_b = Station.objects.create(
+            name="Station B", latitude=34.0522, longitude=-118.2437
+        )
+        self.route = Route.objects.create(source=station_a, destination=station_b)
+        self.other_route = Route.objects.create(source=station_b, destination=station_a)
+        self.train = Train.objects.create(
+            name="Train 101",
+            cargo_num=2,
+            places_in_cargo=10,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        # Weekdays only, 2024-07-29 is a Monday
+        self.template = JourneyTemplate.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=time(8),
+            duration=timedelta(hours=5),
+            weekdays=0b11111,
+            valid_from=date(2024, 7, 29),
+            valid_until=date(2024, 8, 31),
+            exceptions=["2024-07-31"],
+        )
+        self.journey = Journey.objects.create(
+            route=self.other_route,
+            train=self.train,
+            departure_time=self.at(2024, 7, 29, 16),
+            arrival_time=self.at(2024, 7, 29, 21),
+        )
+        self.url = reverse("station:journey-departures")
+
+    @staticmethod
+    def at(*args):
+        return timezone.make_aware(datetime(*args))
+
+    def departures(self, **params):
+        params.setdefault("departure_after", "2024-07-29T00:00:00Z")
+        params.setdefault("departure_before", "2024-08-05T00:00:00Z")
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (row["id"], row["template"], row["departure_time"]) for row in response.data
+        ]
+
+    def test_create_template(self):
+        url = reverse("station:journeytemplate-list")
+        payload = {
+            "route": self.route.id,
+            "train": self.train.id,
+            "departure_time": "22:30",
+            "duration": "08:00:00",
+            "weekdays": [4, 5],
+            "valid_from": "2024-07-01",
+            "valid_until": "2024-12-31",
+            "exceptions": ["2024-12-27", "2024-07-05", "2024-12-27"],
+        }
+        response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["weekdays"], [4, 5])
+        self.assertEqual(response.data["exceptions"], ["2024-07-05", "2024-12-27"])
+        self.assertEqual(
+            JourneyTemplate.objects.get(pk=response.data["id"]).weekdays, 48
+        )
+
+        for field, value in (
+            ("weekdays", []),
+            ("weekdays", [7]),
+            ("duration", "00:00:00"),
+            ("valid_until", "2024-06-30"),
+        ):
+            response = self.client.post(url, {**payload, field: value}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(field, response.data)
+
+    def test_departures_merge_templates_and_journeys(self):
+        self.assertEqual(
+            self.departures(),
+            [
+                (None, self.template.id, "2024-07-29T08:00:00Z"),
+                (self.journey.id, None, "2024-07-29T16:00:00Z"),
+                (None, self.template.id, "2024-07-30T08:00:00Z"),
+                (None, self.template.id, "2024-08-01T08:00:00Z"),
+                (None, self.template.id, "2024-08-02T08:00:00Z"),
+            ],
+        )
+        self.assertEqual(
+            self.departures(limit=2, **{"from": self.route.source_id}),
+            [
+                (None, self.template.id, "2024-07-29T08:00:00Z"),
+                (None, self.template.id, "2024-07-30T08:00:00Z"),
+            ],
+        )
+        self.assertEqual(
+            self.departures(to=self.route.source_id),
+            [(self.journey.id, None, "2024-07-29T16:00:00Z")],
+        )
+
+    def test_departures_invalid_params(self):
+        for params in (
+            {"departure_after": "x"},
+            {
+                "departure_after": "2024-07-29T00:00:00Z",
+                "departure_before": "2024-09-29T00:00:00Z",
+            },
+            {"limit": 0},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_booking_materializes_the_departure_once(self):
+        book = reverse("station:order-book")
+        ticket = {
+            "template": self.template.id,
+            "departure_time": "2024-07-30T08:00:00Z",
+            "cargo": 1,
+            "seat": 1,
+        }
+        response = self.client.post(book, {"tickets": [ticket]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        journey = Journey.objects.get(template=self.template)
+        self.assertEqual(journey.arrival_time, self.at(2024, 7, 30, 13))
+        self.assertEqual(response.data["tickets"][0]["journey"], journey.id)
+
+        response = self.client.post(
+            book, {"tickets": [{**ticket, "seat": 2}]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(
+            reverse("station:order-book-group"),
+            {
+                "template": self.template.id,
+                "departure_time": "2024-07-30T08:00:00Z",
+                "passengers": 2,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(journey.ticket_set.count(), 4)
+        self.assertIn(
+            (journey.id, self.template.id, "2024-07-30T08:00:00Z"),
+            self.departures(),
+        )
+        self.assertEqual(len(self.departures()), 5)
+
+    def test_booking_needs_a_departure_of_the_template(self):
+        book = reverse("station:order-book")
+        for departure_time in ("2024-07-31T08:00:00Z", "2024-07-30T09:00:00Z"):
+            ticket = {
+                "template": self.template.id,
+                "departure_time": departure_time,
+                "cargo": 1,
+                "seat": 1,
+            }
+            response = self.client.post(book, {"tickets": [ticket]}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("departure_time", response.data["tickets"][0])
+
+        response = self.client.post(
+            book,
+            {"tickets": [{"template": self.template.id, "cargo": 1, "seat": 1}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Journey.objects.filter(template=self.template).exists())
+
+    def test_rejected_booking_materializes_nothing(self):
+        response = self.client.post(
+            reverse("station:order-book"),
+            {
+                "tickets": [
+                    {
+                        "template": self.template.id,
+                        "departure_time": "2024-07-30T08:00:00Z",
+                        "cargo": 3,
+                        "seat": 1,
+                    }
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cargo", response.data["tickets"][0])
+
+        response = self.client.post(
+            reverse("station:order-book-group"),
+            {
+                "template": self.template.id,
+                "departure_time": "2024-07-30T08:00:00Z",
+                "passengers": 21,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("passengers", response.data)
+        self.assertFalse(Journey.objects.filter(template=self.template).exists())
+
+    def test_departure_overlapping_a_stored_journey(self):
+        blocking = Journey.objects.create(
+            route=self.other_route,
+            train=self.train,
+            departure_time=self.at(2024, 7, 30, 6),
+            arrival_time=self.at(2024, 7, 30, 9),
+        )
+        response = self.client.post(
+            reverse("station:order-book-group"),
+            {
+                "template": self.template.id,
+                "departure_time": "2024-07-30T08:00:00Z",
+                "passengers": 1,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(blocking.id), response.data["departure_time"][0])
+        self.assertFalse(Journey.objects.filter(template=self.template).exists())
+
+    def test_journey_overlapping_a_template_departure(self):
+        url = reverse("station:journey-list")
+        payload = {
+            "route": self.other_route.id,
+            "train": self.train.id,
+            "departure_time": "2024-07-30T12:00:00Z",
+            "arrival_time": "2024-07-30T14:00:00Z",
+        }
+        # The departure of 2024-07-30 08:00 is not stored yet
+        response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"template {self.template.id}", response.data["train"][0])
+
+        journey = materialize(self.template, self.at(2024, 7, 30, 8))
+        response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"journey {journey.id}", response.data["train"][0])
+
+        # The template does not run on its exception dates
+        response = self.client.post(
+            url,
+            {
+                **payload,
+                "departure_time": "2024-07-31T12:00:00Z",
+                "arrival_time": "2024-07-31T14:00:00Z",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # A materialized departure can still be moved within its own slot
+        response = self.client.patch(
+            reverse("station:journey-detail", args=[journey.id]),
+            {"arrival_time": "2024-07-30T12:30:00Z"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_template_overlapping_the_train_schedule(self):
+        url = reverse("station:journeytemplate-list")
+        payload = {
+            "route": self.other_route.id,
+            "train": self.train.id,
+            "departure_time": "15:00",
+            "duration": "02:00:00",
+            "weekdays": [0],
+            "valid_from": "2024-07-29",
+            "valid_until": "2024-08-31",
+        }
+        # Overlaps the stored journey of 2024-07-29 16:00
+        response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"journey {self.journey.id}", response.data["train"][0])
+
+        # Overlaps the departures of self.template on Mondays
+        response = self.client.post(
+            url, {**payload, "departure_time": "12:00"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"template {self.template.id}", response.data["train"][0])
+
+        response = self.client.post(
+            url, {**payload, "departure_time": "21:30"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Its own materialized journeys do not block an update
+        journey = materialize(self.template, self.at(2024, 7, 30, 8))
+        response = self.client.patch(
+            reverse("station:journeytemplate-detail", args=[self.template.id]),
+            {"duration": "06:00:00"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(journey.template_id, self.template.id)
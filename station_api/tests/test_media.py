@@ -0,0 +1,115 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from station_api.media import parse_range
+
+NAME = "uploads/trains/train-101-0d4ee4b4-6cc4-4a4b-bd3a-6b0e4cbf2d7e.jpg"
+
+
+class MediaTests(SimpleTestCase):
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.content = bytes(range(256)) * 40
+        os.makedirs(os.path.join(media_root, "uploads/trains"))
+        for name in (NAME, "notes.txt"):
+            with open(os.path.join(media_root, name), "wb") as file:
+                file.write(self.content)
+        self.url = reverse("media", args=[NAME])
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=990-2000", 1000), (990, 999))
+        for header in ("bytes=0-1,5-6", "bytes=-", "items=0-1", "bytes=9-1"):
+            self.assertIsNone(parse_range(header, 1000))
+        for header in ("bytes=1000-", "bytes=-0"):
+            with self.assertRaises(ValueError):
+                parse_range(header, 1000)
+
+    def test_serve_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("ETag", response)
+
+        response = self.client.get(reverse("media", args=["notes.txt"]))
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+        for path in ("missing.jpg", "uploads", "../settings.py"):
+            response = self.client.get(reverse("media", args=[path]))
+            self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        response.close()
+
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("immutable", response["Cache-Control"])
+        response = self.client.get(
+            self.url, headers={"If-Modified-Since": last_modified}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.url, headers={"If-None-Match": '"other"'})
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        response = self.client.get(
+            self.url, headers={"If-Modified-Since": http_date(0)}
+        )
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, headers={"Range": "bytes=10-19"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+        response = self.client.get(self.url, headers={"Range": "bytes=-5"})
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+
+        response = self.client.get(self.url, headers={"Range": "bytes=99999-"})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+        # A stale If-Range gets the whole file
+        response = self.client.get(
+            self.url, headers={"Range": "bytes=10-19", "If-Range": '"stale"'}
+        )
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        etag = self.client.head(self.url)["ETag"]
+        response = self.client.get(
+            self.url, headers={"Range": "bytes=10-19", "If-Range": etag}
+        )
+        self.assertEqual(response.status_code, 206)
+        response.close()
+
+    def test_sendfile(self):
+        with override_settings(MEDIA_SENDFILE="x-accel-redirect"):
+            response = self.client.get(self.url, headers={"Range": "bytes=0-9"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{NAME}")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+
+        with override_settings(MEDIA_SENDFILE="x-sendfile"):
+            response = self.client.get(self.url)
+        self.assertTrue(response["X-Sendfile"].endswith(NAME))
+        self.assertTrue(os.path.isabs(response["X-Sendfile"]))
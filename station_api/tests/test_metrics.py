@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station_api import metrics
+from station_api.tests.utils import throttling_disabled
+from station_api.models import Journey, Order, Route, Station, Ticket, Train, TrainType
+from station_api.throttling import SlidingWindowUserThrottle
+
+
+def book_in_another_process(count):
+    metrics.TICKETS_BOOKED.inc(count)
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(METRICS_DIR=directory))
+
+        self.user = get_user_model().objects.create_user(
+            "user@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+
+        route = Route.objects.create(
+            source=Station.objects.create(
+                name="Station A", latitude=40.7128, longitude=-74.0060
+            ),
+            destination=Station.objects.create(
+                name="Station B", latitude=34.0522, longitude=-118.2437
+            ),
+        )
+        departure_time = timezone.make_aware(datetime(2024, 7, 27, 8))
+        self.journey = Journey.objects.create(
+            route=route,
+            train=Train.objects.create(
+                name="Train 101",
+                cargo_num=2,
+                places_in_cargo=10,
+                train_type=TrainType.objects.create(name="Express"),
+            ),
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith("#"):
+                sample, value = line.rsplit(" ", 1)
+                samples[sample] = float(value)
+        return samples
+
+    def book(self, *seats):
+        payload = {
+            "tickets": [
+                {"journey": self.journey.id, "cargo": 1, "seat": seat} for seat in seats
+            ]
+        }
+        with self.captureOnCommitCallbacks(execute=True), throttling_disabled():
+            return self.client.post(
+                reverse("station:order-book"), payload, format="json"
+            )
+
+    def test_request_metrics(self):
+        with throttling_disabled():
+            for _ in range(2):
+                self.client.get(reverse("station:journey-list"))
+            self.client.get(reverse("station:journey-detail", args=[0]))
+
+        samples = self.scrape()
+
+        labels = 'method="GET",view="JourneyViewSet.list"'
+        self.assertEqual(samples[f"http_request_duration_seconds_count{{{labels}}}"], 2)
+        self.assertEqual(
+            samples[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], 2
+        )
+        self.assertEqual(
+            samples[
+                'http_responses_total{method="GET",status="200",'
+                'view="JourneyViewSet.list"}'
+            ],
+            2,
+        )
+        self.assertEqual(
+            samples[
+                'http_responses_total{method="GET",status="404",'
+                'view="JourneyViewSet.retrieve"}'
+            ],
+            1,
+        )
+        self.assertGreater(samples['db_queries_total{view="JourneyViewSet.list"}'], 0)
+
+    def test_booking_counters(self):
+        self.assertEqual(self.book(1, 2, 3).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.book(3, 4).status_code, status.HTTP_400_BAD_REQUEST)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                cargo=2, seat=9, journey=self.journey, order=Order.objects.get()
+            )
+
+        samples = self.scrape()
+
+        self.assertEqual(samples["orders_created_total"], 1)
+        self.assertEqual(samples["tickets_booked_total"], 4)
+        self.assertEqual(samples['seat_conflicts_total{source="booking"}'], 1)
+
+    def test_ticket_seat_conflicts(self):
+        order = Order.objects.create(created_at=timezone.now(), user=self.user)
+        Ticket.objects.create(cargo=1, seat=1, journey=self.journey, order=order)
+        with self.assertRaises(ValidationError):
+            Ticket.objects.create(cargo=1, seat=1, journey=self.journey, order=order)
+
+        self.assertEqual(self.scrape()['seat_conflicts_total{source="ticket"}'], 1)
+
+    def test_throttle_rejections(self):
+        with mock.patch.dict(SlidingWindowUserThrottle.THROTTLE_RATES, user="1/minute"):
+            for _ in range(3):
+                self.client.get(reverse("station:station-list"))
+
+        self.assertEqual(self.scrape()['throttled_requests_total{scope="user"}'], 2)
+
+    def test_processes_are_added_up(self):
+        process = multiprocessing.get_context("fork").Process(
+            target=book_in_another_process, args=(5,)
+        )
+        process.start()
+        process.join()
+        metrics.TICKETS_BOOKED.inc(2)
+
+        self.assertEqual(self.scrape()["tickets_booked_total"], 7)
+
+    def test_hosts_sharing_the_directory_are_added_up(self):
+        self.enterContext(mock.patch.dict(metrics._files))
+        # Containers run their workers with the same pids
+        for host in ("web-1", "web-2"):
+            with mock.patch("socket.gethostname", return_value=host), mock.patch(
+                "os.getpid", return_value=1
+            ):
+                metrics.TICKETS_BOOKED.inc(2)
+
+        self.assertEqual(
+            sorted(os.listdir(settings.METRICS_DIR)), ["web-1-1.db", "web-2-1.db"]
+        )
+        self.assertEqual(self.scrape()["tickets_booked_total"], 4)
+
+    def test_file_is_continued_and_grows(self):
+        path = f"{self.enterContext(tempfile.TemporaryDirectory())}/1.db"
+        counters = metrics.CounterFile(path)
+        keys = [f"sample_{index}" * 20 for index in range(1_000)]
+        for key in keys:
+            counters.inc(key, 1.5)
+
+        reopened = metrics.CounterFile(path)
+        reopened.inc(keys[-1], 1)
+        with open(path, "rb") as file:
+            values = dict(metrics.read_entries(file.read()))
+
+        self.assertEqual(len(values), 1_000)
+        self.assertEqual(values[keys[0]], 1.5)
+        self.assertEqual(values[keys[-1]], 2.5)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        response = self.client.get(url, headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
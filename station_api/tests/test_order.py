@@ -1,9 +1,21 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from station_api.models import Journey, Route, Train, Station, TrainType
+from station_api.tests.utils import throttling_disabled
+from station_api.seats import SeatMap
+from station_api.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
 from datetime import datetime, timedelta
 
 
@@ -51,11 +63,13 @@ class JourneyTests(APITestCase):
         self.url = reverse("station:journey-list")
 
     def test_create_journey(self):
+        departure_time = self.departure_time + timedelta(days=1)
+        arrival_time = self.arrival_time + timedelta(days=1)
         payload = {
             "route": self.route.id,
             "train": self.train.id,
-            "departure_time": self.departure_time.isoformat(),  # ISO формат времени
-            "arrival_time": self.arrival_time.isoformat(),  # ISO формат времени
+            "departure_time": departure_time.isoformat(),  # ISO формат времени
+            "arrival_time": arrival_time.isoformat(),  # ISO формат времени
         }
         response = self.client.post(self.url, payload, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -74,9 +88,9 @@ class JourneyTests(APITestCase):
     def test_list_journey(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
-        self.assertEqual(len(response.data), 1)
-        journey_data = response.data[0]
+        self.assertIsInstance(response.data["results"], list)
+        self.assertEqual(len(response.data["results"]), 1)
+        journey_data = response.data["results"][0]
         self.assertEqual(journey_data["train"], self.train.name)
         self.assertEqual(
             journey_data["departure_time"].replace("Z", "+00:00"),
@@ -130,3 +144,219 @@ class JourneyTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class OrderBookingTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+
+        station_a = Station.objects.create(
+            name="Station A", latitude=40.7128, longitude=-74.0060
+        )
+        station_b = Station.objects.create(
+            name="Station B", latitude=34.0522, longitude=-118.2437
+        )
+        route = Route.objects.create(source=station_a, destination=station_b)
+        train = Train.objects.create(
+            name="Train 101",
+            cargo_num=2,
+            places_in_cargo=10,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        departure_time = timezone.make_aware(datetime(2024, 7, 27, 8))
+        self.journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+        self.url = reverse("station:order-book")
+
+    def test_book_tickets(self):
+        payload = {
+            "tickets": [
+                {"journey": self.journey.id, "cargo": 1, "seat": seat}
+                for seat in range(1, 7)
+            ]
+        }
+        # Including one update of each sales aggregate
+        with throttling_disabled(), self.assertNumQueries(9):
+            response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["tickets"]), 6)
+        order = Order.objects.get(pk=response.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.ticket_set.count(), 6)
+
+    def test_book_reports_every_conflict(self):
+        order = Order.objects.create(created_at=timezone.now(), user=self.user)
+        Ticket.objects.create(cargo=1, seat=2, journey=self.journey, order=order)
+        payload = {
+            "tickets": [
+                {"journey": self.journey.id, "cargo": 1, "seat": 1},
+                {"journey": self.journey.id, "cargo": 1, "seat": 2},
+                {"journey": self.journey.id, "cargo": 2, "seat": 1},
+                {"journey": self.journey.id, "cargo": 3, "seat": 11},
+            ]
+        }
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data["tickets"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("seat", errors[1])
+        self.assertIn("seat", errors[2])
+        self.assertEqual(set(errors[3]), {"cargo", "seat"})
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+
+class OrderExportTests(APITestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.admin_user)
+        start = timezone.make_aware(datetime(2024, 7, 27))
+        self.orders = Order.objects.bulk_create(
+            Order(created_at=start + timedelta(days=days), user=self.admin_user)
+            for days in range(5)
+        )
+
+    def test_export_orders(self):
+        response = self.client.get(
+            reverse("station:order-export"),
+            {"created_after": "2024-07-28", "created_before": "2024-07-30"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="orders.csv"'
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,created_at,user_id,user_email")
+        self.assertEqual(
+            [int(line.split(",")[0]) for line in lines[1:]],
+            [order.id for order in self.orders[1:3]],
+        )
+
+
+class GroupBookingTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        self.enterContext(throttling_disabled())
+
+        route = Route.objects.create(
+            source=Station.objects.create(
+                name="Station A", latitude=40.7128, longitude=-74.0060
+            ),
+            destination=Station.objects.create(
+                name="Station B", latitude=34.0522, longitude=-118.2437
+            ),
+        )
+        departure_time = timezone.make_aware(datetime(2024, 7, 27, 8))
+        self.journey = Journey.objects.create(
+            route=route,
+            train=Train.objects.create(
+                name="Train 101",
+                cargo_num=2,
+                places_in_cargo=10,
+                train_type=TrainType.objects.create(name="Express"),
+            ),
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+        self.order = Order.objects.create(created_at=departure_time, user=self.user)
+        self.url = reverse("station:order-book-group")
+
+    def take(self, cargo, *seats):
+        for seat in seats:
+            Ticket.objects.create(
+                cargo=cargo, seat=seat, journey=self.journey, order=self.order
+            )
+
+    def book(self, passengers):
+        return self.client.post(
+            self.url,
+            {"journey": self.journey.id, "passengers": passengers},
+            format="json",
+        )
+
+    def booked(self, response):
+        return sorted(
+            (ticket["cargo"], ticket["seat"]) for ticket in response.data["tickets"]
+        )
+
+    def test_allocate_shortest_fitting_run(self):
+        seat_map = SeatMap(2, 10, [0b0100100010, 0b0000000001])
+
+        # Free seats: 3-5, 7-8 and 10
+        self.assertEqual(
+            list(seat_map.free_runs(seat_map.free_seats())), [(3, 3), (7, 2), (10, 1)]
+        )
+        self.assertEqual(seat_map.allocate(2), [(2, 7), (2, 8)])
+        self.assertEqual(seat_map.allocate(3), [(2, 3), (2, 4), (2, 5)])
+        self.assertEqual(seat_map.allocate(4), [(2, 3), (2, 4), (2, 5), (2, 7)])
+        self.assertIsNone(seat_map.allocate(7))
+
+    def test_book_seats_together(self):
+        self.take(1, 1, 2, 6)
+
+        response = self.book(3)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.booked(response), [(2, 3), (2, 4), (2, 5)])
+        self.assertEqual(Order.objects.get(pk=response.data["id"]).user, self.user)
+
+    def test_book_split_group(self):
+        self.take(1, 2, 4, 6, 8)
+
+        response = self.book(5)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            self.booked(response), [(2, 1), (2, 3), (2, 5), (2, 9), (2, 10)]
+        )
+
+    def test_not_enough_seats(self):
+        self.take(1, *range(1, 9))
+
+        response = self.book(3)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Only 2 seats", response.data["passengers"][0])
+        self.assertEqual(Ticket.objects.count(), 8)
+
+    def stale_seat_maps(self):
+        """Serve a first map missing seat 1, as if it was booked meanwhile"""
+        for_journey = SeatMap.for_journey
+        calls = []
+
+        def seat_map(journey):
+            calls.append(journey)
+            seat_map = for_journey(journey)
+            if len(calls) == 1:
+                seat_map.bitmaps[0] &= ~1
+            return seat_map
+
+        return mock.patch.object(SeatMap, "for_journey", side_effect=seat_map)
+
+    def test_retry_when_a_seat_is_taken_meanwhile(self):
+        self.take(1, 1)
+
+        with self.stale_seat_maps():
+            response = self.book(10)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Only 9 seats", response.data["passengers"][0])
+
+        with self.stale_seat_maps():
+            response = self.book(9)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.booked(response), [(2, seat) for seat in range(2, 11)])
+        self.assertEqual(Ticket.objects.count(), 10)
@@ -0,0 +1,129 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station_api.models import Journey, Order, Route, Station, Train, TrainType
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.admin_user)
+
+        station_a = Station.objects.create(name="A", latitude=0, longitude=0)
+        station_b = Station.objects.create(name="B", latitude=1, longitude=1)
+        route = Route.objects.create(source=station_a, destination=station_b)
+        train = Train.objects.create(
+            name="Train 101",
+            cargo_num=10,
+            places_in_cargo=100,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        start = timezone.make_aware(datetime(2024, 7, 27, 8))
+        # Pairs of journeys share a departure time to exercise the tie breaker
+        self.journeys = [
+            Journey.objects.create(
+                route=route,
+                train=train,
+                departure_time=start + timedelta(hours=index // 2),
+                arrival_time=start + timedelta(hours=index // 2 + 3),
+            )
+            for index in range(7)
+        ]
+
+    def collect(self, url, params):
+        pages = []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([item["id"] for item in response.data["results"]])
+            url, params = response.data["next"], None
+        return pages
+
+    def test_journeys_are_paged_in_departure_order(self):
+        pages = self.collect(reverse("station:journey-list"), {"page_size": 3})
+
+        self.assertEqual(
+            pages,
+            [
+                [journey.id for journey in self.journeys[0:3]],
+                [journey.id for journey in self.journeys[3:6]],
+                [self.journeys[6].id],
+            ],
+        )
+
+    def test_previous_link_returns_previous_page(self):
+        url = reverse("station:journey-list")
+        first = self.client.get(url, {"page_size": 3})
+        self.assertIsNone(first.data["previous"])
+
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+
+        self.assertEqual(previous.data["results"], first.data["results"])
+
+    def test_orders_are_paged_newest_first(self):
+        orders = [
+            Order.objects.create(
+                created_at=timezone.now() - timedelta(days=index), user=self.admin_user
+            )
+            for index in range(3)
+        ]
+
+        pages = self.collect(reverse("station:order-list"), {"page_size": 2})
+
+        self.assertEqual(pages, [[orders[0].id, orders[1].id], [orders[2].id]])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            reverse("station:journey-list"), {"cursor": "not-a-cursor"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_wrongly_typed_value(self):
+        for values in ([[1], 1], [{"a": 1}, 1], ["2024-07-27T08:00:00", [1]]):
+            cursor = urlsafe_b64encode(
+                json.dumps({"reverse": False, "values": values}).encode()
+            ).decode()
+            with self.subTest(values=values):
+                response = self.client.get(
+                    reverse("station:journey-list"), {"cursor": cursor}
+                )
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_routes_with_unknown_distance_are_paged(self):
+        station_c = Station.objects.create(name="C", latitude=2, longitude=2)
+        for destination in Station.objects.exclude(pk=station_c.pk):
+            Route.objects.create(source=station_c, destination=destination)
+        Route.objects.filter(source=station_c).update(distance=None)
+        known = list(
+            Route.objects.filter(distance__isnull=False)
+            .order_by("distance", "id")
+            .values_list("id", flat=True)
+        )
+        unknown = list(
+            Route.objects.filter(distance__isnull=True)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        url = reverse("station:route-list")
+
+        pages = self.collect(url, {"ordering": "distance", "page_size": 1})
+        self.assertEqual(sum(pages, []), known + unknown)
+
+        pages = self.collect(url, {"ordering": "-distance", "page_size": 1})
+        self.assertEqual(sum(pages, []), unknown + known[::-1])
+
+        first = self.client.get(url, {"ordering": "distance", "page_size": 2})
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+        self.assertEqual(previous.data["results"], first.data["results"])
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station_api.models import Journey, Route, Station, Train, TrainType
+from station_api.planner import ConnectionIndex, connection_index
+
+
+class TripPlannerTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.kyiv, self.lviv, self.odesa, self.dnipro = (
+            Station.objects.create(name=name, latitude=0, longitude=0)
+            for name in ("Kyiv", "Lviv", "Odesa", "Dnipro")
+        )
+        self.train = Train.objects.create(
+            name="Train 101",
+            cargo_num=10,
+            places_in_cargo=100,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        self.start = timezone.make_aware(datetime(2024, 7, 27, 6))
+        self.url = reverse("station:journey-plan")
+
+    def create_journey(self, source, destination, departs_in, duration):
+        route, _ = Route.objects.get_or_create(source=source, destination=destination)
+        departure_time = self.start + timedelta(hours=departs_in)
+        return Journey.objects.create(
+            route=route,
+            train=self.train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=duration),
+        )
+
+    def plan(self, **params):
+        connection_index.invalidate()
+        params = {
+            "from": self.kyiv.id,
+            "to": self.odesa.id,
+            "departure_after": self.start.isoformat().replace("+00:00", "Z"),
+            **params,
+        }
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            [journey["id"] for journey in itinerary["journeys"]]
+            for itinerary in response.data
+        ]
+
+    def test_plan_prefers_earliest_arrival(self):
+        direct = self.create_journey(self.kyiv, self.odesa, 1, 10)
+        first = self.create_journey(self.kyiv, self.lviv, 0, 2)
+        second = self.create_journey(self.lviv, self.odesa, 3, 3)
+
+        self.assertEqual(self.plan(), [[first.id, second.id], [direct.id]])
+        self.assertEqual(self.plan(max_transfers=0), [[direct.id]])
+        self.assertEqual(self.plan(k=1), [[first.id, second.id]])
+
+    def test_plan_respects_min_transfer(self):
+        first = self.create_journey(self.kyiv, self.dnipro, 0, 2)
+        tight = self.create_journey(self.dnipro, self.odesa, 2.5, 2)
+        later = self.create_journey(self.dnipro, self.odesa, 5, 2)
+
+        self.assertEqual(self.plan(k=1), [[first.id, tight.id]])
+        self.assertEqual(self.plan(k=1, min_transfer=45), [[first.id, later.id]])
+
+    def test_plan_ignores_past_departures(self):
+        self.create_journey(self.kyiv, self.odesa, -1, 3)
+
+        self.assertEqual(self.plan(), [])
+
+    def test_plan_requires_stations(self):
+        response = self.client.get(self.url, {"from": self.kyiv.id})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_is_updated_incrementally(self):
+        connection_index.invalidate()
+        connection_index.connections()
+        with self.captureOnCommitCallbacks(execute=True):
+            journey = self.create_journey(self.kyiv, self.odesa, 1, 3)
+        self.assertIn(journey.id, [c[4] for c in connection_index.connections()])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            journey_id = journey.id
+            journey.delete()
+        self.assertNotIn(journey_id, [c[4] for c in connection_index.connections()])
+
+    def test_index_is_shared_between_processes(self):
+        # Two indexes stand for those of two worker processes, which share
+        # nothing but the database
+        first, second = ConnectionIndex(), ConnectionIndex()
+        first.connections()
+        second.connections()
+
+        journey = self.create_journey(self.kyiv, self.odesa, 1, 3)
+        first.journey_saved(journey.id)
+        caches["default"].clear()
+        self.assertIn(journey.id, [c[4] for c in second.connections()])
+
+        journey_id = journey.id
+        journey.delete()
+        first.journey_deleted(journey_id)
+        caches["default"].clear()
+        self.assertNotIn(journey_id, [c[4] for c in second.connections()])
+        self.assertNotIn(journey_id, [c[4] for c in first.connections()])
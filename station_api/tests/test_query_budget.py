@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station_api.tests.utils import throttling_disabled
+from station_api.models import (
+    Crew,
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+LIST_BUDGETS = {
+    "station:crew-list": (Crew, 1),
+    "station:station-list": (Station, 1),
+    "station:route-list": (Route, 1),
+    "station:traintype-list": (TrainType, 1),
+    "station:train-list": (Train, 1),
+    "station:journey-list": (Journey, 1),
+    "station:order-list": (Order, 1),
+    "station:ticket-list": (Ticket, 1),
+}
+
+DETAIL_BUDGETS = {
+    "station:crew-detail": (Crew, 1),
+    "station:station-detail": (Station, 1),
+    "station:route-detail": (Route, 1),
+    "station:traintype-detail": (TrainType, 1),
+    "station:train-detail": (Train, 1),
+    "station:journey-detail": (Journey, 1),
+    "station:order-detail": (Order, 2),
+    "station:ticket-detail": (Ticket, 1),
+}
+
+
+# Budgets count the queries of an uncached response
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        "shared": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    }
+)
+class QueryBudgetTests(APITestCase):
+    """Every endpoint runs a fixed number of queries whatever the row count"""
+
+    def setUp(self):
+        # Budgets count the queries of the endpoint, not of the throttle
+        self.enterContext(throttling_disabled())
+        self.admin_user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.user = get_user_model().objects.create_user(
+            "user@myproject.com", "password"
+        )
+
+    def populate(self, rows):
+        """Create ``rows`` objects of each model, each with its own relations"""
+        Crew.objects.bulk_create(
+            Crew(first_name=f"First {i}", last_name=f"Last {i}") for i in range(rows)
+        )
+        stations = Station.objects.bulk_create(
+            Station(name=f"Station {i}", latitude=i / 100, longitude=i / 100)
+            for i in range(rows + 1)
+        )
+        routes = Route.objects.bulk_create(
+            Route(source=stations[i], destination=stations[i + 1]) for i in range(rows)
+        )
+        train_types = TrainType.objects.bulk_create(
+            TrainType(name=f"Type {i}") for i in range(rows)
+        )
+        trains = Train.objects.bulk_create(
+            Train(
+                name=f"Train {i}",
+                cargo_num=10,
+                places_in_cargo=100,
+                train_type=train_types[i],
+            )
+            for i in range(rows)
+        )
+        start = timezone.make_aware(datetime(2024, 7, 27, 8))
+        journeys = Journey.objects.bulk_create(
+            Journey(
+                route=routes[i],
+                train=trains[i],
+                departure_time=start + timedelta(minutes=i),
+                arrival_time=start + timedelta(minutes=i, hours=3),
+            )
+            for i in range(rows)
+        )
+        orders = Order.objects.bulk_create(
+            Order(created_at=start - timedelta(minutes=i), user=self.user)
+            for i in range(rows)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(cargo=1, seat=1, journey=journeys[i], order=orders[i])
+            for i in range(rows)
+        )
+
+    def assertQueryBudget(self, url, budget):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"page_size": 1000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            "\n".join(query["sql"] for query in queries.captured_queries),
+        )
+        return response
+
+    def check_budgets(self, rows):
+        self.populate(rows)
+
+        self.client.force_authenticate(self.admin_user)
+        for name, (model, budget) in LIST_BUDGETS.items():
+            with self.subTest(name, rows=rows):
+                response = self.assertQueryBudget(reverse(name), budget)
+                self.assertEqual(
+                    len(response.data["results"]), min(model.objects.count(), 1000)
+                )
+
+        for name, (model, budget) in DETAIL_BUDGETS.items():
+            with self.subTest(name, rows=rows):
+                pk = model.objects.order_by("pk").last().pk
+                self.assertQueryBudget(reverse(name, kwargs={"pk": pk}), budget)
+
+        self.client.force_authenticate(self.user)
+        for name in ("station:order-list", "station:ticket-list"):
+            with self.subTest(name, rows=rows, staff=False):
+                response = self.assertQueryBudget(reverse(name), LIST_BUDGETS[name][1])
+                self.assertEqual(len(response.data["results"]), rows)
+
+    def test_query_budget_with_1_row(self):
+        self.check_budgets(1)
+
+    def test_query_budget_with_10_rows(self):
+        self.check_budgets(10)
+
+    def test_query_budget_with_1000_rows(self):
+        self.check_budgets(1000)
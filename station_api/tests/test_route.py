@@ -1,4 +1,9 @@
+import json
+import tempfile
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
 from geopy.distance import geodesic
 from rest_framework import status
@@ -35,9 +40,9 @@ class RouteTests(APITestCase):
     def test_list_route(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
-        self.assertEqual(len(response.data), 1)
-        route_data = response.data[0]
+        self.assertIsInstance(response.data["results"], list)
+        self.assertEqual(len(response.data["results"]), 1)
+        route_data = response.data["results"][0]
         self.assertEqual(route_data["source"], self.station_a.name)
         self.assertEqual(route_data["destination"], self.station_b.name)
 
@@ -76,3 +81,89 @@ class RouteTests(APITestCase):
             geodesic((40.7128, 74.0060), (34.0522, 118.2437)).kilometers,
             places=1,
         )
+
+    def test_station_move_updates_distance(self):
+        self.station_b.latitude = 51.5074
+        self.station_b.longitude = -0.1278
+        self.station_b.save()
+
+        self.route.refresh_from_db()
+        self.assertAlmostEqual(
+            self.route.distance,
+            geodesic((40.7128, -74.0060), (51.5074, -0.1278)).kilometers,
+            places=3,
+        )
+
+    def test_station_rename_keeps_distance(self):
+        Route.objects.update(distance=1)
+        self.station_b.name = "Station B2"
+        self.station_b.save()
+
+        self.route.refresh_from_db()
+        self.assertEqual(self.route.distance, 1)
+
+    def test_filter_and_order_by_distance(self):
+        station_c = Station.objects.create(
+            name="Station C", latitude=40.7306, longitude=-73.9352
+        )
+        short_route = Route.objects.create(source=self.station_a, destination=station_c)
+
+        response = self.client.get(self.url, {"ordering": "distance"})
+        self.assertEqual(
+            [route["id"] for route in response.data["results"]],
+            [short_route.id, self.route.id],
+        )
+
+        response = self.client.get(self.url, {"min_distance": 100})
+        self.assertEqual(
+            [route["id"] for route in response.data["results"]], [self.route.id]
+        )
+
+        response = self.client.get(self.url, {"ordering": "name"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for params in ({"min_distance": "nan"}, {"max_distance": "-inf"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_backfill_route_distances(self):
+        Route.objects.update(distance=None)
+
+        call_command("backfill_route_distances", stdout=StringIO())
+
+        self.route.refresh_from_db()
+        self.assertAlmostEqual(
+            self.route.distance,
+            geodesic((40.7128, -74.0060), (34.0522, -118.2437)).kilometers,
+            places=3,
+        )
+
+    def test_loaddata_computes_distance(self):
+        # Routes first, their stations only exist once the fixture is loaded
+        fixture = [
+            {
+                "model": "station_api.route",
+                "pk": 100,
+                "fields": {"source": 100, "destination": self.station_b.pk},
+            },
+            {
+                "model": "station_api.station",
+                "pk": 100,
+                "fields": {"name": "Station C", "latitude": 0, "longitude": 0},
+            },
+            {
+                "model": "station_api.route",
+                "pk": 101,
+                "fields": {"source": self.station_b.pk, "destination": 100},
+            },
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as file:
+            json.dump(fixture, file)
+            file.flush()
+            call_command("loaddata", file.name, verbosity=0)
+
+        expected = geodesic((0, 0), (34.0522, -118.2437)).kilometers
+        for pk in (100, 101):
+            self.assertAlmostEqual(
+                Route.objects.get(pk=pk).distance, expected, places=3
+            )
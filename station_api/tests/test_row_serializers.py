@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from station_api.benchmarking import seed
+from station_api.tests.utils import throttling_disabled
+from station_api.models import Journey, Route, Ticket
+from station_api.row_serializers import (
+    JourneyListRowSerializer,
+    RouteListRowSerializer,
+    TicketListRowSerializer,
+)
+from station_api.serializers import (
+    JourneyListSerializer,
+    RouteListSerializer,
+    TicketListSerializer,
+)
+
+
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        "shared": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    }
+)
+class RowSerializerTests(APITestCase):
+    def setUp(self):
+        seed(
+            {
+                "stations": 6,
+                "routes": 12,
+                "trains": 3,
+                "journeys": 30,
+                "users": 3,
+                "orders": 10,
+                "tickets": 60,
+            }
+        )
+        self.client.force_authenticate(
+            get_user_model().objects.create_superuser("admin@myproject.com", "pass")
+        )
+        self.enterContext(throttling_disabled())
+
+    def assertSameOutput(self, queryset, row_serializer, list_serializer):
+        rows = queryset.order_by("pk").values(*row_serializer.values)
+        self.assertEqual(
+            row_serializer.many(rows),
+            list_serializer(queryset.order_by("pk"), many=True).data,
+        )
+
+    def test_same_output_as_list_serializers(self):
+        Route.objects.filter(pk=Route.objects.order_by("pk").first().pk).update(
+            distance=None
+        )
+        self.assertSameOutput(
+            Route.objects.select_related("source", "destination"),
+            RouteListRowSerializer(),
+            RouteListSerializer,
+        )
+        self.assertSameOutput(
+            Journey.objects.select_related(
+                "route__source", "route__destination", "train"
+            ),
+            JourneyListRowSerializer(),
+            JourneyListSerializer,
+        )
+        self.assertSameOutput(
+            Ticket.objects.select_related(
+                "journey__route__source",
+                "journey__route__destination",
+                "journey__train",
+                "order__user",
+            ),
+            TicketListRowSerializer(),
+            TicketListSerializer,
+        )
+
+    def collect(self, url, params):
+        """Follow the next links and return every result"""
+        results = []
+        response = self.client.get(url, {**params, "page_size": 7})
+        while True:
+            data = response.json()
+            results.extend(data["results"])
+            if not data["next"]:
+                return results
+            response = self.client.get(data["next"])
+
+    def test_pages_follow_the_cursor_ordering(self):
+        cases = [
+            (
+                "station:route-list",
+                {"ordering": "-distance"},
+                Route.objects.order_by("-distance", "id"),
+                RouteListSerializer,
+            ),
+            (
+                "station:journey-list",
+                {},
+                Journey.objects.order_by("departure_time", "id"),
+                JourneyListSerializer,
+            ),
+            (
+                "station:ticket-list",
+                {},
+                Ticket.objects.order_by("journey", "seat"),
+                TicketListSerializer,
+            ),
+        ]
+        for name, params, queryset, serializer in cases:
+            with self.subTest(name):
+                self.assertEqual(
+                    self.collect(reverse(name), params),
+                    serializer(queryset, many=True).data,
+                )
+
+    def test_previous_page(self):
+        first = self.client.get(reverse("station:journey-list"), {"page_size": 5})
+        second = self.client.get(first.json()["next"])
+        previous = self.client.get(second.json()["previous"])
+
+        self.assertEqual(previous.json()["results"], first.json()["results"])
@@ -0,0 +1,227 @@
+import io
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from station_api.tests.utils import throttling_disabled
+from station_api.models import (
+    Journey,
+    JourneySales,
+    Order,
+    Route,
+    RouteDaySales,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from station_api.sales import rebuild_sales
+
+
+class SalesTests(APITestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.admin_user)
+        self.enterContext(throttling_disabled())
+
+        station_a = Station.objects.create(
+            name="Station A", latitude=40.7128, longitude=-74.0060
+        )
+        station_b = Station.objects.create(
+            name="Station B", latitude=34.0522, longitude=-118.2437
+        )
+        self.route = Route.objects.create(source=station_a, destination=station_b)
+        self.other_route = Route.objects.create(source=station_b, destination=station_a)
+        self.train = Train.objects.create(
+            name="Train 101",
+            cargo_num=2,
+            places_in_cargo=10,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        self.departure_time = timezone.make_aware(datetime(2024, 7, 27, 8))
+        self.journeys = [
+            Journey.objects.create(
+                route=self.route,
+                train=self.train,
+                departure_time=self.departure_time + timedelta(hours=hours),
+                arrival_time=self.departure_time + timedelta(hours=hours + 5),
+            )
+            for hours in (0, 4, 24)
+        ]
+        self.order = Order.objects.create(
+            created_at=self.departure_time, user=self.admin_user
+        )
+
+    def sell(self, journey, *seats):
+        return [
+            Ticket.objects.create(cargo=1, seat=seat, journey=journey, order=self.order)
+            for seat in seats
+        ]
+
+    def assertConsistent(self):
+        report = rebuild_sales(check=True)
+        self.assertEqual(report["journey_mismatches"], 0)
+        self.assertEqual(report["route_day_mismatches"], 0)
+
+    def test_tickets_and_bookings(self):
+        self.sell(self.journeys[0], 1, 2)
+        response = self.client.post(
+            reverse("station:order-book"),
+            {"tickets": [{"journey": self.journeys[1].id, "cargo": 1, "seat": 1}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(
+            reverse("station:order-book-group"),
+            {"journey": self.journeys[2].id, "passengers": 3},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertConsistent()
+        sales = JourneySales.objects.get(journey=self.journeys[0])
+        self.assertEqual((sales.tickets_sold, sales.capacity), (2, 20))
+        day = RouteDaySales.objects.get(route=self.route, day="2024-07-27")
+        self.assertEqual((day.journeys, day.tickets_sold, day.capacity), (2, 3, 40))
+
+    def test_changes_and_deletes(self):
+        tickets = self.sell(self.journeys[0], 1, 2, 3)
+        self.sell(self.journeys[1], 1)
+
+        tickets[0].journey = self.journeys[2]
+        tickets[0].save()
+        self.assertConsistent()
+
+        tickets[1].delete()
+        self.assertConsistent()
+
+        self.journeys[0].route = self.other_route
+        self.journeys[0].departure_time += timedelta(days=3)
+        self.journeys[0].save()
+        self.assertConsistent()
+
+        self.train.places_in_cargo = 20
+        self.train.save()
+        self.assertConsistent()
+
+        self.journeys[1].delete()
+        self.assertConsistent()
+
+        Ticket.objects.filter(journey=self.journeys[2]).delete()
+        self.assertConsistent()
+
+        self.order.delete()
+        self.assertConsistent()
+
+    def test_cascades_do_not_count_tickets_one_by_one(self):
+        def delete_queries(delete):
+            with CaptureQueriesContext(connection) as queries:
+                delete()
+            return len(queries)
+
+        self.sell(self.journeys[0], 1)
+        self.sell(self.journeys[1], *range(1, 11))
+        self.assertEqual(
+            delete_queries(self.journeys[0].delete),
+            delete_queries(self.journeys[1].delete),
+        )
+        self.assertConsistent()
+
+        other_order = Order.objects.create(
+            created_at=self.departure_time, user=self.admin_user
+        )
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journeys[2], order=other_order
+        )
+        self.sell(self.journeys[2], *range(2, 12))
+        self.assertEqual(
+            delete_queries(other_order.delete), delete_queries(self.order.delete)
+        )
+        self.assertConsistent()
+
+    def test_rebuild_command(self):
+        self.sell(self.journeys[0], 1, 2)
+        JourneySales.objects.update(tickets_sold=0)
+        RouteDaySales.objects.all().delete()
+
+        with self.assertRaisesMessage(CommandError, "1 journey and 2 route day"):
+            call_command("rebuild_sales", "--check", stdout=io.StringIO())
+
+        out = io.StringIO()
+        call_command("rebuild_sales", "--batch-size", "2", stdout=out)
+        self.assertIn("Rebuilt the sales of 3 journeys", out.getvalue())
+        self.assertConsistent()
+        self.assertEqual(JourneySales.objects.get(pk=self.journeys[0]).tickets_sold, 2)
+
+    def test_journey_sales(self):
+        self.sell(self.journeys[0], 1, 2, 3, 4, 5)
+
+        response = self.client.get(
+            reverse("station:sales-journeys"), {"date_to": "2024-07-27"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [dict(row) for row in response.data["results"]],
+            [
+                {
+                    "tickets_sold": 5,
+                    "capacity": 20,
+                    "seats_remaining": 15,
+                    "load_factor": 0.25,
+                    "journey": self.journeys[0].id,
+                    "route": self.route.id,
+                    "departure_time": "2024-07-27T08:00:00Z",
+                },
+                {
+                    "tickets_sold": 0,
+                    "capacity": 20,
+                    "seats_remaining": 20,
+                    "load_factor": 0.0,
+                    "journey": self.journeys[1].id,
+                    "route": self.route.id,
+                    "departure_time": "2024-07-27T12:00:00Z",
+                },
+            ],
+        )
+
+    def test_route_and_day_sales(self):
+        self.sell(self.journeys[0], 1, 2)
+        self.sell(self.journeys[2], 1, 2, 3, 4)
+
+        routes = self.client.get(reverse("station:sales-routes"))
+        days = self.client.get(
+            reverse("station:sales-days"),
+            {"route": self.route.id, "date_from": "2024-07-28"},
+        )
+
+        self.assertEqual(
+            [
+                (row["route"], row["source"], row["journeys"], row["tickets_sold"])
+                for row in routes.data
+            ],
+            [(self.route.id, "Station A", 3, 6)],
+        )
+        self.assertEqual(routes.data[0]["load_factor"], 0.1)
+        self.assertEqual(
+            [(row["day"], row["tickets_sold"], row["capacity"]) for row in days.data],
+            [("2024-07-28", 4, 20)],
+        )
+
+    def test_sales_are_staff_only(self):
+        user = get_user_model().objects.create_user("user@myproject.com", "password")
+        self.client.force_authenticate(user)
+
+        for name in ("journeys", "routes", "days"):
+            response = self.client.get(reverse(f"station:sales-{name}"))
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,8 +1,12 @@
 from django.urls import reverse
+from geopy.distance import geodesic
 from rest_framework import status
 from rest_framework.test import APITestCase
 from station_api.models import Station
+from station_api.search import station_search
+from station_api.spatial import StationIndex, station_index
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 
 
 class StationTests(APITestCase):
@@ -27,9 +31,9 @@ class StationTests(APITestCase):
         """Test listing stations"""
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], "Central Station")
+        self.assertIsInstance(response.data["results"], list)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "Central Station")
 
     def test_retrieve_station(self):
         """Test retrieving a station"""
@@ -53,3 +57,129 @@ class StationTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_stations_conditional_get(self):
+        """Test the station list is cached and revalidated by its ETag"""
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["results"][0]["name"], "Central Station")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        self.station.name = "North Station"
+        self.station.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["results"][0]["name"], "North Station")
+
+    def test_nearby_stations(self):
+        """Test finding the closest stations to a point"""
+        brooklyn = Station.objects.create(
+            name="Brooklyn", latitude=40.6782, longitude=-73.9442
+        )
+        Station.objects.create(
+            name="Los Angeles", latitude=34.0522, longitude=-118.2437
+        )
+        station_index.invalidate()
+        url = reverse("station:station-nearby")
+
+        response = self.client.get(url, {"lat": 40.7, "lon": -74.0, "k": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["id"] for station in response.data],
+            [self.station.id, brooklyn.id],
+        )
+        self.assertAlmostEqual(
+            response.data[0]["distance"],
+            geodesic((40.7, -74.0), (40.7128, -74.0060)).kilometers,
+            places=3,
+        )
+
+        response = self.client.get(
+            url, {"lat": 40.6782, "lon": -73.9442, "radius_km": 1}
+        )
+        self.assertEqual([station["id"] for station in response.data], [brooklyn.id])
+
+    def test_nearby_index_is_shared_between_processes(self):
+        # Two indexes stand for those of two worker processes
+        first, second = StationIndex(), StationIndex()
+        second.nearest(0, 0)
+        station = Station.objects.create(name="Null Island", latitude=0, longitude=0)
+        first.invalidate()
+        caches["default"].clear()
+        self.assertEqual(second.nearest(0, 0, k=1)[0][0], station.id)
+
+    def test_nearby_stations_invalid_params(self):
+        """Test the nearby lookup rejects bad coordinates"""
+        url = reverse("station:station-nearby")
+        for params in (
+            {"lat": 40.7},
+            {"lat": 95, "lon": 0},
+            {"lat": "x", "lon": 0},
+            {"lat": "nan", "lon": 0},
+            {"lat": 0, "lon": 0, "k": 2.7},
+            {"lat": 0, "lon": 0, "radius_km": "inf"},
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_stations(self):
+        """Test prefix search follows creates, renames and deletes"""
+        central_park = Station.objects.create(
+            name="Central Park", latitude=40.7829, longitude=-73.9654
+        )
+        kyiv = Station.objects.create(
+            name="Kyiv-Pasazhyrskyi", latitude=50.4404, longitude=30.4889
+        )
+        url = reverse("station:station-search")
+
+        response = self.client.get(url, {"q": "centr"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {station["id"] for station in response.data},
+            {self.station.id, central_park.id},
+        )
+        response = self.client.get(url, {"q": "central sta"})
+        self.assertEqual(
+            [station["id"] for station in response.data], [self.station.id]
+        )
+        self.assertEqual(response.data[0]["latitude"], self.station.latitude)
+        response = self.client.get(url, {"q": "pasaz"})
+        self.assertEqual([station["id"] for station in response.data], [kyiv.id])
+
+        central_park.name = "Midtown"
+        central_park.save()
+        self.station.delete()
+        response = self.client.get(url, {"q": "centr"})
+        self.assertEqual(response.data, [])
+        response = self.client.get(url, {"q": "MID", "limit": 1})
+        self.assertEqual(
+            [station["id"] for station in response.data], [central_park.id]
+        )
+
+    def test_search_ranks_every_match(self):
+        """Test the best match of a broad prefix is found among many"""
+        Station.objects.bulk_create(
+            Station(name=f"Lviv Suburban {index}", latitude=49.8, longitude=24)
+            for index in range(1_000)
+        )
+        station_search.rebuild()
+        lviv = Station.objects.create(name="Lviv", latitude=49.8397, longitude=24.0297)
+
+        response = self.client.get(
+            reverse("station:station-search"), {"q": "l", "limit": 1}
+        )
+        self.assertEqual([station["id"] for station in response.data], [lviv.id])
+
+    def test_search_stations_invalid_params(self):
+        """Test the search rejects a missing query and bad limits"""
+        url = reverse("station:station-search")
+        for params in ({}, {"q": "a", "limit": 0}, {"q": "a", "limit": "x"}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from station_api.models import ThrottleWindow
+from station_api.throttling import SlidingWindowThrottle, SlidingWindowUserThrottle
+
+
+class View:
+    action = "book"
+    throttle_costs = {"book": 4}
+
+
+class TestThrottle(SlidingWindowThrottle):
+    scope = "test"
+    rate = "10/minute"
+
+    def __init__(self, now=0, ident="client"):
+        super().__init__()
+        self.timer = lambda: now
+        self.ident = ident
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.ident}
+
+
+class SlidingWindowThrottleTests(APITestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get("/")
+
+    def test_costs_are_weighted(self):
+        throttle = TestThrottle()
+        self.assertTrue(throttle.allow_request(self.request, View()))
+        self.assertTrue(throttle.allow_request(self.request, View()))
+        self.assertFalse(throttle.allow_request(self.request, View()))
+        # A cheaper request still fits in what is left
+        self.assertTrue(throttle.allow_request(self.request, None))
+        self.assertEqual(ThrottleWindow.objects.get().cost, 9)
+
+    def test_counters_are_shared(self):
+        """Test separate instances, as in separate processes, share the budget"""
+        for _ in range(10):
+            self.assertTrue(TestThrottle(now=1).allow_request(self.request, None))
+        throttle = TestThrottle(now=2)
+        self.assertFalse(throttle.allow_request(self.request, None))
+        self.assertAlmostEqual(throttle.wait(), 64)
+
+    def test_window_slides(self):
+        for _ in range(10):
+            TestThrottle(now=30).allow_request(self.request, None)
+
+        # Halfway into the next window, half of the previous spend remains
+        for _ in range(5):
+            self.assertTrue(TestThrottle(now=90).allow_request(self.request, None))
+        throttle = TestThrottle(now=90)
+        self.assertFalse(throttle.allow_request(self.request, None))
+        self.assertAlmostEqual(throttle.wait(), 6)
+
+    def test_old_windows_are_removed(self):
+        TestThrottle(now=0, ident="gone").allow_request(self.request, None)
+        TestThrottle(now=0).allow_request(self.request, None)
+        TestThrottle(now=60).allow_request(self.request, None)
+        TestThrottle(now=120).allow_request(self.request, None)
+        # Including those of keys that are not seen again
+        self.assertEqual(
+            sorted(ThrottleWindow.objects.values_list("window", flat=True)), [1, 2]
+        )
+
+    def test_concurrent_requests_cannot_overspend(self):
+        for _ in range(9):
+            TestThrottle().allow_request(self.request, None)
+        throttle = TestThrottle()
+        # Both read a spend of 9 before either of them records its request
+        with mock.patch.object(TestThrottle, "spent", return_value=(0, 9)):
+            self.assertTrue(TestThrottle().allow_request(self.request, None))
+            self.assertFalse(throttle.allow_request(self.request, None))
+        self.assertEqual(ThrottleWindow.objects.get().cost, 10)
+
+    def test_bulk_delete_without_receivers_is_one_query(self):
+        ThrottleWindow.objects.bulk_create(
+            ThrottleWindow(key="key", window=window) for window in range(10)
+        )
+
+        with self.assertNumQueries(1):
+            ThrottleWindow.objects.all().delete()
+
+
+class BookingThrottleTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_booking_spends_more_of_the_rate(self):
+        url = reverse("station:order-book")
+        with mock.patch.dict(
+            SlidingWindowUserThrottle.THROTTLE_RATES, user="11/minute"
+        ):
+            for _ in range(2):
+                response = self.client.post(url, {}, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            response = self.client.post(url, {}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            # Catalog reads cost one request each
+            response = self.client.get(reverse("station:station-list"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -6,6 +6,9 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from station_api.models import Journey, Order, Ticket, Station, Route, Train, TrainType
 from datetime import datetime, timedelta
+import csv
+import json
+
 import pytz
 
 
@@ -102,7 +105,8 @@ class TicketTests(APITestCase):
     def test_list_tickets(self):
         response = self.client.get(reverse("station:ticket-list"))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # Only one ticket should exist
+        # Only one ticket should exist
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_retrieve_ticket(self):
         url = reverse("station:ticket-detail", kwargs={"pk": self.ticket.id})
@@ -119,3 +123,53 @@ class TicketTests(APITestCase):
         # Verify ticket is deleted
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_tickets_csv(self):
+        Ticket.objects.create(
+            cargo=2,
+            seat=2,
+            journey=self.journey,
+            order=Order.objects.create(
+                created_at=self.departure_time + timedelta(days=1), user=self.user
+            ),
+        )
+        url = reverse("station:ticket-export")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(
+            csv.DictReader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        self.assertEqual([row["seat"] for row in rows], ["1", "2"])
+        self.assertEqual(rows[0]["journey_route_source_name"], "Station A")
+        self.assertEqual(rows[0]["order_user_email"], "user@myproject.com")
+        self.assertEqual(rows[0]["order_created_at"], "2024-07-27T08:00:00Z")
+
+        response = self.client.get(url, {"created_after": "2024-07-28"})
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 2)
+
+    def test_export_tickets_ndjson(self):
+        response = self.client.get(
+            reverse("station:ticket-export"),
+            {"export_format": "ndjson", "created_before": "2024-07-27T09:00:00"},
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], self.ticket.id)
+        self.assertEqual(rows[0]["journey_train_name"], "Train 101")
+
+    def test_export_tickets_invalid_params(self):
+        url = reverse("station:ticket-export")
+        for params in ({"export_format": "xml"}, {"created_after": "yesterday"}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_tickets_staff_only(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("station:ticket-export"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
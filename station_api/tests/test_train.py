@@ -1,17 +1,23 @@
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 from PIL import Image
+import io
 import tempfile
 import os
 
+from station_api.images import update_variants, wait_for_variants
 from station_api.models import Train, TrainType, Crew, Station
 from rest_framework.authtoken.models import Token
 
 
 class TrainTests(APITestCase):
     def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
         self.admin_user = get_user_model().objects.create_superuser(
             "admin@myproject.com", "password"
         )
@@ -25,6 +31,15 @@ class TrainTests(APITestCase):
         )
         self.url = reverse("station:train-list")
 
+    def test_retrieve_train_after_train_type_change(self):
+        """Test a cached train is refreshed when its train type changes"""
+        url = reverse("station:train-detail", kwargs={"pk": self.train.id})
+        self.assertEqual(self.client.get(url).json()["train_type"]["name"], "Express")
+
+        self.train_type.name = "Regional"
+        self.train_type.save()
+        self.assertEqual(self.client.get(url).json()["train_type"]["name"], "Regional")
+
     def test_upload_image_to_train(self):
         """Test uploading an image to a train"""
         url = reverse("station:train-detail", kwargs={"pk": self.train.id})
@@ -85,9 +100,9 @@ class TrainTests(APITestCase):
     def test_list_train(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
-        self.assertEqual(len(response.data), 1)
-        train_data = response.data[0]
+        self.assertIsInstance(response.data["results"], list)
+        self.assertEqual(len(response.data["results"]), 1)
+        train_data = response.data["results"][0]
         self.assertEqual(train_data["name"], self.train.name)
         self.assertEqual(train_data["cargo_num"], self.train.cargo_num)
         self.assertEqual(train_data["places_in_cargo"], self.train.places_in_cargo)
@@ -123,3 +138,96 @@ class TrainTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TrainImageVariantsMixin:
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.admin_user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.admin_user)
+        self.train = Train.objects.create(
+            name="Train 101",
+            cargo_num=10,
+            places_in_cargo=100,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        self.url = reverse("station:train-detail", kwargs={"pk": self.train.id})
+
+    def upload(self, size=(1600, 900)):
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            Image.new("RGB", size, "navy").save(ntf, format="JPEG")
+            ntf.seek(0)
+            response = self.client.patch(self.url, {"image": ntf}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def assertVariants(self, source):
+        variants = self.client.get(self.url).data["image_variants"]
+        self.assertEqual(set(variants), {"large", "medium", "thumbnail"})
+        self.assertEqual(
+            (variants["large"]["width"], variants["large"]["height"]), (1280, 720)
+        )
+        self.assertEqual(
+            (variants["thumbnail"]["width"], variants["thumbnail"]["height"]),
+            (200, 113),
+        )
+        self.assertTrue(variants["medium"]["webp"].startswith("http://testserver/"))
+        self.assertTrue(variants["medium"]["jpeg"].endswith(".jpeg"))
+
+        stored = Train.objects.get(pk=self.train.pk).image_variants
+        self.assertEqual(stored["source"], source)
+        for name in ("large", "medium", "thumbnail"):
+            for extension in ("webp", "jpeg"):
+                self.assertTrue(default_storage.exists(stored[name][extension]))
+        return stored
+
+
+@override_settings(IMAGE_WORKERS=0)
+class TrainImageVariantsTests(TrainImageVariantsMixin, APITestCase):
+    def upload(self, size=(1600, 900)):
+        with self.captureOnCommitCallbacks(execute=True):
+            return super().upload(size)
+
+    def test_variants_made_on_upload(self):
+        self.assertEqual(self.client.get(self.url).data["image_variants"], {})
+        self.upload()
+        self.assertVariants(Train.objects.get(pk=self.train.pk).image.name)
+
+        response = self.client.get(reverse("station:train-list"))
+        self.assertEqual(
+            set(response.data["results"][0]["image_variants"]),
+            {"large", "medium", "thumbnail"},
+        )
+
+    def test_new_image_replaces_variants(self):
+        self.upload()
+        old = self.assertVariants(Train.objects.get(pk=self.train.pk).image.name)
+        self.upload(size=(900, 1600))
+        new = Train.objects.get(pk=self.train.pk).image_variants
+        self.assertNotEqual(new["source"], old["source"])
+        self.assertEqual((new["large"]["width"], new["large"]["height"]), (720, 1280))
+        self.assertFalse(default_storage.exists(old["large"]["webp"]))
+        self.assertTrue(default_storage.exists(new["large"]["webp"]))
+
+    def test_variants_of_a_replaced_image_are_discarded(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 300)).save(buffer, format="JPEG")
+        source = default_storage.save("uploads/trains/old.jpg", buffer)
+        # The train got another image while the variants were made
+        Train.objects.filter(pk=self.train.pk).update(image="uploads/trains/new.jpg")
+
+        update_variants(self.train.pk, source)
+        self.assertEqual(Train.objects.get(pk=self.train.pk).image_variants, {})
+        self.assertEqual(default_storage.listdir("uploads/trains/variants")[1], [])
+
+
+@override_settings(IMAGE_WORKERS=2)
+class TrainImageWorkerTests(TrainImageVariantsMixin, APITransactionTestCase):
+    def test_variants_made_by_workers(self):
+        response = self.upload()
+        self.assertEqual(response.data["image_variants"], {})
+        wait_for_variants()
+        self.assertVariants(Train.objects.get(pk=self.train.pk).image.name)
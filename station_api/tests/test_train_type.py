@@ -23,9 +23,9 @@ class TrainTypeTests(APITestCase):
     def test_list_traintype(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
-        self.assertEqual(len(response.data), 1)
-        traindata = response.data[0]
+        self.assertIsInstance(response.data["results"], list)
+        self.assertEqual(len(response.data["results"]), 1)
+        traindata = response.data["results"][0]
         self.assertEqual(traindata["name"], self.train_type.name)
 
     def test_retrieve_traintype(self):
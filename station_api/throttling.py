@@ -0,0 +1,135 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Rate throttle whose counters live in the database.
+
+    Every worker process sees the same counters, so the configured rate
+    holds for the whole deployment rather than per process. The sliding
+    window is estimated from two fixed windows: the spend of the previous
+    one, weighted by how much of it still overlaps the last ``duration``
+    seconds, plus the spend of the current one.
+
+    A request spends ``throttle_costs[view.action]`` of the rate (1 when the
+    view does not list its action), so expensive endpoints use up the budget
+    faster than cheap reads.
+    """
+
+    # Last window each scope was pruned in by this process
+    _pruned = {}
+
+    def get_cost(self, request, view):
+        return getattr(view, "throttle_costs", {}).get(getattr(view, "action", None), 1)
+
+    def spent(self, window):
+        """Return the spend of the previous and the current window"""
+        from .models import ThrottleWindow
+
+        costs = dict(
+            ThrottleWindow.objects.filter(
+                key=self.key, window__in=(window - 1, window)
+            ).values_list("window", "cost")
+        )
+        return costs.get(window - 1, 0), costs.get(window, 0)
+
+    def record(self, window, budget):
+        """Spend ``self.cost`` in ``window`` if its spend stays within ``budget``.
+
+        The check and the increment are one conditional ``UPDATE``, so
+        concurrent requests can never spend more than the budget together.
+        Returns whether the cost was spent.
+        """
+        from .models import ThrottleWindow
+
+        current = ThrottleWindow.objects.filter(
+            key=self.key, window=window, cost__lte=budget - self.cost
+        )
+        if not self.current:
+            try:
+                with transaction.atomic():
+                    ThrottleWindow.objects.create(
+                        key=self.key, window=window, cost=self.cost
+                    )
+                return True
+            except IntegrityError:
+                # Another process opened the window first
+                pass
+        return current.update(cost=F("cost") + self.cost) == 1
+
+    def prune(self, window):
+        """Drop the expired windows of every key of the scope.
+
+        Each process does it once per window, so keys that are never seen
+        again do not leave rows behind.
+        """
+        from .models import ThrottleWindow
+
+        if self._pruned.get(self.scope) == window:
+            return
+        self._pruned[self.scope] = window
+        prefix = self.cache_format % {"scope": self.scope, "ident": ""}
+        ThrottleWindow.objects.filter(
+            key__startswith=prefix, window__lt=window - 1
+        ).delete()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        self.cost = self.get_cost(request, view)
+        window, self.elapsed = divmod(self.now / self.duration, 1)
+        window = int(window)
+        self.prune(window)
+        self.previous, self.current = self.spent(window)
+        # What the current window may hold once the previous one is weighted
+        budget = self.num_requests - self.previous * (1 - self.elapsed)
+        if self.current + self.cost > budget:
+            return self.throttle_failure()
+        if not self.record(window, budget):
+            # Other requests spent the budget since it was read
+            self.previous, self.current = self.spent(window)
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def throttle_failure(self):
+        from .metrics import THROTTLED_REQUESTS
+
+        THROTTLED_REQUESTS.inc(scope=self.scope)
+        return False
+
+    def wait(self):
+        """Seconds until the request would fit in the sliding window"""
+        available = self.num_requests - self.cost
+        if available < 0:
+            return None
+
+        if self.current <= available:
+            # The previous window has to fade out far enough
+            fraction = 1 - (available - self.current) / self.previous
+            return max(fraction - self.elapsed, 0) * self.duration
+
+        # The current window has to become the previous one and fade out
+        fraction = 1 - available / self.current
+        return (1 - self.elapsed + fraction) * self.duration
+
+
+class SlidingWindowAnonThrottle(SlidingWindowThrottle, AnonRateThrottle):
+    pass
+
+
+class SlidingWindowUserThrottle(SlidingWindowThrottle, UserRateThrottle):
+    pass
@@ -0,0 +1,138 @@
+"""Validation of proposed timetables.
+
+A timetable is a list of journeys to schedule. Its journeys are checked
+against each other and against the stored journeys with one sort-and-sweep
+pass per train, in O(n log n) for n journeys, and the stored journeys they
+can overlap are read with a single query.
+"""
+
+from collections import defaultdict
+
+from .models import Journey, Route, Train
+
+MAX_TIMETABLE_JOURNEYS = 10_000
+
+ARRIVAL_BEFORE_DEPARTURE = "arrival_before_departure"
+UNKNOWN_ROUTE = "unknown_route"
+UNKNOWN_TRAIN = "unknown_train"
+OVERLAP = "overlap"
+CONFLICT_REASONS = (ARRIVAL_BEFORE_DEPARTURE, UNKNOWN_ROUTE, UNKNOWN_TRAIN, OVERLAP)
+
+# Kinds of sweep intervals, stored journeys sort first on equal times
+STORED, PROPOSED = 0, 1
+
+
+def _conflict(index, journey, reason, message, other_index=None, other_journey=None):
+    return {
+        "index": index,
+        "train": journey["train"],
+        "reason": reason,
+        "message": message,
+        "other_index": other_index,
+        "other_journey": other_journey,
+    }
+
+
+def _existing_ids(model, ids):
+    return set(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
+
+
+def _sweep(intervals):
+    """Yield ``(earlier, later)`` overlapping intervals of one train.
+
+    The intervals are ``(departure, arrival, kind, key)`` tuples. Each one is
+    compared with the interval arriving last among those departing before
+    it, so every interval overlapping an earlier one is yielded once,
+    together with an interval it overlaps.
+    """
+    intervals.sort()
+    running = None
+    for interval in intervals:
+        if running is not None and interval[0] < running[1]:
+            yield running, interval
+        if running is None or interval[1] > running[1]:
+            running = interval
+
+
+def find_conflicts(journeys, stored=None):
+    """Every conflict of the proposed ``journeys``.
+
+    ``journeys`` are dicts with ``route`` and ``train`` primary keys and
+    aware ``departure_time`` and ``arrival_time``. Conflicts refer to them by
+    their position in the list; an overlap also names the proposed or stored
+    journey overlapped. Every proposed journey overlapping another one is
+    part of at least one reported overlap. ``stored`` narrows the stored
+    journeys checked, all of them by default.
+    """
+    conflicts = []
+    routes = _existing_ids(Route, {journey["route"] for journey in journeys})
+    trains = _existing_ids(Train, {journey["train"] for journey in journeys})
+
+    per_train = defaultdict(list)
+    for index, journey in enumerate(journeys):
+        if journey["route"] not in routes:
+            conflicts.append(
+                _conflict(index, journey, UNKNOWN_ROUTE, "The route does not exist")
+            )
+        if journey["train"] not in trains:
+            conflicts.append(
+                _conflict(index, journey, UNKNOWN_TRAIN, "The train does not exist")
+            )
+        elif journey["arrival_time"] <= journey["departure_time"]:
+            conflicts.append(
+                _conflict(
+                    index,
+                    journey,
+                    ARRIVAL_BEFORE_DEPARTURE,
+                    "The arrival must be after the departure",
+                )
+            )
+        else:
+            per_train[journey["train"]].append(
+                (journey["departure_time"], journey["arrival_time"], PROPOSED, index)
+            )
+    if not per_train:
+        return conflicts
+
+    proposed = [interval for intervals in per_train.values() for interval in intervals]
+    stored = (
+        (Journey.objects if stored is None else stored)
+        .filter(
+            train_id__in=per_train,
+            departure_time__lt=max(interval[1] for interval in proposed),
+            arrival_time__gt=min(interval[0] for interval in proposed),
+        )
+        .values_list("train_id", "departure_time", "arrival_time", "pk")
+    )
+    for train_id, departure_time, arrival_time, pk in stored:
+        per_train[train_id].append((departure_time, arrival_time, STORED, pk))
+
+    for intervals in per_train.values():
+        for earlier, later in _sweep(intervals):
+            if later[2] == PROPOSED:
+                index, other = later[3], earlier
+            elif earlier[2] == PROPOSED:
+                index, other = earlier[3], later
+            else:
+                continue
+            if other[2] == PROPOSED:
+                message = (
+                    f"The train is already on journey #{other[3]} of the timetable"
+                )
+                other_index, other_journey = other[3], None
+            else:
+                message = f"The train is already on journey {other[3]} at that time"
+                other_index, other_journey = None, other[3]
+            conflicts.append(
+                _conflict(
+                    index,
+                    journeys[index],
+                    OVERLAP,
+                    message,
+                    other_index=other_index,
+                    other_journey=other_journey,
+                )
+            )
+
+    conflicts.sort(key=lambda conflict: conflict["index"])
+    return conflicts
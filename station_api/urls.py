@@ -7,8 +7,11 @@ from .views import (
     TrainViewSet,
     TrainTypeViewSet,
     JourneyViewSet,
+    JourneyTemplateViewSet,
     OrderViewSet,
     TicketViewSet,
+    SalesViewSet,
+    RequestTimingsView,
 )
 
 router = DefaultRouter()
@@ -18,11 +21,14 @@ router.register(r"routes", RouteViewSet)
 router.register(r"train-types", TrainTypeViewSet)
 router.register(r"trains", TrainViewSet)
 router.register(r"journeys", JourneyViewSet)
+router.register(r"journey-templates", JourneyTemplateViewSet)
 router.register(r"orders", OrderViewSet)
 router.register(r"tickets", TicketViewSet)
+router.register(r"sales", SalesViewSet, basename="sales")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("timings/", RequestTimingsView.as_view(), name="timings"),
 ]
 
 app_name = "station"
@@ -1,13 +1,54 @@
-from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
-
-from .models import Crew, Station, Route, Train, TrainType, Order, Ticket, Journey
+from datetime import datetime, time, timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
+from rest_framework import generics, status, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+
+from .caching import CachedResponseMixin
+from .exports import (
+    ORDER_EXPORT_FIELDS,
+    TICKET_EXPORT_FIELDS,
+    ExportMixin,
+    export_parameters,
+)
+from .instrumentation import SerializerTimingMixin, request_timings
+from .models import (
+    Crew,
+    Station,
+    Route,
+    Train,
+    TrainType,
+    Order,
+    Ticket,
+    Journey,
+    JourneySales,
+    JourneyTemplate,
+    RouteDaySales,
+)
+from .params import param_to_date, param_to_datetime, param_to_float, param_to_int
 from .permissions import IsAdminOrIfAuthenticatedReadOnly
+from .planner import MAX_TRANSFERS, MIN_TRANSFER_TIME, connection_index
+from .row_serializers import (
+    JourneyListRowSerializer,
+    RouteListRowSerializer,
+    RowListMixin,
+    TicketListRowSerializer,
+)
+from .schedules import MAX_DEPARTURES, MAX_DEPARTURES_WINDOW, departures
+from .search import SearchMixin, crew_search, station_search
+from .seats import get_seat_map
+from .spatial import station_index
+from .timetable import find_conflicts
 from .serializers import (
     CrewSerializer,
     StationSerializer,
+    StationNearbySerializer,
     TrainSerializer,
     TrainTypeSerializer,
     OrderSerializer,
@@ -20,18 +61,32 @@ from .serializers import (
     TrainDetailSerializer,
     JourneyListSerializer,
     JourneyDetailSerializer,
+    JourneySeatMapSerializer,
+    ItinerarySerializer,
+    TimetableSerializer,
+    TimetableReportSerializer,
+    JourneyTemplateSerializer,
+    DepartureSerializer,
     OrderListSerializer,
     OrderDetailSerializer,
+    OrderBookingSerializer,
+    GroupBookingSerializer,
     TicketListSerializer,
     TicketDetailSerializer,
+    ViewTimingsSerializer,
+    JourneySalesSerializer,
+    RouteSalesSerializer,
+    DaySalesSerializer,
 )
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(
+    SerializerTimingMixin, CachedResponseMixin, SearchMixin, viewsets.ModelViewSet
+):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    search_index = crew_search
 
     def get_queryset(self):
         """Retrieve the crew with filters"""
@@ -45,7 +100,7 @@ class CrewViewSet(viewsets.ModelViewSet):
 
         if last_name:
             queryset = queryset.filter(last_name__icontains=last_name)
-        return queryset.distinct()
+        return queryset
 
     @extend_schema(
         parameters=[
@@ -67,17 +122,100 @@ class CrewViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class StationViewSet(viewsets.ModelViewSet):
+class StationViewSet(
+    SerializerTimingMixin, CachedResponseMixin, SearchMixin, viewsets.ModelViewSet
+):
     queryset = Station.objects.all()
-    serializer_class = StationSerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    search_index = station_search
+
+    def get_serializer_class(self):
+        if self.action == "nearby":
+            return StationNearbySerializer
 
+        return StationSerializer
 
-class RouteViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("lat", type=float, description="Latitude", required=True),
+            OpenApiParameter("lon", type=float, description="Longitude", required=True),
+            OpenApiParameter(
+                "k",
+                type=int,
+                description="Number of stations to return (1-100), 10 by default",
+                required=False,
+            ),
+            OpenApiParameter(
+                "radius_km",
+                type=float,
+                description="Only return stations within this distance",
+                required=False,
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="nearby")
+    def nearby(self, request):
+        """Return the stations closest to the given point"""
+        params = request.query_params
+        for required in ("lat", "lon"):
+            if not params.get(required):
+                raise ValidationError({required: "This parameter is required."})
+
+        radius_km = params.get("radius_km")
+        matches = station_index.nearest(
+            param_to_float("lat", params["lat"], -90, 90),
+            param_to_float("lon", params["lon"], -180, 180),
+            k=param_to_int("k", params.get("k", 10), 1, 100),
+            radius_km=(
+                param_to_float("radius_km", radius_km, 0, 20_038) if radius_km else None
+            ),
+        )
+
+        stations = Station.objects.in_bulk([station_id for station_id, _ in matches])
+        nearby = []
+        for station_id, distance in matches:
+            station = stations.get(station_id)
+            if station is not None:
+                station.distance = distance
+                nearby.append(station)
+        return Response(self.get_serializer(nearby, many=True).data)
+
+
+class RouteViewSet(
+    SerializerTimingMixin, CachedResponseMixin, RowListMixin, viewsets.ModelViewSet
+):
     queryset = Route.objects.all().select_related("source", "destination")
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    list_row_serializer = RouteListRowSerializer()
+    cache_dependencies = (Route, Station)
+
+    def get_queryset(self):
+        """Retrieve the routes with distance filters and ordering"""
+        min_distance = self.request.query_params.get("min_distance")
+        max_distance = self.request.query_params.get("max_distance")
+        ordering = self.request.query_params.get("ordering")
+
+        queryset = self.queryset
+
+        if min_distance:
+            queryset = queryset.filter(
+                distance__gte=param_to_float("min_distance", min_distance)
+            )
+
+        if max_distance:
+            queryset = queryset.filter(
+                distance__lte=param_to_float("max_distance", max_distance)
+            )
+
+        if ordering:
+            if ordering not in ("distance", "-distance"):
+                raise ValidationError(
+                    {"ordering": "Ordering by distance or -distance is supported."}
+                )
+            queryset = queryset.order_by(ordering, "id")
+            self.cursor_ordering = (ordering, "id")
+
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -88,18 +226,45 @@ class RouteViewSet(viewsets.ModelViewSet):
 
         return RouteSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "min_distance",
+                type=float,
+                description="Minimum distance in kilometers",
+                required=False,
+            ),
+            OpenApiParameter(
+                "max_distance",
+                type=float,
+                description="Maximum distance in kilometers",
+                required=False,
+            ),
+            OpenApiParameter(
+                "ordering",
+                type=str,
+                enum=["distance", "-distance"],
+                description="Order by distance",
+                required=False,
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-class TrainTypeViewSet(viewsets.ModelViewSet):
+
+class TrainTypeViewSet(
+    SerializerTimingMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
     queryset = TrainType.objects.all()
     serializer_class = TrainTypeSerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
 
-class TrainViewSet(viewsets.ModelViewSet):
+class TrainViewSet(SerializerTimingMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Train.objects.all().select_related("train_type")
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_dependencies = (Train, TrainType)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -111,10 +276,63 @@ class TrainViewSet(viewsets.ModelViewSet):
         return TrainSerializer
 
 
-class JourneyViewSet(viewsets.ModelViewSet):
-    queryset = Journey.objects.all().select_related("route", "train")
-    authentication_classes = (TokenAuthentication,)
+class JourneyViewSet(SerializerTimingMixin, RowListMixin, viewsets.ModelViewSet):
+    queryset = Journey.objects.all().select_related(
+        "route__source", "route__destination", "train"
+    )
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cursor_ordering = ("departure_time", "id")
+    throttle_costs = {
+        "list": 2,
+        "departures": 2,
+        "seats": 2,
+        "plan": 5,
+        "validate_timetable": 10,
+    }
+    list_row_serializer = JourneyListRowSerializer()
+
+    def get_queryset(self):
+        """Retrieve the journeys with filters"""
+        source = self.request.query_params.get("from")
+        destination = self.request.query_params.get("to")
+        date = self.request.query_params.get("date")
+        departure_after = self.request.query_params.get("departure_after")
+        departure_before = self.request.query_params.get("departure_before")
+
+        queryset = self.queryset
+
+        if source:
+            source = param_to_int("from", source)
+            queryset = queryset.filter(route__source_id=source)
+
+        if destination:
+            destination = param_to_int("to", destination)
+            queryset = queryset.filter(route__destination_id=destination)
+
+        if date:
+            day = param_to_date("date", date)
+            # A half-open range keeps the lookup on the departure_time index
+            start = timezone.make_aware(datetime.combine(day, time.min))
+            queryset = queryset.filter(
+                departure_time__gte=start,
+                departure_time__lt=start + timedelta(days=1),
+            )
+
+        if departure_after:
+            queryset = queryset.filter(
+                departure_time__gte=param_to_datetime(
+                    "departure_after", departure_after
+                )
+            )
+
+        if departure_before:
+            queryset = queryset.filter(
+                departure_time__lte=param_to_datetime(
+                    "departure_before", departure_before
+                )
+            )
+
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -123,27 +341,264 @@ class JourneyViewSet(viewsets.ModelViewSet):
         if self.action == "retrieve":
             return JourneyDetailSerializer
 
+        if self.action == "seats":
+            return JourneySeatMapSerializer
+
+        if self.action == "plan":
+            return ItinerarySerializer
+
+        if self.action == "validate_timetable":
+            return TimetableSerializer
+
+        if self.action == "departures":
+            return DepartureSerializer
+
         return JourneySerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=int,
+                description="Filter by source station id",
+                required=False,
+            ),
+            OpenApiParameter(
+                "to",
+                type=int,
+                description="Filter by destination station id",
+                required=False,
+            ),
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                description="Filter by departure date (ex. ?date=2024-07-27)",
+                required=False,
+            ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description="Departing at or after the given time",
+                required=False,
+            ),
+            OpenApiParameter(
+                "departure_before",
+                type=OpenApiTypes.DATETIME,
+                description="Departing at or before the given time",
+                required=False,
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from", type=int, description="Source station id", required=True
+            ),
+            OpenApiParameter(
+                "to", type=int, description="Destination station id", required=True
+            ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description="Earliest departure, defaults to now",
+                required=False,
+            ),
+            OpenApiParameter(
+                "min_transfer",
+                type=int,
+                description="Minimum transfer time in minutes",
+                required=False,
+            ),
+            OpenApiParameter(
+                "max_transfers",
+                type=int,
+                description="Maximum number of transfers",
+                required=False,
+            ),
+            OpenApiParameter(
+                "k",
+                type=int,
+                description="Number of itineraries to return (1-10)",
+                required=False,
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="plan")
+    def plan(self, request):
+        """Find the earliest-arrival itineraries between two stations"""
+        params = request.query_params
+        for required in ("from", "to"):
+            if not params.get(required):
+                raise ValidationError({required: "This parameter is required."})
+
+        departure_after = params.get("departure_after")
+        min_transfer = params.get("min_transfer")
+        max_transfers = params.get("max_transfers")
+        itineraries = connection_index.plan(
+            param_to_int("from", params["from"]),
+            param_to_int("to", params["to"]),
+            (
+                param_to_datetime("departure_after", departure_after)
+                if departure_after
+                else timezone.now()
+            ),
+            limit=min(max(param_to_int("k", params.get("k", 3)), 1), 10),
+            min_transfer=(
+                timedelta(minutes=param_to_int("min_transfer", min_transfer))
+                if min_transfer
+                else MIN_TRANSFER_TIME
+            ),
+            max_transfers=(
+                min(max(param_to_int("max_transfers", max_transfers), 0), 5)
+                if max_transfers
+                else MAX_TRANSFERS
+            ),
+        )
+
+        journeys = Journey.objects.select_related(
+            "route__source", "route__destination", "train"
+        ).in_bulk({pk for itinerary in itineraries for pk in itinerary.journey_ids})
+        data = [
+            {
+                "departure_time": itinerary.departure_time,
+                "arrival_time": itinerary.arrival_time,
+                "transfers": itinerary.transfers,
+                "journeys": [journeys[pk] for pk in itinerary.journey_ids],
+            }
+            for itinerary in itineraries
+            if all(pk in journeys for pk in itinerary.journey_ids)
+        ]
+        return Response(self.get_serializer(data, many=True).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=int,
+                description="Filter by source station id",
+                required=False,
+            ),
+            OpenApiParameter(
+                "to",
+                type=int,
+                description="Filter by destination station id",
+                required=False,
+            ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description="Departing at or after the given time, defaults to now",
+                required=False,
+            ),
+            OpenApiParameter(
+                "departure_before",
+                type=OpenApiTypes.DATETIME,
+                description="Departing before the given time, at most "
+                f"{MAX_DEPARTURES_WINDOW.days} days after departure_after, "
+                "a day after it by default",
+                required=False,
+            ),
+            OpenApiParameter(
+                "limit",
+                type=int,
+                description=f"Number of departures to return (1-{MAX_DEPARTURES}), "
+                "100 by default",
+                required=False,
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="departures")
+    def departures(self, request):
+        """List the stored journeys and the departures of templates in order"""
+        params = request.query_params
+        departure_after = params.get("departure_after")
+        departure_before = params.get("departure_before")
+        start = (
+            param_to_datetime("departure_after", departure_after)
+            if departure_after
+            else timezone.now()
+        )
+        end = (
+            param_to_datetime("departure_before", departure_before)
+            if departure_before
+            else start + timedelta(days=1)
+        )
+        if not start < end <= start + MAX_DEPARTURES_WINDOW:
+            raise ValidationError(
+                {
+                    "departure_before": "Ensure this value is after departure_after "
+                    f"and at most {MAX_DEPARTURES_WINDOW.days} days later."
+                }
+            )
+        limit = param_to_int("limit", params.get("limit", 100))
+        if not 1 <= limit <= MAX_DEPARTURES:
+            raise ValidationError(
+                {"limit": f"Ensure this value is between 1 and {MAX_DEPARTURES}."}
+            )
 
-class OrderViewSet(viewsets.ModelViewSet):
+        journeys, templates = Journey.objects.all(), JourneyTemplate.objects.all()
+        for param, lookup in (
+            ("from", "route__source_id"),
+            ("to", "route__destination_id"),
+        ):
+            if params.get(param):
+                station = param_to_int(param, params[param])
+                journeys = journeys.filter(**{lookup: station})
+                templates = templates.filter(**{lookup: station})
+
+        rows = departures(journeys, templates, start, end, limit)
+        return Response(self.get_serializer(rows, many=True).data)
+
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        """Return the free/taken seats of every cargo of the journey"""
+        journey = self.get_object()
+        seat_map = get_seat_map(journey)
+        serializer = self.get_serializer(seat_map.to_dict(journey.id))
+        return Response(serializer.data)
+
+    @extend_schema(responses=TimetableReportSerializer)
+    @action(methods=["POST"], detail=False, url_path="validate-timetable")
+    def validate_timetable(self, request):
+        """Report every conflict of the proposed journeys, without saving them"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        journeys = serializer.validated_data["journeys"]
+        conflicts = find_conflicts(journeys)
+        report = {
+            "journeys": len(journeys),
+            "valid": not conflicts,
+            "conflicts": conflicts,
+        }
+        return Response(TimetableReportSerializer(report).data)
+
+
+class JourneyTemplateViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
+    queryset = JourneyTemplate.objects.all()
+    serializer_class = JourneyTemplateSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+
+class OrderViewSet(SerializerTimingMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all().select_related("user").prefetch_related("ticket_set")
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    cursor_ordering = ("-created_at", "-id")
+    throttle_costs = {"book": 5, "book_group": 5, "export": 10}
+    export_fields = ORDER_EXPORT_FIELDS
+    export_filename = "orders"
 
     def get_queryset(self):
-        if self.request.user.is_staff:
-            return (
-                Order.objects.all()
-                .select_related("user")
-                .prefetch_related("ticket_set")
-            )
-        else:
-            return (
-                Order.objects.filter(user=self.request.user)
-                .select_related("user")
-                .prefetch_related("ticket_set")
-            )
+        queryset = self.queryset
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+
+        if self.action == "list":
+            # The list only renders the user, tickets are left out
+            return queryset.prefetch_related(None)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -152,21 +607,58 @@ class OrderViewSet(viewsets.ModelViewSet):
         if self.action == "retrieve":
             return OrderDetailSerializer
 
-        return OrderSerializer
+        if self.action == "book":
+            return OrderBookingSerializer
+
+        if self.action == "book_group":
+            return GroupBookingSerializer
 
+        return OrderSerializer
 
-class TicketViewSet(viewsets.ModelViewSet):
-    queryset = Ticket.objects.all().select_related("journey", "order")
-    authentication_classes = (TokenAuthentication,)
+    @extend_schema(responses={status.HTTP_201_CREATED: OrderDetailSerializer})
+    @action(methods=["POST"], detail=False, url_path="book")
+    def book(self, request):
+        """Create an order with all of its tickets in one transaction"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        return Response(
+            OrderDetailSerializer(order, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(responses={status.HTTP_201_CREATED: OrderDetailSerializer})
+    @action(methods=["POST"], detail=False, url_path="book-group")
+    def book_group(self, request):
+        """Book seats for a group, picked next to each other where possible"""
+        return self.book(request)
+
+
+@extend_schema_view(
+    export=extend_schema(parameters=export_parameters("Tickets of orders"))
+)
+class TicketViewSet(
+    SerializerTimingMixin, ExportMixin, RowListMixin, viewsets.ModelViewSet
+):
+    queryset = Ticket.objects.all().select_related(
+        "journey__route__source",
+        "journey__route__destination",
+        "journey__train",
+        "order__user",
+    )
     permission_classes = (IsAuthenticated,)
+    cursor_ordering = ("journey", "seat")
+    throttle_costs = {"export": 10}
+    list_row_serializer = TicketListRowSerializer()
+    export_fields = TICKET_EXPORT_FIELDS
+    export_filename = "tickets"
+    export_date_field = "order__created_at"
 
     def get_queryset(self):
         if self.request.user.is_staff:
-            return Ticket.objects.all().select_related("journey", "order")
+            return self.queryset
         else:
-            return Ticket.objects.filter(order__user=self.request.user).select_related(
-                "journey", "order"
-            )
+            return self.queryset.filter(order__user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -176,3 +668,118 @@ class TicketViewSet(viewsets.ModelViewSet):
             return TicketDetailSerializer
 
         return TicketSerializer
+
+
+SALES_PARAMETERS = [
+    OpenApiParameter(
+        "route",
+        type=int,
+        description="Filter by route id",
+        required=False,
+    ),
+    OpenApiParameter(
+        "date_from",
+        type=OpenApiTypes.DATE,
+        description="Departures on or after the given day",
+        required=False,
+    ),
+    OpenApiParameter(
+        "date_to",
+        type=OpenApiTypes.DATE,
+        description="Departures on or before the given day",
+        required=False,
+    ),
+]
+
+
+class SalesViewSet(SerializerTimingMixin, viewsets.GenericViewSet):
+    """Occupancy and sales read from the incrementally kept aggregates"""
+
+    queryset = JourneySales.objects.all()
+    permission_classes = (IsAdminUser,)
+    cursor_ordering = ("journey",)
+
+    def _filters(self, route_field, day_field):
+        """Lookups for the route and departure day query parameters"""
+        params = self.request.query_params
+        filters = {}
+        if params.get("route"):
+            filters[route_field] = param_to_int("route", params["route"])
+        if params.get("date_from"):
+            filters[f"{day_field}__gte"] = param_to_date(
+                "date_from", params["date_from"]
+            )
+        if params.get("date_to"):
+            filters[f"{day_field}__lte"] = param_to_date("date_to", params["date_to"])
+        return filters
+
+    def _totals(self, group_by):
+        return (
+            RouteDaySales.objects.filter(**self._filters("route_id", "day"))
+            .values(*group_by)
+            .annotate(
+                total_journeys=Sum("journeys"),
+                total_tickets_sold=Sum("tickets_sold"),
+                total_capacity=Sum("capacity"),
+            )
+            .order_by(group_by[0])
+        )
+
+    def get_serializer_class(self):
+        if self.action == "routes":
+            return RouteSalesSerializer
+
+        if self.action == "days":
+            return DaySalesSerializer
+
+        return JourneySalesSerializer
+
+    @extend_schema(
+        parameters=SALES_PARAMETERS, responses=JourneySalesSerializer(many=True)
+    )
+    @action(methods=["GET"], detail=False, url_path="journeys")
+    def journeys(self, request):
+        """Tickets sold and seats remaining per journey"""
+        filters = self._filters("journey__route_id", "journey__departure_time__date")
+        rows = self.queryset.filter(**filters).values(
+            "journey_id",
+            "journey__route_id",
+            "journey__departure_time",
+            "tickets_sold",
+            "capacity",
+        )
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @extend_schema(
+        parameters=SALES_PARAMETERS, responses=RouteSalesSerializer(many=True)
+    )
+    @action(methods=["GET"], detail=False, url_path="routes", pagination_class=None)
+    def routes(self, request):
+        """Totals per route over the departure days"""
+        rows = self._totals(
+            ("route_id", "route__source__name", "route__destination__name")
+        )
+        return Response(self.get_serializer(rows, many=True).data)
+
+    @extend_schema(parameters=SALES_PARAMETERS, responses=DaySalesSerializer(many=True))
+    @action(methods=["GET"], detail=False, url_path="days", pagination_class=None)
+    def days(self, request):
+        """Totals per departure day over the routes"""
+        rows = self._totals(("day",))
+        return Response(self.get_serializer(rows, many=True).data)
+
+
+class RequestTimingsView(SerializerTimingMixin, generics.GenericAPIView):
+    serializer_class = ViewTimingsSerializer
+    permission_classes = (IsAdminUser,)
+    pagination_class = None
+
+    def get(self, request):
+        """Timings per view action of the requests served by this process"""
+        return Response(self.get_serializer(request_timings.snapshot(), many=True).data)
+
+    def delete(self, request):
+        """Start the timings over"""
+        request_timings.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,11 @@
+"""URLs of the ASGI application: the async read views take precedence over
+the routes of the matching viewsets, everything else is shared with WSGI.
+"""
+
+from django.urls import path, include
+
+from train_station.urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path("api/station/", include("station_api.async_urls")),
+] + wsgi_urlpatterns
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -38,6 +39,7 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    "station_api.instrumentation.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -67,6 +69,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "train_station.wsgi.application"
 
+ASGI_APPLICATION = "train_station.asgi.application"
+
+ASGI_URLCONF = "train_station.asgi_urls"
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
@@ -74,6 +80,19 @@ DATABASES = {
     }
 }
 
+# "shared" is seen by every worker process, create its table with
+# `python manage.py createcachetable`
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "station_api_cache",
+        "OPTIONS": {"MAX_ENTRIES": 10_000},
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -106,13 +125,15 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "station_api.throttling.SlidingWindowAnonThrottle",
+        "station_api.throttling.SlidingWindowUserThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "50/minute", "user": "100/minute"},
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
+        "rest_framework.authentication.TokenAuthentication",
     ),
+    "DEFAULT_PAGINATION_CLASS": "station_api.pagination.KeysetPagination",
 }
 
 SIMPLE_JWT = {
@@ -121,6 +142,9 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
 }
 
+# Seconds a worker process reuses the user of a JWT, 0 reads it every request
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", 30))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Train Station API",
     "DESCRIPTION": """
@@ -151,3 +175,18 @@ SPECTACULAR_SETTINGS = {
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# "x-sendfile" (Apache, lighttpd) or "x-accel-redirect" (nginx) lets the front
+# proxy send media files, nginx serves MEDIA_ACCEL_REDIRECT_PREFIX as an
+# internal location aliased to MEDIA_ROOT
+MEDIA_SENDFILE = os.getenv("MEDIA_SENDFILE") or None
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+
+# Threads per process making the resized train images, 0 makes them inline
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
+# One file per worker process, shared by every worker of the deployment
+METRICS_DIR = os.getenv(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "train_station_metrics")
+)
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
@@ -0,0 +1,86 @@
+"""JWT authentication without a database query per request.
+
+Access tokens are verified from their signature alone, and the users they
+name are kept for ``AUTH_USER_CACHE_TTL`` seconds in a cache of the process.
+Saving or deleting a user drops it from the cache of the process doing it,
+so deactivation and staff changes apply there right away and in the other
+worker processes once their entry expires.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+MAX_CACHED_USERS = 10_000
+
+# (expiry, user) by str(user_id), tokens may carry the id as a string
+_users = OrderedDict()
+_users_lock = threading.Lock()
+
+
+def cached_user(user_id):
+    user_id = str(user_id)
+    with _users_lock:
+        entry = _users.get(user_id)
+        if entry is None:
+            return None
+        expires, user = entry
+        if expires <= time.monotonic():
+            del _users[user_id]
+            return None
+        _users.move_to_end(user_id)
+        return user
+
+
+def cache_user(user_id, user):
+    ttl = settings.AUTH_USER_CACHE_TTL
+    if ttl <= 0:
+        return
+    user_id = str(user_id)
+    with _users_lock:
+        _users[user_id] = (time.monotonic() + ttl, user)
+        _users.move_to_end(user_id)
+        while len(_users) > MAX_CACHED_USERS:
+            _users.popitem(last=False)
+
+
+def forget_user(user_id):
+    with _users_lock:
+        _users.pop(str(user_id), None)
+
+
+def clear_user_cache():
+    with _users_lock:
+        _users.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` reading users from the cache of the process"""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = None if user_id is None else cached_user(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_user(user_id, user)
+        elif api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        # Views may change request.user, other requests must not see it
+        return copy.copy(user)
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = CachedJWTAuthentication
@@ -1,3 +1,76 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from station_api.tests.utils import throttling_disabled
+from user.authentication import CachedJWTAuthentication, clear_user_cache
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        clear_user_cache()
+        self.addCleanup(clear_user_cache)
+        self.enterContext(throttling_disabled())
+        self.user = get_user_model().objects.create_user(
+            "user@myproject.com", "password"
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    def authenticate(self):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        user, _ = CachedJWTAuthentication().authenticate(request)
+        return user
+
+    def test_user_read_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(), self.user)
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user, self.user)
+        self.assertIsNot(user, self.authenticate())
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    def test_user_changes_apply_right_away(self):
+        self.assertFalse(self.authenticate().is_staff)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertTrue(self.authenticate().is_staff)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_endpoints_accept_jwt_and_token(self):
+        url = reverse("user:manage")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        response = self.client.patch(url, {"email": "renamed@myproject.com"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url)
+        self.assertEqual(response.data["email"], "renamed@myproject.com")
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+        response = self.client.get(reverse("station:order-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)